@@ -1,3 +1,4 @@
 from nab3.aws import AWS
 from nab3 import service
 from nab3.base import Exclude, Filter
+from nab3.reachability import Reachability
@@ -1,18 +1,118 @@
+import logging
+
 import boto3
 
-from nab3.base import BaseAWS, ClientHandler
+from nab3.base import BaseAWS, ClientHandler, ServiceWrapper
+from nab3.config_query import select_resources
+from nab3.scheduler import Scheduler
+from nab3.tag_index import TagIndex
+from nab3.utils import paginated_search
+
+LOGGER = logging.getLogger('nab3')
+LOGGER.setLevel(logging.WARNING)
 
 
 class AWS(BaseAWS):
 
-    def __init__(self, session: boto3.Session = boto3.Session()):
-        self._client = ClientHandler(session)
+    def __init__(self,
+                 session: boto3.Session = boto3.Session(),
+                 max_concurrency: int = 50,
+                 service_limits: dict = None):
+        """
+        :param session:
+        :param max_concurrency: The max number of top level coroutines ran concurrently, see nab3.scheduler.Scheduler
+        :param service_limits: dict(boto3_client_name=int) The max concurrent calls per service e.g. dict(cloudwatch=5)
+        """
+        self._client = ClientHandler(
+            session, scheduler=Scheduler(max_concurrency=max_concurrency, service_limits=service_limits)
+        )
 
     def __getattr__(self, value):
         if value in self._service_map.keys():
             return self._get_service_class(value)
         return getattr(self, value)
 
+    async def load_tags(self, *service_lists, force: bool = False) -> TagIndex:
+        """Sets the tags of every service object in service_lists using the Resource Groups Tagging API.
+
+        The tags of each resource type are retrieved using a single paginated get_resources scan, 100 per page,
+            rather than a describe_tags or list_tags_for_resource call per object.
+            Resource types are scanned concurrently and only once per session unless force is True.
+        Each object's tags are set as `obj.tag_map` dict(key=value) and added to the session's TagIndex.
+
+        Example:
+            instances = await AWS.instance.list()
+            load_balancers = await AWS.load_balancer.list()
+            await AWS.load_tags(instances, load_balancers)
+            platform_instances = await Filter(tag_map__team__exact='platform').run(instances)
+
+        :param service_lists: ServiceWrapper or list of service objects
+        :param force: bool default False. If true, the tags will be re-pulled from AWS
+        :return: TagIndex
+        """
+        tag_index = self._client.tag_index
+        services_by_type = {}
+        unsupported = set()
+        for service_list in service_lists:
+            for service_obj in service_list:
+                service_obj = service_obj.service if isinstance(service_obj, ServiceWrapper) else service_obj
+                if service_obj._tag_resource_type is None:
+                    unsupported.add(service_obj._service_class_name)
+                    continue
+                services_by_type.setdefault(service_obj._tag_resource_type, {})[id(service_obj)] = service_obj
+
+        if unsupported:
+            LOGGER.warning(f'Tags can not be loaded for {", ".join(sorted(unsupported))}')
+
+        async def _load_resource_type(resource_type: str, service_class):
+            search_fnc = self._client.get('resourcegroupstaggingapi').get_resources
+            resources = paginated_search(search_fnc, dict(ResourceTypeFilters=[resource_type]), 'ResourceTagMappingList')
+            tag_index.set_resource_tags(resource_type, {
+                service_class._tag_key_from_arn(resource['ResourceARN']): {
+                    tag['Key']: tag['Value'] for tag in resource.get('Tags', [])
+                } for resource in resources
+            })
+
+        await self._client.scheduler.gather(
+            *[_load_resource_type(resource_type, type(next(iter(services.values()))))
+              for resource_type, services in services_by_type.items()
+              if force or not tag_index.is_loaded(resource_type)],
+            service_name='resourcegroupstaggingapi'
+        )
+
+        for resource_type, services in services_by_type.items():
+            for service_obj in services.values():
+                tag_index.add(service_obj, tag_index.get_resource_tags(resource_type, service_obj._tag_key))
+
+        return tag_index
+
+    async def load_from_config(self, *service_names, aggregator_name: str = None, where: str = None) -> dict:
+        """Retrieves every resource of each service using a single paginated AWS Config advanced query.
+
+        An alternative to listing each service using its describe operations,
+            e.g. every instance, security group and ASG in the account is retrieved in pages of 100 using 1 query.
+        Each configuration item is normalized the same as the service's describe response.
+
+        Example:
+            inventory = await AWS.load_from_config('instance', 'security_group', 'asg', aggregator_name='org')
+            for instance in inventory['instance']:
+                print(instance.account_id, instance.aws_region, instance.id)
+
+        :param service_names: e.g. 'instance', 'security_group'
+        :param aggregator_name: Query a configuration aggregator using select_aggregate_resource_config for multi-account
+        :param where: Additional conditions e.g. "awsRegion = 'us-east-1'"
+        :return: dict<service_name, ServiceWrapper>
+        """
+        service_classes = {service_name: self._get_service_class(service_name) for service_name in service_names}
+        resources = await select_resources(self._client, list(service_classes.values()), aggregator_name, where)
+
+        response = {}
+        for service_name, service_class in service_classes.items():
+            response[service_name] = ServiceWrapper(service_class)
+            response[service_name].service = resources[service_class]
+
+        return response
+
     def service_options(self):
         """
         Returns a list of supported service classes
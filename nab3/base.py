@@ -3,29 +3,143 @@ import copy
 import logging
 import re
 import sys
-from itertools import chain
+import weakref
 from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import partial
+from itertools import chain
 
 import boto3
 import botocore
 
+from nab3.config_query import select_resources
+from nab3.metric_store import MetricStore
+from nab3.scheduler import Scheduler
+from nab3.tag_index import TagIndex
 from nab3.utils import (
-    camel_to_snake, describe_resource, paginated_search, snake_to_camelback
+    camel_to_snake, describe_resource, get_batch_size, paginate, paginated_search, snake_to_camelback
 )
 
 LOGGER = logging.getLogger('nab3')
 LOGGER.setLevel(logging.WARNING)
 
+# Tracks what has been re-pulled during a fetch with force=True so dependent load methods don't re-pull it again
+_FORCED_LOADS = ContextVar('nab3_forced_loads', default=None)
+
+
+async def _gather(service_class, *coros, **kwargs) -> list:
+    """Runs the coroutines using the Scheduler of the session service_class belongs to.
+
+    :param service_class: A service class created by BaseAWS._get_service_class
+    :param coros:
+    :param kwargs: Scheduler.gather kwargs
+    :return: list
+    """
+    client = getattr(service_class, '_client', None)
+    if client is None:
+        return await asyncio.gather(*coros)
+    return await client.scheduler.gather(*coros, **kwargs)
+
+
+@contextmanager
+def _force_scope(force: bool):
+    token = _FORCED_LOADS.set(set()) if force and _FORCED_LOADS.get() is None else None
+    try:
+        yield
+    finally:
+        if token:
+            _FORCED_LOADS.reset(token)
+
+
+class IdentityMap:
+    """Maps each AWS resource to a single canonical service instance for the session.
+
+    Instances are keyed by their service class and the value of the class' _primary_key.
+    Because every reference to a resource points to the same instance, loading it once populates it everywhere.
+        e.g. Every ASG using the same launch configuration references the same SecurityGroup instances
+
+    Instances are weakly referenced so they are released once nothing else references them.
+    """
+
+    def __init__(self):
+        self._instances = weakref.WeakValueDictionary()
+        self._bypassed = 0
+
+    @contextmanager
+    def bypass(self):
+        """Instances created within the context are neither resolved against nor added to the map.
+
+        Used for resources that aren't unique by their primary key within the session
+            e.g. ASGs with the same name in different accounts returned by a configuration aggregator
+        """
+        self._bypassed += 1
+        try:
+            yield
+        finally:
+            self._bypassed -= 1
+
+    @staticmethod
+    def _key(service_obj):
+        primary_key = getattr(service_obj, '_primary_key', None)
+        if not primary_key:
+            return None
+
+        key_value = service_obj.__dict__.get(primary_key)
+        if not isinstance(key_value, (str, int)) or isinstance(key_value, bool):
+            return None
+
+        return type(service_obj).__name__, key_value
+
+    def get(self, service_class, key_value):
+        return self._instances.get((service_class.__name__, key_value))
+
+    def resolve(self, service_obj):
+        """Returns the canonical instance for the resource represented by service_obj.
+
+        If the resource hasn't been seen, service_obj becomes the canonical instance.
+        Otherwise, the canonical instance is updated using service_obj:
+            If service_obj is loaded its attributes take precedence
+            If not, only attributes the canonical instance doesn't have are set
+                e.g. The LifecycleState of an instance returned as part of describe_auto_scaling_groups
+
+        :param service_obj:
+        :return: The canonical service instance
+        """
+        key = self._key(service_obj) if not self._bypassed else None
+        if key is None:
+            return service_obj
+
+        canonical = self._instances.get(key)
+        if canonical is None:
+            self._instances[key] = service_obj
+            return service_obj
+        elif canonical is not service_obj:
+            canonical._update(service_obj, overwrite=service_obj._loaded)
+
+        return canonical
+
+    def clear(self):
+        self._instances.clear()
+
+    def __len__(self):
+        return len(self._instances)
+
 
 class ClientHandler:
     """Maintains state of N different boto3 client connections
     """
 
     def __init__(self, session: boto3.Session = boto3.Session(),
-                 default_config: botocore.client.Config = botocore.client.Config(max_pool_connections=10)):
+                 default_config: botocore.client.Config = botocore.client.Config(max_pool_connections=10),
+                 scheduler: Scheduler = None):
         self._botocore_config = default_config
         self._session = session
         self._account = None
+        self.identity_map = IdentityMap()
+        self.scheduler = scheduler if scheduler else Scheduler()
+        self.metric_store = MetricStore()
+        self.tag_index = TagIndex()
 
     def get(self, service_name):
         """Retrieves the client resource object.
@@ -56,6 +170,8 @@ class ClientHandler:
 
 class BaseAWS:
     _client: ClientHandler
+    # The class name without the session suffix e.g. ASG, set by _get_service_class
+    _service_class_name: str
     loaded_service_classes = {}
     _service_map = dict(
         alarm='Alarm',
@@ -65,8 +181,10 @@ class BaseAWS:
         ecs_instance='ECSInstance',
         ecs_service='ECSService',
         ecs_task='ECSTask',
+        elasticache_cache_node='ElasticacheCacheNode',
         elasticache_cluster='ElasticacheCluster',
         elasticache_node='ElasticacheNode',
+        elasticache_replication_group='ElasticacheReplicationGroup',
         image='Image',
         instance='EC2Instance',
         kafka_cluster='KafkaCluster',
@@ -92,9 +210,17 @@ class BaseAWS:
         return self._client.region
 
     def _get_service_class(self, service_name):
-        service_class = self._service_map[service_name]
-        class_name = f'{service_class}_x{str(id(self._client))}'
-        loaded_service = self.loaded_service_classes.get(class_name)
+        return self._get_client_service_class(self._client, service_name)
+
+    @classmethod
+    def _get_client_service_class(cls, client: ClientHandler, service_name):
+        """Returns the service class for the session of client, see _get_service_class
+
+        Used where there is no instance to resolve the class from e.g. a classmethod of a service class
+        """
+        service_class = cls._service_map[service_name]
+        class_name = f'{service_class}_x{str(id(client))}'
+        loaded_service = cls.loaded_service_classes.get(class_name)
         if loaded_service:
             return loaded_service
 
@@ -102,9 +228,9 @@ class BaseAWS:
         new_class = type(
             class_name,
             class_ref.__bases__,
-            dict(class_ref.__dict__, **dict(_client=self._client))
+            dict(class_ref.__dict__, **dict(_client=client, _service_class_name=service_class))
         )
-        self.loaded_service_classes[class_name] = new_class
+        cls.loaded_service_classes[class_name] = new_class
 
         return new_class
 
@@ -139,8 +265,9 @@ class ServiceWrapper:
 
     async def load(self, force: bool = False):
         if self.service:
-            if self.is_list() and not self.is_loaded():
-                self.service = await self.service_class.list(service_list=self.service)
+            if self.is_list():
+                if force or not self.is_loaded():
+                    await self.service_class._bulk_load(self.service, force=force)
             elif not self.is_loaded() or force:
                 await self.service.load(force=force)
         return self.service
@@ -148,11 +275,71 @@ class ServiceWrapper:
     async def fetch(self, *args, **kwargs):
         if self.service:
             if self.is_list():
-                await asyncio.gather(*[svc.fetch(*args, **kwargs) for svc in self.service])
+                await self._fetch_list(*args, **kwargs)
             else:
                 await self.service.fetch(*args, **kwargs)
         return self.service
 
+    async def _fetch_list(self, *args, **kwargs):
+        """Fetches the related services for every service in the list as a set.
+
+        Rather than calling fetch on each service, the related services are collected from every service,
+        deduplicated and loaded together using as few describe calls as possible.
+        The same is then done for any nested args e.g. asg_list.fetch('launch_configuration__security_groups')
+            1 describe call for every launch configuration in the list (chunked by the operation's max request size)
+            1 describe call for every security group across the launch configurations
+
+        :param args:
+        :param kwargs:
+        :return:
+        """
+        async def _fetch_related(attr_name, attr_args):
+            attr_args = [attr_arg for attr_arg in attr_args if attr_arg]
+            related_services = {}
+            related_class = None
+            for svc in self.service:
+                svc_obj = getattr(svc, attr_name, None)
+                if not isinstance(svc_obj, ServiceWrapper) or svc_obj.service is None:
+                    # Not all AWS resources have every property defined
+                    continue
+
+                related_class = svc_obj.service_class
+                for related_svc in (svc_obj.service if svc_obj.is_list() else [svc_obj.service]):
+                    related_services[id(related_svc)] = related_svc
+
+            if related_services:
+                related_wrapper = ServiceWrapper(related_class)
+                related_wrapper.service = list(related_services.values())
+                await related_wrapper.fetch(*attr_args, **kwargs)
+
+        async def _custom_loads(svc):
+            await asyncio.gather(*svc._schedule_loads(custom_loads, force).values())
+
+        force = kwargs.get('force', False)
+        related_args = defaultdict(list)
+        for arg in args:
+            arg_split = arg.split('__')
+            related_args[arg_split[0]].append('__'.join(arg_split[1:]))
+
+        with _force_scope(force):
+            await self.load(force=force)
+
+            custom_loads = [attr for attr in related_args if getattr(self.service_class, f'load_{attr}', None)]
+            # Relations with a bulk_load_${relation} class method are loaded for every service at once.
+            #   Dependencies are loaded first so the per service load methods below find them already loaded.
+            for relation in self.service_class._load_order(custom_loads):
+                bulk_load = getattr(self.service_class, f'bulk_load_{relation}', None)
+                if bulk_load:
+                    await bulk_load(self.service, force=force)
+
+            # Other custom load methods are specific to the service so they are still called for each service.
+            if custom_loads:
+                await _gather(self.service_class, *[_custom_loads(svc) for svc in self.service])
+
+            await _gather(self.service_class, *[
+                _fetch_related(attr_name, attr_args) for attr_name, attr_args in related_args.items()
+            ])
+
     def copy(self):
         service_obj = ServiceWrapper(self.service_class)
         service_obj.service = self.service
@@ -250,10 +437,44 @@ class Filter:
     dev_clusters = await AWS.ecs_cluster.filter(name__icontains_any=['dev-', 'development'])
 
     Why? Because these evaluations are done as part of nab3 and are not supported by boto3 or the AWS API.
+
+    Filters can be combined using & (AND), | (OR) and ~ (NOT), much like Django's Q objects:
+
+    f_non_prod = Filter(name__icontains='stg-') | Filter(name__icontains='dev-')
+    f_no_api = ~Filter(services__name__icontains='api')
+    clusters = await (f_non_prod & f_no_api).run(ecs_clusters)
+
+    Each object is evaluated against the entire expression and evaluation stops as soon as the outcome is known.
+    Lookups on attributes already set on the object are evaluated before lookups that need to load a related service.
+    That way related services are only loaded for objects that could still be a match.
     """
+    AND = 'AND'
+    OR = 'OR'
 
-    def __init__(self, **kwargs):
+    def __init__(self, *children, **kwargs):
+        self.children = list(children)
         self.filter_params = kwargs
+        self.connector = self.AND
+        self.negated = False
+
+    def _combine(self, other, connector: str):
+        if not isinstance(other, Filter):
+            raise TypeError(f'{other} is not an instance of Filter')
+
+        filter_obj = Filter(self, other)
+        filter_obj.connector = connector
+        return filter_obj
+
+    def __and__(self, other):
+        return self._combine(other, self.AND)
+
+    def __or__(self, other):
+        return self._combine(other, self.OR)
+
+    def __invert__(self):
+        filter_obj = Filter(self)
+        filter_obj.negated = True
+        return filter_obj
 
     def upsert_filter(self, **kwargs):
         """Updates or creates Filter instance params used for filtering a Service object
@@ -277,15 +498,17 @@ class Filter:
         safe_params = copy.deepcopy(param_as_list)  # Cause safety first
         if len(safe_params) > 1:
             if isinstance(service_obj, list) or (isinstance(service_obj, ServiceWrapper) and service_obj.is_list()):
-                hits = await asyncio.gather(*[
-                    self._match(e, safe_params, filter_value) for e in service_obj
-                ])
+                hits = await _gather(
+                    getattr(service_obj, 'service_class', None),
+                    *[self._match(e, safe_params, filter_value) for e in service_obj]
+                )
 
                 service_obj = [hit[0] for hit in hits]
                 # If 1 gets in they all get in because this indicates the primary object is a match
                 is_match = any(hit[1] for hit in hits)
 
-            elif service_obj:
+            elif service_obj is not None:
+                # ServiceWrapper.__bool__ is False until loaded so check against None explicitly
                 cur_key = safe_params.pop(0)
                 if isinstance(service_obj, dict):
                     obj_val = service_obj.get(cur_key)
@@ -377,20 +600,125 @@ class Filter:
                 LOGGER.warning(str(e))
                 return service_obj, False
 
-    async def run(self, service_obj):
+    @staticmethod
+    def _lookup_cost(service_obj, param_as_list) -> int:
+        """Estimates the number of related services that must be loaded to resolve a lookup for the service_obj.
+
+        :param service_obj:
+        :param param_as_list:
+        :return: int 0 if the lookup can be resolved using attributes already set on the service_obj
+        """
+        cost = 0
+        for cur_key in param_as_list[:-1]:
+            if isinstance(service_obj, ServiceWrapper):
+                if not service_obj.is_loaded():
+                    cost += 1
+                if service_obj.is_list():
+                    # Every element would need to be inspected so treat it as the most expensive lookup
+                    return cost + len(param_as_list)
+                service_obj = getattr(service_obj, cur_key)
+            elif isinstance(service_obj, dict):
+                service_obj = service_obj.get(cur_key)
+            else:
+                break
+
+        return cost
+
+    def _cost(self, service_obj) -> int:
+        costs = [self._lookup_cost(service_obj, filter_param.split('__')) for filter_param in self.filter_params]
+        costs += [child._cost(service_obj) for child in self.children]
+        return max(costs) if costs else 0
+
+    async def _evaluate_param(self, service_obj, filter_param: str, filter_value) -> bool:
+        _, is_match = await self._match(service_obj, filter_param.split('__'), filter_value)
+        return is_match
+
+    async def _evaluate(self, service_obj) -> bool:
+        """Evaluates the Filter expression against a single service object.
+
+        Terms are evaluated in order of cost and evaluation stops as soon as the outcome is known.
+
+        :param service_obj:
+        :return: bool
+        """
+        terms = [
+            (partial(self._evaluate_param, service_obj, filter_param, filter_value),
+             self._lookup_cost(service_obj, filter_param.split('__')))
+            for filter_param, filter_value in self.filter_params.items()
+        ]
+        terms += [(partial(child._evaluate, service_obj), child._cost(service_obj)) for child in self.children]
+        terms.sort(key=lambda term: term[1])
+
+        # AND is a match until a term isn't, OR isn't a match until a term is
+        is_match = bool(self.connector == self.AND)
+        for term, _ in terms:
+            if await term() != is_match:
+                is_match = not is_match
+                break
+
+        return is_match != self.negated
+
+    async def run(self, service_obj, limit: int = None):
         """
         :param service_obj:
+        :param limit: Stop evaluating once this many matches have been found.
+            Objects are evaluated in order so related services are only loaded until the limit is reached.
         :return:
         """
         service_obj = service_obj.copy()
+        svc_list = list(service_obj)
+
+        # Objects tagged by the session's TagIndex that can't match a tag_map lookup are skipped without being evaluated
+        client = getattr(service_obj.service_class, '_client', None)
+        tag_matches = self._tag_matches(client.tag_index) if client is not None else None
+        if tag_matches is not None:
+            svc_list = [
+                so for so in svc_list if id(so.service) in tag_matches or not client.tag_index.is_tagged(so.service)
+            ]
+
+        if limit:
+            matches = []
+            for so in svc_list:
+                if len(matches) >= limit:
+                    break
+                elif await self._evaluate(so):
+                    matches.append(so.service)
+            service_obj.service = matches
+            return service_obj
+
+        hits = await _gather(service_obj.service_class, *[self._evaluate(so) for so in svc_list])
+        service_obj.service = [so.service for so, is_match in zip(svc_list, hits) if is_match]
+        return service_obj
+
+    def _tag_matches(self, tag_index) -> set:
+        """Uses the inverted tag index to resolve the tagged objects that could match the expression.
+
+        Only tag_map__${key}__exact and tag_map__${key}__exact_any lookups are resolved using the index.
+
+        :param tag_index: TagIndex
+        :return: set<id(service obj)> None if the expression doesn't narrow the objects that could match
+        """
+        if self.negated:
+            return None
 
+        candidates = []
         for filter_param, filter_value in self.filter_params.items():
-            hits = await asyncio.gather(*[
-                self._match(so, filter_param.split('__'), filter_value) for so in service_obj
-            ])
-            service_obj.service = [hit[0] for hit in hits if hit[1]]
+            param_as_list = filter_param.split('__')
+            if len(param_as_list) == 3 and param_as_list[0] == 'tag_map' and param_as_list[2] in ['exact', 'exact_any']:
+                values = filter_value if param_as_list[2] == 'exact_any' else [filter_value]
+                candidates.append({id(tagged_obj) for tagged_obj in tag_index.lookup(param_as_list[1], values)})
+            else:
+                candidates.append(None)
+        candidates += [child._tag_matches(tag_index) for child in self.children]
 
-        return service_obj
+        if self.connector == self.AND:
+            # Every term must match so any term that narrows the objects applies
+            candidates = [candidate for candidate in candidates if candidate is not None]
+            return set.intersection(*candidates) if candidates else None
+        elif candidates and all(candidate is not None for candidate in candidates):
+            return set.union(*candidates)
+
+        return None
 
     @staticmethod
     def operations():
@@ -402,21 +730,16 @@ class Filter:
 
 
 class Exclude(Filter):
+    """The negation of Filter. An object is removed if it matches any of the provided params.
+    """
 
-    async def run(self, service_obj):
-        """
-        :param service_obj:
-        :return:
-        """
-        service_obj = service_obj.copy()
+    async def _evaluate_param(self, service_obj, filter_param: str, filter_value) -> bool:
+        is_match = await super()._evaluate_param(service_obj, filter_param, filter_value)
+        return not is_match
 
-        for filter_param, filter_value in self.filter_params.items():
-            hits = await asyncio.gather(*[
-                self._match(so, filter_param.split('__'), filter_value) for so in service_obj
-            ])
-            service_obj.service = [hit[0] for hit in hits if not hit[1]]
-
-        return service_obj
+    def _tag_matches(self, tag_index) -> set:
+        # Each param is negated so the tag index can't narrow the objects that could match
+        return None
 
 
 class BaseService(BaseAWS):
@@ -432,6 +755,8 @@ class BaseService(BaseAWS):
             Each element is essentially a security group with some extra metadata
     """
     _loaded = False
+    # The attribute used to identify the AWS resource within the session's IdentityMap. None to disable.
+    _primary_key = 'id'
     _response_alias = {}
     _to_boto3_case = snake_to_camelback
     # These are in relation to the call within the boto3 client
@@ -450,6 +775,10 @@ class BaseService(BaseAWS):
     # _boto3_response_override allows a top level key to be mapped to a new representation
     # e.g. KafkaCluster.BrokerNodeGroupInfo -> KafkaCluster.brokers
     _boto3_response_override = dict()
+    # The Resource Groups Tagging API resource type e.g. ec2:instance. None if tags can't be loaded by AWS.load_tags
+    _tag_resource_type = None
+    # The AWS Config resource type e.g. AWS::EC2::Instance. None if the service can't be listed using AWS Config
+    _config_resource_type = None
 
     def __init__(self, **kwargs):
         self._as_dict = {} if not kwargs.get('_loaded') else {k: v for k, v in kwargs.items() if k != '_loaded'}
@@ -516,9 +845,9 @@ class BaseService(BaseAWS):
             self.create_service_field(obj_key, svc_alias)
             new_class = self._get_service_class(svc_alias)
             if isinstance(obj_val, list):
-                obj_val = [new_class(**svc_instance) for svc_instance in obj_val]
+                obj_val = [new_class._register(new_class(**svc_instance)) for svc_instance in obj_val]
             else:
-                obj_val = new_class(**obj_val)
+                obj_val = new_class._register(new_class(**obj_val))
             setattr(self, obj_key, obj_val)
             return
 
@@ -529,7 +858,7 @@ class BaseService(BaseAWS):
                 if isinstance(obj_val, list):
                     if all(isinstance(svc_instance, dict) for svc_instance in obj_val):
                         obj_key = f'{svc_name}s'
-                        obj_val = [new_class(**svc_instance) for svc_instance in obj_val]
+                        obj_val = [new_class._register(new_class(**svc_instance)) for svc_instance in obj_val]
                     else:
                         # Sketchy logic incoming
                         # If the name doesn't include the key, use id as the key.
@@ -544,13 +873,13 @@ class BaseService(BaseAWS):
                             cls_key = cls_key[1:] if cls_key.startswith("_") else cls_key
                             cls_key = cls_key[:-1] if cls_key.endswith("s") else cls_key
 
-                        obj_val = [new_class(**{cls_key: svc_val}) for svc_val in obj_val]
+                        obj_val = [new_class._register(new_class(**{cls_key: svc_val})) for svc_val in obj_val]
 
                 elif not isinstance(obj_val, ServiceWrapper):
                     # extract the key
                     obj_key = svc_name
                     cls_key = orig_key.replace(f"{svc_name}_", "").replace(svc_name, "")
-                    obj_val = new_class(**{cls_key: obj_val})
+                    obj_val = new_class._register(new_class(**{cls_key: obj_val}))
                 else:
                     return
 
@@ -567,6 +896,48 @@ class BaseService(BaseAWS):
     def as_dict(self):
         return self._as_dict
 
+    @property
+    def _tag_key(self):
+        """Identifies the instance within the get_resources response of the Resource Groups Tagging API"""
+        return getattr(self, 'arn', None)
+
+    @staticmethod
+    def _tag_key_from_arn(arn: str) -> str:
+        return arn
+
+    @classmethod
+    def _register(cls, service_obj):
+        """Returns the canonical instance for the AWS resource represented by service_obj.
+        See IdentityMap.resolve
+
+        :param service_obj:
+        :return:
+        """
+        client = getattr(cls, '_client', None)
+        if client is None:
+            return service_obj
+
+        return client.identity_map.resolve(service_obj)
+
+    def _update(self, service_obj, overwrite: bool = True):
+        """Updates the instance using the attributes of another instance representing the same AWS resource.
+
+        Related services that have already been loaded on this instance are kept.
+
+        :param service_obj:
+        :param overwrite: If False, only attributes that aren't already set on the instance are updated
+        :return:
+        """
+        for attr_name, attr_val in service_obj.__dict__.items():
+            if attr_name == '_load_locks' or (not overwrite and attr_name in self.__dict__):
+                continue
+
+            cur_val = self.__dict__.get(attr_name)
+            if isinstance(cur_val, ServiceWrapper) and cur_val.is_loaded() \
+                    and not (isinstance(attr_val, ServiceWrapper) and attr_val.is_loaded()):
+                continue
+            self.__dict__[attr_name] = attr_val
+
     async def _load(self, **kwargs):
         fnc_base = camel_to_snake(self.key_prefix)
         describe_fnc = getattr(self.client, self._boto3_describe_def.get('client_call', f'describe_{fnc_base}s'))
@@ -630,7 +1001,7 @@ class BaseService(BaseAWS):
         :return:
         """
         force = kwargs.pop('force', False)
-        if force or not self._loaded:
+        if (force or not self._loaded) and self._claim_forced_load():
             self._loaded = True
             return await self._load(**kwargs)
         else:
@@ -645,7 +1016,9 @@ class BaseService(BaseAWS):
         The args in fetch can be nested using __ as a delimiter to pull everything you need ahead of time.
         The benefit of this is performance, and readability but operations can get expensive quick.
         Another thing to keep in mind is operations aren't lazy and joins don't exist.
-        Each related object incur a lookup to AWS.
+        Related objects are loaded together where the describe call supports it, e.g. calling fetch on a list of ASGs
+            will describe every launch configuration across the ASGs at once rather than one per ASG.
+        Relations populated by a custom load method still incur a lookup to AWS per object.
 
         As an example, if you wanted to inspect all ECS Service scaling policies for your production ECS clusters.
         
@@ -676,41 +1049,147 @@ class BaseService(BaseAWS):
             loaded_obj = await svc_obj.fetch(*svc_fetch_args, **kwargs)
             setattr(self, svc_name, loaded_obj)
 
+        async def _fetch_after_load(svc_name, svc_fetch_args):
+            if svc_name in load_tasks:
+                await load_tasks[svc_name]
+            await _fetch(svc_name, svc_fetch_args)
+
         async_loads = defaultdict(list)
-        custom_load_methods = []
+        custom_loads = []
         force = kwargs.get('force', False)
 
-        if force or not self._loaded:
-            await self.load(**kwargs)
-
-        for arg in args:
-            arg_split = arg.split('__')
-            cls_attr = arg_split[0]
-            attr_args = None if len(arg_split) == 1 else '__'.join(arg_split[1:])
-            custom_load_method = getattr(self, f'load_{cls_attr}', None)
-
-            if custom_load_method:
-                if custom_load_method not in custom_load_methods:
-                    custom_load_methods.append(custom_load_method)
-                if not attr_args:
+        with _force_scope(force):
+            if force or not self._loaded:
+                await self.load(**kwargs)
+
+            for arg in args:
+                arg_split = arg.split('__')
+                cls_attr = arg_split[0]
+                attr_args = None if len(arg_split) == 1 else '__'.join(arg_split[1:])
+                custom_load_method = getattr(self, f'load_{cls_attr}', None)
+
+                if custom_load_method:
+                    if cls_attr not in custom_loads:
+                        custom_loads.append(cls_attr)
+                    if not attr_args:
+                        continue
+                elif any(sub_arg.startswith(f'{arg}__') for sub_arg in args):
                     continue
-            elif any(sub_arg.startswith(f'{arg}__') for sub_arg in args):
-                continue
 
-            async_loads[cls_attr].append(attr_args)
+                async_loads[cls_attr].append(attr_args)
 
-        # Custom load methods exist as a way to create a reference to an AWS resource that isn't returned in the client
-        # An example of this would be the ASG pulls security groups from its launch config
-        #   The ASG property 'accessible_resources' is generated using the security groups
-        #   These properties are populated using a load_${attribute_name} method defined within the class or parent
-        #   These methods are not thread safe because, in following with this example:
-        #       load_accessible_resources calls load_accessible_resources which calls load_config.load
-        for custom_load_method in custom_load_methods:
-            await custom_load_method(force=force)
+            # Custom load methods exist as a way to create a reference to an AWS resource that isn't returned in the client
+            # An example of this would be the ASG pulls security groups from its launch config
+            #   The ASG property 'accessible_resources' is generated using the security groups
+            #   These properties are populated using a load_${attribute_name} method defined within the class or parent
+            # Independent load methods are ran concurrently, see BaseService._schedule_loads
+            load_tasks = self._schedule_loads(custom_loads, force)
+            await asyncio.gather(
+                *load_tasks.values(),
+                *[_fetch_after_load(attr_svc, attr_svc_args) for attr_svc, attr_svc_args in async_loads.items()]
+            )
 
-        await asyncio.gather(*[_fetch(attr_svc, attr_svc_args) for attr_svc, attr_svc_args in async_loads.items()])
         return self
 
+    def _claim_forced_load(self, relation: str = None) -> bool:
+        """Within a forced fetch, ensures the instance (relation=None) or a relation is only re-pulled once.
+
+        :param relation:
+        :return: bool False if it has already been re-pulled as part of the current fetch
+        """
+        forced_loads = _FORCED_LOADS.get()
+        if forced_loads is None:
+            return True
+
+        load_key = (id(self), relation)
+        if load_key in forced_loads:
+            return False
+
+        forced_loads.add(load_key)
+        return True
+
+    async def _load_relation(self, relation: str, dependencies: list = [], force: bool = False):
+        """Calls the custom load method for the relation once its dependencies have been loaded.
+
+        A lock is kept per instance and relation so concurrent loads of the same relation are only ran once.
+        Any caller waiting on the lock will find the relation loaded by the time it is acquired.
+
+        :param relation:
+        :param dependencies: list<asyncio.Task>
+        :param force:
+        :return:
+        """
+        if dependencies:
+            await asyncio.gather(*dependencies)
+
+        load_locks = self.__dict__.setdefault('_load_locks', {})
+        lock = load_locks.setdefault(relation, asyncio.Lock())
+        async with lock:
+            if force and not self._claim_forced_load(relation):
+                return
+            await getattr(self, f'load_{relation}')(force=force)
+
+    def _schedule_loads(self, relations: list, force: bool = False) -> dict:
+        """Creates a task for each custom load method in relations, along with the load methods they depend on.
+
+        Dependencies are declared on the load method using nab3.utils.load_dependencies.
+        Each task waits on the tasks for its dependencies so independent branches run concurrently.
+            e.g. ECSCluster.fetch('services', 'security_groups', 'scaling_policies')
+                services runs alongside instances -> asg
+                security_groups and scaling_policies run concurrently once asg has been loaded
+
+        :param relations: list<str> the names of relations with a custom load method
+        :param force:
+        :return: dict(relation=asyncio.Task)
+        """
+        load_tasks = {}
+
+        def _schedule(relation, dependents=()):
+            if relation in load_tasks:
+                return load_tasks[relation]
+            elif relation in dependents:
+                raise ValueError(f'Circular load dependency {" -> ".join(dependents + (relation,))}')
+
+            load_method = getattr(self, f'load_{relation}')
+            dependencies = [
+                _schedule(dependency, dependents + (relation,))
+                for dependency in getattr(load_method, 'load_dependencies', [])
+                if getattr(self, f'load_{dependency}', None)
+            ]
+            load_tasks[relation] = asyncio.ensure_future(self._load_relation(relation, dependencies, force))
+            return load_tasks[relation]
+
+        for relation in relations:
+            _schedule(relation)
+
+        return load_tasks
+
+    @classmethod
+    def _load_order(cls, relations: list) -> list:
+        """Returns relations along with the custom load methods they depend on, with dependencies first.
+
+        :param relations: list<str> the names of relations with a custom load method
+        :return: list<str>
+        """
+        load_order = []
+
+        def _visit(relation, dependents=()):
+            if relation in load_order:
+                return
+            elif relation in dependents:
+                raise ValueError(f'Circular load dependency {" -> ".join(dependents + (relation,))}')
+
+            load_method = getattr(cls, f'load_{relation}')
+            for dependency in getattr(load_method, 'load_dependencies', []):
+                if getattr(cls, f'load_{dependency}', None):
+                    _visit(dependency, dependents + (relation,))
+            load_order.append(relation)
+
+        for relation in relations:
+            _visit(relation)
+
+        return load_order
+
     def create_service_field(self, field_name, service_class):
         """
 
@@ -759,7 +1238,7 @@ class BaseService(BaseAWS):
                     and not k.startswith('_') \
                     and not k.startswith('load_') \
                     and (k != 'load' or not self._loaded) \
-                    and k not in ['create_service_field', 'filter', 'get', 'list']:
+                    and k not in ['create_service_field', 'exists', 'filter', 'first', 'get', 'list']:
                 cluster_methods.append(k)
 
         return cluster_methods
@@ -772,20 +1251,22 @@ class BaseService(BaseAWS):
         :return:
         """
         resp = ServiceWrapper(cls)
-        obj = cls(**kwargs)
-        await obj.load()
-        if with_related:
-            await obj.fetch(*with_related)
+        obj = cls._register(cls(**kwargs))
+        # get is interactive so anything it schedules is started ahead of bulk fan-outs
+        with cls._client.scheduler.priority(Scheduler.HIGH):
+            await obj.load()
+            # The primary key may not have been known until the object was loaded
+            obj = cls._register(obj)
+            if with_related:
+                await obj.fetch(*with_related)
 
         resp.service = obj
         return resp
 
     @classmethod
-    async def _list(cls, **kwargs) -> list:
-        """Returns an instance for each object
-        JMESPath for filtering: https://jmespath.org
-        :param kwargs:
-        :return: list<cls()>
+    def _list_boto3_fncs(cls) -> tuple:
+        """
+        :return: tuple(list_fnc, list_key, describe_fnc, describe_key)
         """
         fnc_base = camel_to_snake(cls.key_prefix)
         client = cls._client.get(cls.boto3_client_name)
@@ -793,29 +1274,152 @@ class BaseService(BaseAWS):
         describe_fnc = getattr(client, cls._boto3_describe_def.get('client_call', f'describe_{fnc_base}s'))
         list_key = cls._boto3_list_def.get('response_key', f'{cls.key_prefix}Arns')
         describe_key = cls._boto3_describe_def.get('response_key', f'{cls.key_prefix}s')
+        return list_fnc, list_key, describe_fnc, describe_key
+
+    @classmethod
+    async def _list(cls, **kwargs) -> list:
+        """Returns an instance for each object
+        JMESPath for filtering: https://jmespath.org
+        :param kwargs:
+        :return: list<cls()>
+        """
+        list_fnc, list_key, describe_fnc, describe_key = cls._list_boto3_fncs()
         describe_kwargs = {cls._to_boto3_case(k): v for k, v in kwargs.pop('describe_kwargs').items()}
         list_kwargs = {cls._to_boto3_case(k): v for k, v in kwargs.pop('list_kwargs').items()}
         results = paginated_search(list_fnc, list_kwargs, list_key)
         if not results:
             return results
 
-        chunk_size = describe_kwargs.pop('chunk_size', 25)
+        chunk_size = describe_kwargs.pop('chunk_size', None)
         loaded_results = await describe_resource(
-            describe_fnc, id_key=describe_key, id_list=results, search_kwargs=describe_kwargs, chunk_size=chunk_size
+            describe_fnc, id_key=describe_key, id_list=results, search_kwargs=describe_kwargs, chunk_size=chunk_size,
+            scheduler=cls._client.scheduler
         )
         response = list(chain.from_iterable([lr.get(describe_key) for lr in loaded_results]))
         return [cls(_loaded=True, **obj) for obj in response]
 
     @classmethod
-    async def list(cls, fnc_name=None, response_key=None, **kwargs) -> ServiceWrapper:
-        """Returns an instance for each object
+    async def _iter_list(cls, **kwargs):
+        """Yields the instances for each page of the list operation.
+        Each page is described as it is retrieved so no more pages are requested than the caller consumes.
 
-        :param fnc_name:
-        :param response_key:
         :param kwargs:
+        :return: async_generator<list<cls()>>
+        """
+        list_fnc, list_key, describe_fnc, describe_key = cls._list_boto3_fncs()
+        describe_kwargs = {cls._to_boto3_case(k): v for k, v in kwargs.pop('describe_kwargs').items()}
+        list_kwargs = {cls._to_boto3_case(k): v for k, v in kwargs.pop('list_kwargs').items()}
+        chunk_size = describe_kwargs.pop('chunk_size', None)
+
+        for page in paginate(list_fnc, list_kwargs, list_key):
+            if not page:
+                continue
+
+            loaded_results = await describe_resource(
+                describe_fnc, id_key=describe_key, id_list=page, search_kwargs=describe_kwargs, chunk_size=chunk_size,
+                scheduler=cls._client.scheduler
+            )
+            response = list(chain.from_iterable([lr.get(describe_key) for lr in loaded_results]))
+            yield [cls(_loaded=True, **obj) for obj in response]
+
+    @classmethod
+    def _batch_key(cls, service_obj):
+        """Returns the params needed to describe the service_obj alongside other instances of the class.
+
+        The id param is the first list param of the describe call that is set on the service_obj.
+        Every other param set on the service_obj must match for the instances to be described together.
+            e.g. ECSService instances can be described in bulk but only with other services in the same cluster
+
+        :param service_obj:
+        :return: tuple(id_param, tuple(other_params)) or None if the service_obj can't be described in bulk
+        """
+        id_param = None
+        other_params = []
+        for param_name, param_attrs in cls._boto3_describe_def['call_params'].items():
+            value = getattr(service_obj, param_name, None)
+            if not isinstance(value, (str, int)) or isinstance(value, bool):
+                continue
+            elif param_attrs['type'] == list and id_param is None:
+                id_param = param_name
+            elif param_attrs['type'] != list:
+                other_params.append((param_name, value))
+
+        return (id_param, tuple(other_params)) if id_param else None
+
+    @classmethod
+    async def _describe(cls, id_param: str, id_list: list, **kwargs) -> list:
+        """Describes each id in id_list, chunking the requests to stay within the operation's max request size.
+
+        :param id_param: The name of the describe call_param used to identify the service e.g. name or id
+        :param id_list: list of values for id_param
+        :param kwargs: Additional describe call_params
         :return: list<cls()>
         """
-        resp = ServiceWrapper(cls)
+        _, _, describe_fnc, describe_key = cls._list_boto3_fncs()
+        call_params = cls._boto3_describe_def['call_params']
+        search_kwargs = {
+            param_attrs['name']: param_attrs['default'] for param_attrs in call_params.values() if param_attrs.get('default')
+        }
+        search_kwargs.update({call_params[param_name]['name']: value for param_name, value in kwargs.items()})
+
+        loaded_results = await describe_resource(
+            describe_fnc, id_key=call_params[id_param]['name'], id_list=id_list, search_kwargs=search_kwargs,
+            scheduler=cls._client.scheduler
+        )
+        response = list(chain.from_iterable([lr.get(describe_key, []) for lr in loaded_results]))
+        return [cls(_loaded=True, **obj) for obj in response]
+
+    @classmethod
+    async def _bulk_load(cls, service_list: list, force: bool = False) -> list:
+        """Loads every instance in service_list using as few describe calls as possible.
+
+        The ids are deduplicated and described in chunks, then each instance is updated in place.
+        Instances that can't be described in bulk are loaded individually.
+
+        :param service_list: list<cls()>
+        :param force: bool default False. If true, instances that are already loaded will be re-pulled from AWS
+        :return: service_list
+        """
+        async def _load_batch(batch_key, batch):
+            id_param, other_params = batch_key
+            id_map = defaultdict(list)
+            for service_obj in batch:
+                id_map[getattr(service_obj, id_param)].append(service_obj)
+
+            for loaded_obj in await cls._describe(id_param, list(id_map.keys()), **dict(other_params)):
+                for service_obj in id_map.pop(getattr(loaded_obj, id_param, None), []):
+                    service_obj._update(loaded_obj)
+
+            # Match the behavior of load for anything that wasn't in the response
+            for service_obj in chain.from_iterable(id_map.values()):
+                service_obj._loaded = True
+
+        batches = defaultdict(list)
+        individual_loads = []
+        for service_obj in service_list:
+            if service_obj._loaded and not (force and service_obj._claim_forced_load()):
+                continue
+
+            batch_key = cls._batch_key(service_obj)
+            if batch_key:
+                batches[batch_key].append(service_obj)
+            else:
+                individual_loads.append(service_obj.load(force=force))
+
+        await _gather(
+            cls,
+            *[_load_batch(batch_key, batch) for batch_key, batch in batches.items()],
+            *individual_loads
+        )
+        return service_list
+
+    @classmethod
+    def _list_call_kwargs(cls, **kwargs) -> dict:
+        """Maps the provided params to the boto3 list and describe calls.
+
+        :param kwargs:
+        :return: dict containing the boto3 params along with list_kwargs and describe_kwargs
+        """
         service_list = kwargs.pop('service_list', [])
 
         for boto3_def, fnc_kwargs in [(cls._boto3_list_def, 'list_kwargs'),
@@ -844,17 +1448,98 @@ class BaseService(BaseAWS):
                             kwargs[param_attrs['name']] = value
                             kwargs[fnc_kwargs][param_attrs['name']] = value
 
+        return kwargs
+
+    @classmethod
+    async def list(cls, fnc_name=None, response_key=None, limit: int = None, **kwargs) -> ServiceWrapper:
+        """Returns an instance for each object
+
+        :param fnc_name:
+        :param response_key:
+        :param limit: Return at most this many objects. Pagination stops as soon as the limit is reached.
+        :param kwargs:
+        :return: list<cls()>
+        """
+        resp = ServiceWrapper(cls)
+        kwargs = cls._list_call_kwargs(**kwargs)
+
         if fnc_name and response_key:
             kwargs = {cls._to_boto3_case(k): v for k, v in kwargs.items()}
             client = cls._client.get(cls.boto3_client_name)
             boto3_fnc = getattr(client, fnc_name)
-            response = paginated_search(boto3_fnc, kwargs, response_key)
-            resp.service = [cls(_loaded=True, **obj) for obj in response]
+            response = paginated_search(boto3_fnc, kwargs, response_key, max_results=limit)
+            resp.service = [cls._register(cls(_loaded=True, **obj)) for obj in response]
+        elif limit:
+            resp.service = []
+            pages = cls._iter_list(**kwargs)
+            try:
+                async for page in pages:
+                    resp.service += [cls._register(obj) for obj in page[:limit - len(resp.service)]]
+                    if len(resp.service) >= limit:
+                        break
+            finally:
+                await pages.aclose()
         else:
-            resp.service = await cls._list(**kwargs)
+            resp.service = [cls._register(obj) for obj in await cls._list(**kwargs)]
 
         return resp
 
+    @classmethod
+    async def first(cls, filter_obj=None, **kwargs) -> ServiceWrapper:
+        """Returns the first object that matches the filter_obj.
+
+        Pages are retrieved and evaluated one at a time and no further calls are made once a match is found.
+        Example:
+            instance = await AWS.instance.first(Filter(tags__value__exact='api'))
+            if instance:
+                print(instance.id)
+
+        :param filter_obj: Filter used to evaluate each object. If not provided the first object is returned.
+        :param kwargs: Params passed to the list operation
+        :return: ServiceWrapper that is falsy if there was no match
+        """
+        resp = ServiceWrapper(cls)
+        pages = cls._iter_list(**cls._list_call_kwargs(**kwargs))
+        try:
+            async for page in pages:
+                for obj in page:
+                    svc_wrapper = ServiceWrapper(cls)
+                    svc_wrapper.service = obj
+                    if filter_obj is None or await filter_obj._evaluate(svc_wrapper):
+                        resp.service = cls._register(obj)
+                        return resp
+        finally:
+            await pages.aclose()
+
+        return resp
+
+    @classmethod
+    async def list_from_config(cls, aggregator_name: str = None, where: str = None) -> ServiceWrapper:
+        """Returns an instance for each object using an AWS Config advanced query rather than the describe operation.
+
+        Every resource is retrieved using select_resource_config, 100 per page.
+        To retrieve multiple services in a single query see AWS.load_from_config
+
+        :param aggregator_name: Query a configuration aggregator using select_aggregate_resource_config for multi-account
+        :param where: Additional conditions e.g. "awsRegion = 'us-east-1'"
+        :return: list<cls()>
+        """
+        resp = ServiceWrapper(cls)
+        resources = await select_resources(cls._client, [cls], aggregator_name, where)
+        resp.service = resources[cls]
+        return resp
+
+    @classmethod
+    async def exists(cls, filter_obj=None, **kwargs) -> bool:
+        """Returns True if any object matches the filter_obj. Stops paginating as soon as a match is found.
+
+        :param filter_obj: Filter used to evaluate each object.
+        :param kwargs: Params passed to the list operation
+        :return: bool
+        """
+        resp = await cls.first(filter_obj, **kwargs)
+        return resp.service is not None
+
     @classmethod
     def get_params(cls) -> list:
         resp = []
@@ -881,15 +1566,49 @@ class PaginatedBaseService(BaseService):
         :param kwargs:
         :return: list<cls()>
         """
+        return [obj async for page in cls._iter_list(**kwargs) for obj in page]
+
+    @classmethod
+    async def _describe(cls, id_param: str, id_list: list, **kwargs) -> list:
+        """Describes each id in id_list, chunking the requests to stay within the operation's max request size.
+
+        :param id_param: The name of the describe call_param used to identify the service e.g. name or id
+        :param id_list: list of values for id_param
+        :param kwargs: Additional describe call_params
+        :return: list<cls()>
+        """
+        call_params = cls._boto3_describe_def['call_params']
+        search_kwargs = {
+            param_attrs['name']: param_attrs['default'] for param_attrs in call_params.values() if param_attrs.get('default')
+        }
+        search_kwargs.update({call_params[param_name]['name']: value for param_name, value in kwargs.items()})
+        id_key = call_params[id_param]['name']
+        chunk_size = get_batch_size(cls._describe_boto3_fnc())
+
+        loaded_results = await _gather(
+            cls,
+            *[cls._list(**{**search_kwargs, id_key: id_list[x:x+chunk_size]}) for x in range(0, len(id_list), chunk_size)],
+            service_name=cls.boto3_client_name
+        )
+        return list(chain.from_iterable(loaded_results))
+
+    @classmethod
+    async def _iter_list(cls, **kwargs):
+        """Yields the instances for each page of the describe operation.
+
+        :param kwargs:
+        :return: async_generator<list<cls()>>
+        """
         kwargs = {cls._to_boto3_case(k): v for k, v in kwargs.items() if k not in ['list_kwargs', 'describe_kwargs']}
         response_key = cls._boto3_describe_def.get('response_key', f'{cls.key_prefix}s')
+        for page in paginate(cls._describe_boto3_fnc(), kwargs, response_key):
+            yield [cls(_loaded=True, **obj) for obj in page]
+
+    @classmethod
+    def _describe_boto3_fnc(cls):
         fnc_base = camel_to_snake(cls.key_prefix)
         fnc_name = cls._boto3_describe_def.get('client_call', f'describe_{fnc_base}s')
-
-        client = cls._client.get(cls.boto3_client_name)
-        boto3_fnc = getattr(client, fnc_name)
-        response = paginated_search(boto3_fnc, kwargs, response_key)
-        return [cls(_loaded=True, **obj) for obj in response]
+        return getattr(cls._client.get(cls.boto3_client_name), fnc_name)
 
     @classmethod
     def list_params(cls) -> list:
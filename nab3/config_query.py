@@ -0,0 +1,86 @@
+import json
+import logging
+from contextlib import nullcontext
+
+from nab3.utils import paginated_search
+
+LOGGER = logging.getLogger('nab3')
+LOGGER.setLevel(logging.WARNING)
+
+
+def to_describe_case(obj):
+    """AWS Config configuration items use the describe response with camelBack keys e.g. instanceId.
+    Capitalizes each key so the item can be normalized like the describe response e.g. instanceId -> InstanceId
+
+    :param obj: The configuration item
+    :return: obj
+    """
+    if isinstance(obj, dict):
+        return {f'{k[:1].upper()}{k[1:]}': to_describe_case(v) for k, v in obj.items()}
+    elif isinstance(obj, list):
+        return [to_describe_case(v) for v in obj]
+    return obj
+
+
+def build_expression(resource_types: list, where: str = None) -> str:
+    """
+    :param resource_types: list<str> AWS Config resource types e.g. ['AWS::EC2::Instance']
+    :param where: Additional conditions e.g. "awsRegion = 'us-east-1'"
+    :return: str The select_resource_config expression
+    """
+    resource_types = ', '.join(f"'{resource_type}'" for resource_type in resource_types)
+    expression = f'SELECT resourceType, accountId, awsRegion, configuration, tags WHERE resourceType IN ({resource_types})'
+    return f'{expression} AND {where}' if where else expression
+
+
+async def select_resources(client_handler, service_classes: list, aggregator_name: str = None, where: str = None) -> dict:
+    """Retrieves every resource of the service classes using a single paginated AWS Config advanced query.
+
+    Each configuration item is normalized the same as the service's describe response.
+        The account and region of the resource are set as `obj.account_id` and `obj.aws_region`.
+    Resources from a single account are resolved using the session's IdentityMap.
+        Aggregator resources aren't, the same name or id can exist in more than one account or region.
+
+    :param client_handler: ClientHandler
+    :param service_classes: Service classes with a _config_resource_type
+    :param aggregator_name: Query a configuration aggregator using select_aggregate_resource_config for multi-account
+    :param where: Additional conditions e.g. "awsRegion = 'us-east-1'"
+    :return: dict<service_class, list<service_class()>>
+    """
+    class_map = {service_class._config_resource_type: service_class for service_class in service_classes}
+    if None in class_map:
+        raise ValueError(f'{class_map[None]._service_class_name} is not supported by AWS Config')
+
+    config_client = client_handler.get('config')
+    search_kwargs = dict(Expression=build_expression(list(class_map.keys()), where))
+    if aggregator_name:
+        search_fnc = config_client.select_aggregate_resource_config
+        search_kwargs['ConfigurationAggregatorName'] = aggregator_name
+    else:
+        search_fnc = config_client.select_resource_config
+
+    results = await client_handler.scheduler.run(
+        _search(search_fnc, search_kwargs), service_name='config'
+    )
+
+    resources = {service_class: [] for service_class in service_classes}
+    with client_handler.identity_map.bypass() if aggregator_name else nullcontext():
+        for result in results:
+            config_item = json.loads(result) if isinstance(result, str) else result
+            service_class = class_map.get(config_item.get('resourceType'))
+            configuration = config_item.get('configuration')
+            if service_class is None or not configuration:
+                continue
+
+            configuration = to_describe_case(configuration)
+            if 'Tags' not in configuration and config_item.get('tags'):
+                configuration['Tags'] = to_describe_case(config_item['tags'])
+
+            configuration.update(AccountId=config_item.get('accountId'), AwsRegion=config_item.get('awsRegion'))
+            resources[service_class].append(service_class._register(service_class(_loaded=True, **configuration)))
+
+    return resources
+
+
+async def _search(search_fnc, search_kwargs: dict) -> list:
+    return paginated_search(search_fnc, search_kwargs, 'Results')
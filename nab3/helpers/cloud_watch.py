@@ -1,4 +1,3 @@
-import asyncio
 from datetime import datetime as dt, timedelta
 
 from double_click.markdown import generate_md_bullet_str, generate_md_table_str
@@ -20,13 +19,16 @@ def md_statistics_summary(metric_obj_list: list, include_table: bool = True) ->
 
     metric_attrs = metric_obj_list[0].__dict__.keys()
     # Remove irrelevant keys
-    stats = [key for key in metric_attrs if key not in ['name', 'key_prefix', '_loaded', 'timestamp', 'unit']]
+    stats = [
+        key for key in metric_attrs
+        if not key.startswith('_') and key not in ['name', 'key_prefix', 'client_id', 'timestamp', 'unit']
+    ]
     headers = ['Time', 'Unit'] + [stat.title() for stat in stats]
     rows = []
 
     for data_point in metric_obj_list:
         rows.append([data_point.timestamp, data_point.unit] + [data_point.__dict__.get(stat) for stat in stats])
-    rows.sort(key=lambda x: x[1])
+    rows.sort(key=lambda x: x[0])
 
     # Create a bulleted synopsis of each stat type in stats
     for stat in stats:
@@ -45,6 +47,16 @@ def md_statistics_summary(metric_obj_list: list, include_table: bool = True) ->
 
 
 async def md_alarms(scalable_object, start_date=dt.now()-timedelta(days=30), end_date=dt.now()) -> str:
+    """Creates a markdown summary of the alarm actions of each scaling policy of the scalable_object.
+
+    The alarm history is retrieved in a single scan using Alarm.load_history_index
+        and reused by subsequent calls for the same range e.g. every service in md_ecs_cluster_summary
+
+    :param scalable_object: A service with scaling_policies e.g. ECSService, ECSCluster, ASG
+    :param start_date:
+    :param end_date:
+    :return:
+    """
     async def _asp_summary(scaling_policy):
         asp_alarms = scaling_policy.get_alarms(start_date=start_date, end_date=end_date, item_type='Action')
         asp_rows = [[scaling_policy.name, alarm.name, alarm.timestamp] for alarm in asp_alarms]
@@ -55,12 +67,16 @@ async def md_alarms(scalable_object, start_date=dt.now()-timedelta(days=30), end
     if len(scalable_object.scaling_policies) == 0:
         return md_output
 
+    scalable_object._get_service_class('alarm').load_history_index(start_date, end_date, item_type='Action')
+
     md_output += '\n### Policies:\n'
     policy_summary = []
     headers = ['Policy', 'Alarm', 'Time']
     rows = []
 
-    scaling_policy_summaries = await asyncio.gather(*[_asp_summary(asp) for asp in scalable_object.scaling_policies])
+    scaling_policy_summaries = await scalable_object._client.scheduler.gather(
+        *[_asp_summary(asp) for asp in scalable_object.scaling_policies], service_name='cloudwatch'
+    )
     for asp in scaling_policy_summaries:
         policy_summary.append(asp['policy_summary'])
         rows += asp['rows']
@@ -79,7 +95,7 @@ async def set_service_stats(service_obj,
                             interval_as_seconds=1800):  # 30 minutes
     """Retrieves all statistics passed in stat_list for the service_obj.
 
-    service_obj.stats = [dict(metric=str, stats=Metric())]
+    service_obj.stats_list = [list<Metric()>]
 
     :param service_obj:
     :param stat_list:
@@ -88,15 +104,7 @@ async def set_service_stats(service_obj,
     :param interval_as_seconds:
     :return: service_obj
     """
-    async def _stat(metric):
-        return service_obj.get_statistics(metric_name=metric,
-                                          statistics=['Average', 'Maximum'],
-                                          start_time=start_date,
-                                          end_time=end_date,
-                                          interval_as_seconds=interval_as_seconds)  # 30 minutes
-
-    stat_list = stat_list if stat_list else ['CPUUtilization', 'MemoryUtilization']
-    service_obj.stats_list = await asyncio.gather(*[_stat(metric) for metric in stat_list])
+    await set_n_service_stats([service_obj], stat_list, start_date, end_date, interval_as_seconds)
     return service_obj
 
 
@@ -107,7 +115,10 @@ async def set_n_service_stats(service_list,
                               interval_as_seconds=1800):  # 30 minutes
     """Retrieves all statistics passed in stat_list for each of the provided services in service_list.
 
-    For each in service_list: service_obj.stats = [dict(metric=str, stats=Metric())]
+    The statistics for every service are retrieved together using Metric.get_metric_data
+        e.g. 300 services x 2 metrics is 2 calls rather than 600
+
+    For each in service_list: service_obj.stats_list = [list<Metric()>]
 
     :param service_list:
     :param stat_list:
@@ -116,8 +127,20 @@ async def set_n_service_stats(service_list,
     :param interval_as_seconds:
     :return: service_list
     """
-    return await asyncio.gather(*[
-        set_service_stats(service_obj, stat_list, start_date, end_date, interval_as_seconds)
-        for service_obj in service_list
-    ])
+    service_list = [service_obj for service_obj in service_list]
+    if len(service_list) == 0:
+        return service_list
+
+    stat_list = stat_list if stat_list else ['CPUUtilization', 'MemoryUtilization']
+    metric_queries = [
+        service_obj.metric_query(metric, statistics=['Average', 'Maximum'], interval_as_seconds=interval_as_seconds)
+        for service_obj in service_list for metric in stat_list
+    ]
+    metric_cls = service_list[0]._get_service_class('metric')
+    metrics = await metric_cls.get_metric_data(metric_queries, start_date, end_date)
+
+    for pos, service_obj in enumerate(service_list):
+        service_obj.stats_list = metrics[pos * len(stat_list):(pos + 1) * len(stat_list)]
+
+    return service_list
 
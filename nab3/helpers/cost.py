@@ -0,0 +1,114 @@
+import logging
+
+from nab3.base import ServiceWrapper
+
+LOGGER = logging.getLogger('nab3')
+LOGGER.setLevel(logging.WARNING)
+
+
+def _tag_names(service_obj) -> list:
+    tag_map = getattr(service_obj, 'tag_map', None)
+    if tag_map is not None:
+        # Set by AWS.load_tags
+        return [f'{key}={value}' for key, value in tag_map.items()]
+
+    tags = getattr(service_obj, 'tags', None) or []
+    tag_names = []
+    for tag in tags:
+        if isinstance(tag, dict):
+            key, value = tag.get('key', tag.get('Key')), tag.get('value', tag.get('Value'))
+        else:
+            key, value = getattr(tag, 'key', None), getattr(tag, 'value', None)
+        if key:
+            tag_names.append(f'{key}={value}')
+    return tag_names
+
+
+async def cost_report(service_list, currency: str = 'usd') -> dict:
+    """Calculates the on demand cost of every service in service_list in a single pass.
+
+    Services are grouped by the get_products params of each instance type they run
+        so each distinct instance type is priced once e.g. 500 ASGs using 12 instance types is 12 lookups.
+    Lookups are resolved concurrently and use the session's pricing catalog if it has been loaded.
+    Every instance type of an ASG is priced, as is every ASG of an ECS cluster.
+    Each ASG and instance is priced once, under the most specific service it belongs to
+        e.g. an ASG backing an ECS cluster in service_list is only priced as part of the cluster.
+
+    Supported services: ASG, EC2Instance and ECSCluster (the cluster's ASGs are loaded if needed)
+
+    :param service_list: ServiceWrapper or list of service objects
+    :param currency:
+    :return: dict(
+        hourly=float, monthly=float, currency=str,
+        by_service=dict<str, dict>, by_cluster=dict<str, dict>, by_tag=dict<str, dict>, by_instance_type=dict<str, dict>,
+        unpriced=list<dict(service=str, name=str, filters=list)>
+    ) Each grouping is dict(hourly=float, monthly=float, instances=int)
+    """
+    services = {}
+    for service_obj in service_list:
+        service_obj = service_obj.service if isinstance(service_obj, ServiceWrapper) else service_obj
+        services[id(service_obj)] = service_obj
+    services = list(services.values())
+
+    report = dict(hourly=0, monthly=0, currency=currency,
+                  by_service={}, by_cluster={}, by_tag={}, by_instance_type={}, unpriced=[])
+    if not services:
+        return report
+
+    # The ASGs backing every ECS cluster are resolved together
+    clusters = [service_obj for service_obj in services if service_obj._service_class_name == 'ECSCluster']
+    unresolved_clusters = [cluster for cluster in clusters if not cluster.asg.is_loaded()]
+    if unresolved_clusters:
+        cluster_list = ServiceWrapper(type(unresolved_clusters[0]))
+        cluster_list.service = unresolved_clusters
+        await cluster_list.fetch('asg')
+
+    # Skip the ASGs priced by a cluster and the instances priced by an ASG
+    priced_asgs = {asg.name for cluster in clusters for asg in cluster._pricing_asgs}
+    asgs = [service_obj for service_obj in services if service_obj._service_class_name == 'ASG']
+    priced_instances = {
+        instance.id
+        for asg in asgs + [asg for cluster in clusters for asg in cluster._pricing_asgs] for instance in asg.instances
+    }
+    services = [
+        service_obj for service_obj in services
+        if not (service_obj._service_class_name == 'ASG' and service_obj.name in priced_asgs)
+        and not (service_obj._service_class_name == 'EC2Instance' and service_obj.id in priced_instances)
+    ]
+
+    pricing_lines = [
+        (service_obj, pricing_params, quantity)
+        for service_obj in services for pricing_params, quantity in getattr(service_obj, '_pricing_lines', [])
+    ]
+    pricing_cls = services[0]._get_service_class('pricing')
+    prices = await pricing_cls.get_prices([pricing_params for _, pricing_params, _ in pricing_lines])
+
+    def _add(grouping: str, name: str, hourly: float, quantity: int):
+        group = report[grouping].setdefault(name, dict(hourly=0, monthly=0, instances=0))
+        group['hourly'] += hourly
+        group['monthly'] += hourly * 24 * 30
+        group['instances'] += quantity
+
+    for (service_obj, pricing_params, quantity), price in zip(pricing_lines, prices):
+        filters = {search_filter['Field']: search_filter['Value'] for search_filter in pricing_params['filters']}
+        service_name = service_obj._service_class_name
+        if price is None:
+            report['unpriced'].append(dict(service=service_name,
+                                           name=getattr(service_obj, 'name', getattr(service_obj, 'id', None)),
+                                           filters=pricing_params['filters']))
+            continue
+
+        hourly = price.get_on_demand_hourly(currency) * quantity
+        report['hourly'] += hourly
+        report['monthly'] += hourly * 24 * 30
+        _add('by_service', service_name, hourly, quantity)
+        _add('by_instance_type', filters.get('instanceType'), hourly, quantity)
+        if service_name == 'ECSCluster':
+            _add('by_cluster', service_obj.name, hourly, quantity)
+        for tag_name in _tag_names(service_obj):
+            _add('by_tag', tag_name, hourly, quantity)
+
+    if report['unpriced']:
+        LOGGER.warning(f'No on demand price was found for {len(report["unpriced"])} of the services')
+
+    return report
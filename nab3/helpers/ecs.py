@@ -1,5 +1,3 @@
-import asyncio
-
 from double_click.markdown import generate_md_bullet_str, generate_md_table_str
 
 from nab3.helpers.cloud_watch import md_alarms
@@ -53,8 +51,9 @@ async def md_ecs_cluster_summary(ecs_cluster, display_alarms=True, display_servi
         md_output += alarm_str
 
     if ecs_cluster.services:
-        svc_str = await asyncio.gather(*[md_ecs_service_summary(service, display_alarms, display_service_events)
-                                         for service in ecs_cluster.services])
+        svc_str = await ecs_cluster._client.scheduler.gather(*[
+            md_ecs_service_summary(service, display_alarms, display_service_events) for service in ecs_cluster.services
+        ])
         md_output += ''.join(svc_str)
 
     return md_output
@@ -0,0 +1,121 @@
+import asyncio
+import time
+from itertools import count
+
+from nab3.metric_store import _to_datetime, _to_epoch
+
+
+class MetricPoller:
+    """Polls the datapoints of every active tail in a session using shared get_metric_data calls.
+
+    Each tail tracks a high-water mark, the timestamp of the next datapoint it hasn't yielded.
+    On every poll the queries of all active tails are retrieved together starting from the lowest high-water mark
+        so many tails cost one get_metric_data call per interval (500 queries per call) rather than a call each.
+    Once a tail has been polled its high-water mark only pulls start_time back as far as lookback_as_seconds
+        so a sparse metric doesn't widen the window of every other tail indefinitely.
+        Datapoints that arrive late, within the lookback, are still yielded.
+    A datapoint is only yielded once its period has ended and is never yielded twice.
+
+    The poll loop runs while there is at least one active tail, polling at the shortest period of the active tails.
+        A new tail triggers a poll immediately so it doesn't wait for the current interval to end.
+    """
+
+    def __init__(self, fetch_fnc, lookback_as_seconds: int = 3600):
+        """
+        :param fetch_fnc: async fnc(metric_queries, start_time, end_time) -> list<list<Metric>>
+            See Metric.get_metric_data
+        :param lookback_as_seconds: How long after its period a datapoint can arrive and still be yielded
+        """
+        self._fetch_fnc = fetch_fnc
+        self.lookback_as_seconds = lookback_as_seconds
+        self._subscriptions = {}
+        self._sequence = count()
+        self._task = None
+        self._subscribed = None
+
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def _ensure_running(self):
+        if self.is_running():
+            self._subscribed.set()
+        else:
+            self._subscribed = asyncio.Event()
+            self._task = asyncio.ensure_future(self._run())
+
+    async def _run(self):
+        try:
+            while self._subscriptions:
+                await self.poll()
+                interval = min(subscription['period'] for subscription in self._subscriptions.values())
+                try:
+                    await asyncio.wait_for(self._subscribed.wait(), interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._subscribed.clear()
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            # Raise the error from every active tail rather than failing silently in the background
+            for subscription in self._subscriptions.values():
+                subscription['queue'].put_nowait(exc)
+
+    async def poll(self):
+        """Retrieves the new datapoints of every active tail and passes them to the tail that requested them."""
+        subscriptions = list(self._subscriptions.values())
+        if not subscriptions:
+            return
+
+        now = time.time()
+        start_time = min(
+            max(subscription['high_water'], now - self.lookback_as_seconds) if subscription['polled']
+            else subscription['high_water']
+            for subscription in subscriptions
+        )
+        results = await self._fetch_fnc(
+            [subscription['query'] for subscription in subscriptions], _to_datetime(start_time), _to_datetime(now)
+        )
+
+        for subscription, datapoints in zip(subscriptions, results):
+            period = subscription['period']
+            datapoints = [
+                datapoint for datapoint in datapoints
+                if subscription['high_water'] <= _to_epoch(datapoint.timestamp) <= now - period
+            ]
+            if datapoints:
+                datapoints.sort(key=lambda datapoint: _to_epoch(datapoint.timestamp))
+                subscription['high_water'] = _to_epoch(datapoints[-1].timestamp) + period
+                subscription['queue'].put_nowait(datapoints)
+            subscription['polled'] = True
+
+    async def tail(self, metric_query: dict, start_time=None):
+        """Yields each new datapoint of the query as it becomes available.
+
+        :param metric_query: See MetricMixin.metric_query
+        :param start_time: Also yield the datapoints since start_time. Defaults to the current period.
+        :return: async generator<Metric>
+        """
+        period = metric_query['interval_as_seconds']
+        high_water = _to_epoch(start_time) if start_time else time.time()
+        subscription_id = next(self._sequence)
+        subscription = dict(query=metric_query,
+                            period=period,
+                            high_water=int(high_water) // period * period,
+                            polled=False,
+                            queue=asyncio.Queue())
+        self._subscriptions[subscription_id] = subscription
+        self._ensure_running()
+
+        try:
+            while True:
+                datapoints = await subscription['queue'].get()
+                if isinstance(datapoints, Exception):
+                    raise datapoints
+
+                for datapoint in datapoints:
+                    yield datapoint
+        finally:
+            del self._subscriptions[subscription_id]
+            if not self._subscriptions and self._task is not None:
+                self._task.cancel()
+                self._task = None
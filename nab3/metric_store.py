@@ -0,0 +1,183 @@
+import time
+from collections import OrderedDict
+from datetime import datetime as dt, timedelta, timezone
+
+
+def _to_epoch(timestamp) -> int:
+    """Naive datetimes are treated as UTC, matching dt.utcnow() used throughout nab3"""
+    if isinstance(timestamp, (int, float)):
+        return int(timestamp)
+    elif timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return int(timestamp.timestamp())
+
+
+def _to_datetime(epoch: int) -> dt:
+    return dt.fromtimestamp(epoch, tz=timezone.utc)
+
+
+class MetricSeries:
+    """The cached values for a single statistic of a metric at a given period.
+
+    covered is a sorted list of non-overlapping [start, end) epoch ranges that have been retrieved
+        and are older than the settling window so they will never change.
+    """
+
+    def __init__(self):
+        self.covered = []
+        self.datapoints = {}  # epoch -> tuple(timestamp, value, unit)
+        self.last_access = time.monotonic()
+
+    def missing(self, start: int, end: int) -> list:
+        """Returns the [start, end) ranges within start and end that aren't covered."""
+        missing = []
+        for covered_start, covered_end in self.covered:
+            if covered_end <= start:
+                continue
+            elif covered_start >= end:
+                break
+            elif covered_start > start:
+                missing.append((start, covered_start))
+            start = max(start, covered_end)
+
+        if start < end:
+            missing.append((start, end))
+        return missing
+
+    def cover(self, start: int, end: int):
+        ranges = sorted(self.covered + [(start, end)])
+        self.covered = [ranges[0]]
+        for range_start, range_end in ranges[1:]:
+            last_start, last_end = self.covered[-1]
+            if range_start <= last_end:
+                self.covered[-1] = (last_start, max(last_end, range_end))
+            else:
+                self.covered.append((range_start, range_end))
+
+
+class MetricStore:
+    """Caches metric datapoints by (namespace, metric, dimensions, statistic, period) along with the ranges it holds.
+
+    Only the ranges that haven't been retrieved, including the most recent range that is still settling,
+        are requested from CloudWatch. The results are merged with the cached datapoints.
+        e.g. Refreshing a 30 day window every 5 minutes only requests the last settling_window + 5 minutes
+
+    Datapoints older than the settling window are complete and never change so they are kept until evicted.
+    Eviction:
+        Series that haven't been accessed within max_idle are removed
+        The least recently used series are removed once the store holds more than max_datapoints
+    """
+
+    def __init__(self,
+                 settling_window: timedelta = timedelta(hours=1),
+                 max_datapoints: int = 1000000,
+                 max_idle: timedelta = timedelta(hours=24)):
+        """
+        :param settling_window: How long CloudWatch may still update a datapoint after its timestamp
+        :param max_datapoints: The max number of datapoints held across every series
+        :param max_idle: Series that haven't been accessed for this long are evicted
+        """
+        self.settling_window = settling_window
+        self.max_datapoints = max_datapoints
+        self.max_idle = max_idle
+        self._series = OrderedDict()
+        self._size = 0
+
+    @staticmethod
+    def series_key(namespace: str, metric_name: str, dimensions: list, period: int, unit: str = None) -> tuple:
+        dimensions = tuple(sorted((dimension['Name'], dimension['Value']) for dimension in dimensions))
+        return namespace, metric_name, dimensions, period, unit
+
+    def _get_series(self, series_key: tuple, stat: tuple) -> MetricSeries:
+        key = (series_key, stat)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = MetricSeries()
+        else:
+            self._series.move_to_end(key)
+
+        series.last_access = time.monotonic()
+        return series
+
+    def evict(self):
+        """Removes idle series then the least recently used series until the store is within max_datapoints"""
+        idle_before = time.monotonic() - self.max_idle.total_seconds()
+        for key, series in list(self._series.items()):
+            if series.last_access < idle_before or self._size > self.max_datapoints:
+                self._size -= len(series.datapoints)
+                del self._series[key]
+
+    def clear(self):
+        self._series.clear()
+        self._size = 0
+
+    def get_statistics(self,
+                       series_key: tuple,
+                       statistics: list,
+                       extended_statistics: list,
+                       start_time,
+                       end_time,
+                       fetch_fnc) -> list:
+        """Returns the datapoints between start_time and end_time, only calling fetch_fnc for the ranges not held.
+
+        :param series_key: See MetricStore.series_key
+        :param statistics: list<str> e.g. ['Average', 'Maximum']
+        :param extended_statistics: list<str> e.g. ['p99']
+        :param start_time:
+        :param end_time:
+        :param fetch_fnc: fnc(start_time: datetime, end_time: datetime) -> list<get_metric_statistics Datapoint>
+        :return: list<get_metric_statistics Datapoint> in timestamp order
+        """
+        period = series_key[3]
+        # Align to the period so ranges don't split a datapoint
+        start = _to_epoch(start_time) // period * period
+        end = -(-_to_epoch(end_time) // period) * period
+        settled = _to_epoch(dt.utcnow() - self.settling_window) // period * period
+
+        statistics = [(stat, False) for stat in statistics] + [(stat, True) for stat in extended_statistics]
+        series_list = [self._get_series(series_key, stat) for stat in statistics]
+        missing = []
+        for series in series_list:
+            missing += series.missing(start, end)
+
+        # Merge the missing ranges of every statistic so each range is only requested once
+        fetch_ranges = []
+        for range_start, range_end in sorted(missing):
+            if fetch_ranges and range_start <= fetch_ranges[-1][1]:
+                fetch_ranges[-1] = (fetch_ranges[-1][0], max(fetch_ranges[-1][1], range_end))
+            else:
+                fetch_ranges.append((range_start, range_end))
+
+        unsettled = {}
+        for range_start, range_end in fetch_ranges:
+            for datapoint in fetch_fnc(_to_datetime(range_start), _to_datetime(range_end)):
+                epoch = _to_epoch(datapoint['Timestamp'])
+                if epoch + period > settled:
+                    unsettled[epoch] = datapoint
+                    continue
+
+                for (stat, is_extended), series in zip(statistics, series_list):
+                    value = datapoint.get('ExtendedStatistics', {}).get(stat) if is_extended else datapoint.get(stat)
+                    if value is not None:
+                        if epoch not in series.datapoints:
+                            self._size += 1
+                        series.datapoints[epoch] = (datapoint['Timestamp'], value, datapoint.get('Unit'))
+
+            if range_start < settled:
+                for series in series_list:
+                    series.cover(range_start, min(range_end, settled))
+
+        # Rebuild the datapoints from the cached statistics
+        datapoints = {}
+        for (stat, is_extended), series in zip(statistics, series_list):
+            for epoch, (timestamp, value, unit) in series.datapoints.items():
+                if start <= epoch < end and epoch not in unsettled:
+                    datapoint = datapoints.setdefault(epoch, dict(Timestamp=timestamp, Unit=unit))
+                    if is_extended:
+                        datapoint.setdefault('ExtendedStatistics', {})[stat] = value
+                    else:
+                        datapoint[stat] = value
+
+        datapoints.update(unsettled)
+        self.evict()
+        return [datapoints[epoch] for epoch in sorted(datapoints.keys())]
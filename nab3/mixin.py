@@ -1,7 +1,7 @@
 import logging
 from datetime import datetime as dt, timedelta
 
-from nab3.utils import snake_to_camelcap
+from nab3.utils import load_dependencies, snake_to_camelcap
 
 LOGGER = logging.getLogger('nab3')
 LOGGER.setLevel(logging.WARNING)
@@ -26,6 +26,20 @@ class AppAutoScaleMixin:
         return self.scaling_policies
 
 
+class EC2TagMixin:
+    """EC2 describe responses don't include the resource ARN so tags are matched using the resource id.
+    e.g. arn:aws:ec2:us-east-1:123456789012:instance/i-0123456789abcdef0 -> i-0123456789abcdef0
+    """
+
+    @property
+    def _tag_key(self):
+        return self.id
+
+    @staticmethod
+    def _tag_key_from_arn(arn: str) -> str:
+        return arn.split('/')[-1]
+
+
 class AutoScaleMixin:
 
     def __init__(self, **kwargs):
@@ -47,6 +61,7 @@ class SecurityGroupMixin:
         self.create_service_field('security_groups', 'security_group')
         super().__init__(**kwargs)
 
+    @load_dependencies('security_groups')
     async def load_accessible_resources(self, force=False):
         if self.accessible_resources.is_loaded() and not force:
             return self.accessible_resources
@@ -57,7 +72,12 @@ class SecurityGroupMixin:
         if not filter_list:
             return self.accessible_resources
 
-        self.accessible_resources = await self.accessible_resources.service_class.list(Filters=[dict(
+        sg_class = self.accessible_resources.service_class
+        if sg_class.has_snapshot():
+            self.accessible_resources = sg_class.referencing_groups(filter_list)
+            return self.accessible_resources
+
+        self.accessible_resources = await sg_class.list(Filters=[dict(
             Name='ip-permission.group-id',
             Values=filter_list
         )])
@@ -71,10 +91,27 @@ class PricingMixin:
         super().__init__(**kwargs)
 
     async def load_pricing(self, force=False):
+        """Retrieves the on demand pricing of the service.
+
+        If the session's pricing catalog has been loaded for the region it is answered from memory.
+            See Pricing.load_catalog
+
+        stored as the instance attribute `obj.pricing`
+
+        :return: Pricing
+        """
         if self.pricing.is_loaded() and not force:
             return self.pricing
 
-        pricing = await self.pricing.list(**self._pricing_params)
+        pricing_params = self._pricing_params
+        pricing_cls = self._get_service_class('pricing')
+        if pricing_params:
+            entry = pricing_cls.get_catalog().lookup(pricing_params['service_code'], pricing_params['filters'])
+            if entry:
+                self.pricing = pricing_cls.from_catalog(entry)
+                return self.pricing
+
+        pricing = await self.pricing.list(**pricing_params)
         if len(pricing) > 0:
             self.pricing = pricing[0]
 
@@ -97,6 +134,12 @@ class PricingMixin:
         # returns dict(service_code=str, filters=list(dict(Field=str, Value=str, Type=str)))
         raise NotImplementedError
 
+    @property
+    def _pricing_lines(self) -> list:
+        # returns list<tuple(pricing_params, quantity)> e.g. each instance type of an ASG and the number of instances
+        pricing_params = self._pricing_params
+        return [(pricing_params, 1)] if pricing_params else []
+
 
 class MetricMixin:
     _available_metrics = False
@@ -105,12 +148,18 @@ class MetricMixin:
                        metric_name: str,
                        start_time: dt = dt.utcnow()-timedelta(hours=3),
                        end_time: dt = dt.utcnow(),
-                       interval_as_seconds: int = 300, **kwargs) -> list:
+                       interval_as_seconds: int = 300,
+                       use_cache: bool = True,
+                       target_datapoints: int = None, **kwargs) -> list:
         """
+        Ranges that exceed the 1,440 datapoints returned by a single request are split and retrieved concurrently.
+
         :param metric_name:
         :param start_time:
         :param end_time:
-        :param interval_as_seconds:
+        :param interval_as_seconds: If None, the smallest period that returns at most target_datapoints is used
+        :param use_cache: Only request the time ranges that aren't in the session's MetricStore
+        :param target_datapoints: Used to set the period when interval_as_seconds is None e.g. 100 for a sparkline
         :param kwargs:
         :return:
         """
@@ -124,23 +173,67 @@ class MetricMixin:
 
         metric_cls = self._get_service_class('metric')
         metrics = metric_cls.get_statistics(
-            self._stat_name, metric_name, start_time, end_time, interval_as_seconds, **kwargs
+            self._stat_name, metric_name, start_time, end_time, interval_as_seconds,
+            use_cache=use_cache, target_datapoints=target_datapoints, **kwargs
         )
         return metrics
 
+    def metric_query(self,
+                     metric_name: str,
+                     statistics: list = ['Average'],
+                     interval_as_seconds: int = 300,
+                     dimensions: list = []) -> dict:
+        """Creates a query for the service's metric to be retrieved alongside other queries using Metric.get_metric_data
+
+        :param metric_name:
+        :param statistics: list<str> e.g. ['Average', 'Maximum', 'p99']
+        :param interval_as_seconds:
+        :param dimensions: Additional dimensions
+        :return: dict
+        """
+        return dict(namespace=self._stat_name,
+                    metric_name=metric_name,
+                    dimensions=self._stat_dimensions + dimensions,
+                    statistics=statistics,
+                    interval_as_seconds=interval_as_seconds)
+
+    def tail(self,
+             metric_name: str,
+             statistics: list = ['Average'],
+             interval_as_seconds: int = 60,
+             dimensions: list = [],
+             start_time: dt = None):
+        """Yields each new datapoint of the metric once its period has ended.
+
+        The tails of every service in the session are retrieved together in a single get_metric_data call per interval
+        Example:
+            async for datapoint in ecs_service.tail('CPUUtilization', ['Average', 'Maximum']):
+                print(datapoint.timestamp, datapoint.average, datapoint.maximum)
+
+        :param metric_name:
+        :param statistics: list<str> e.g. ['Average', 'Maximum', 'p99']
+        :param interval_as_seconds: The period of each datapoint, also how often new datapoints are requested
+        :param dimensions: Additional dimensions
+        :param start_time: Also yield the datapoints since start_time. Defaults to the current period.
+        :return: async generator<Metric>
+        """
+        metric_cls = self._get_service_class('metric')
+        metric_query = self.metric_query(metric_name, statistics, interval_as_seconds, dimensions)
+        return metric_cls.get_poller().tail(metric_query, start_time)
+
     async def get_available_metrics(self):
+        """Answered from the session's index of the namespace, see Metric.load_namespace_index
+
+        :return: ServiceWrapper(list<Metric>)
+        """
         if self._available_metrics is False:
             metrics = self._get_service_class('metric')
-            metrics = await metrics.list(Namespace=self._stat_name, Dimensions=self._stat_dimensions)
+            metrics = await metrics.list_from_index(self._stat_name, self._stat_dimensions)
             self._available_metrics = metrics
         return self._available_metrics
 
     async def get_metric_options(self):
-        if self._available_metrics is False:
-            metrics = self._get_service_class('metric')
-            metrics = await metrics.list(Namespace=self._stat_name, Dimensions=self._stat_dimensions)
-            self._available_metrics = metrics
-        return set(metric.name for metric in self._available_metrics)
+        return set(metric.name for metric in await self.get_available_metrics())
 
     @property
     def _stat_dimensions(self) -> list:
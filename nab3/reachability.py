@@ -0,0 +1,363 @@
+import ipaddress
+import logging
+from bisect import bisect_right
+from collections import defaultdict, deque, namedtuple
+
+from nab3.base import BaseAWS, BaseService, ServiceWrapper
+
+LOGGER = logging.getLogger('nab3')
+LOGGER.setLevel(logging.WARNING)
+
+MAX_PORT = 65535
+PROTOCOL_MAP = {'6': 'tcp', '17': 'udp', '1': 'icmp', '58': 'icmpv6'}
+
+# group_id is the security group the rule belongs to.
+# source is the referenced security group id or an ipaddress network, for egress rules it is the destination.
+Rule = namedtuple('Rule', ['group_id', 'protocol', 'from_port', 'to_port', 'source'])
+
+
+class IntervalIndex:
+    """Answers which intervals contain a point in O(log n)
+
+    The intervals are split into elementary segments at every boundary.
+    Each segment stores the values of every interval covering it so a lookup is a single bisect.
+    """
+
+    def __init__(self, intervals: list):
+        """
+        :param intervals: list<tuple(start: int, end: int, value)> The start and end are inclusive
+        """
+        events = defaultdict(lambda: ([], []))
+        for start, end, value in intervals:
+            events[start][0].append(value)
+            events[end + 1][1].append(value)
+
+        self._boundaries = sorted(events.keys())
+        self._segments = []
+        active = {}
+        for boundary in self._boundaries:
+            added, removed = events[boundary]
+            for value in removed:
+                active.pop(id(value), None)
+            for value in added:
+                active[id(value)] = value
+            self._segments.append(tuple(active.values()))
+
+    def find(self, point: int) -> tuple:
+        pos = bisect_right(self._boundaries, point) - 1
+        if pos < 0:
+            return tuple()
+        return self._segments[pos]
+
+
+class Reachability:
+    """Answers network reachability questions using security group rules.
+
+    An adjacency graph is created from the rules that reference another security group
+        and an IntervalIndex is created for port ranges and CIDR ranges.
+    Once created, every query is answered from memory.
+
+    A source can reach a target on a port if:
+        An ingress rule of one of the target's security groups allows one of the source's security groups (or IP)
+        An egress rule of the source's security group allows the target security group or a CIDR range
+            The target's IP isn't known so egress CIDR rules are treated as permitting the connection
+
+    Services are any nab3 service with security groups e.g. ASG, ECSCluster, LoadBalancer, RDSCluster, ElasticacheCluster
+    Queries accept a service, a SecurityGroup, a security group id or, where documented, an IP address.
+
+    Example:
+        reachability = await Reachability.from_account(aws, [asg_list, ecs_cluster_list, rds_cluster_list])
+        reachability.sources(rds_cluster, 5432)
+        reachability.path(load_balancer, rds_cluster, 5432)
+    """
+
+    def __init__(self, security_groups: list, services: list = []):
+        """
+        :param security_groups: list<SecurityGroup> The loaded security groups, typically every group in the region
+        :param services: list<BaseService|ServiceWrapper> The services results are mapped to
+        """
+        self._ingress = defaultdict(list)
+        self._egress = defaultdict(list)
+        self._graph = defaultdict(lambda: defaultdict(list))
+        cidr_rules = defaultdict(list)
+
+        for sg in self._flatten(security_groups):
+            for ip_perm in getattr(sg, 'ip_permissions', []):
+                for rule in self._parse_permission(sg.id, ip_perm):
+                    self._ingress[sg.id].append(rule)
+                    if isinstance(rule.source, str):
+                        self._graph[rule.source][sg.id].append(rule)
+                    else:
+                        cidr_rules[rule.source.version].append(
+                            (int(rule.source.network_address), int(rule.source.broadcast_address), rule)
+                        )
+
+            for ip_perm in getattr(sg, 'ip_permissions_egress', []):
+                self._egress[sg.id] += self._parse_permission(sg.id, ip_perm)
+
+        self._port_index = {
+            group_id: IntervalIndex([(rule.from_port, rule.to_port, rule) for rule in rules])
+            for group_id, rules in self._ingress.items()
+        }
+        self._cidr_index = {version: IntervalIndex(rules) for version, rules in cidr_rules.items()}
+
+        self._services = []
+        self._service_groups = {}
+        self._group_services = defaultdict(list)
+        for service_obj in self._flatten(services):
+            group_ids = self._service_group_ids(service_obj)
+            if id(service_obj) in self._service_groups or not group_ids:
+                continue
+
+            self._services.append(service_obj)
+            self._service_groups[id(service_obj)] = group_ids
+            for group_id in group_ids:
+                self._group_services[group_id].append(service_obj)
+
+    @classmethod
+    async def from_account(cls, aws: BaseAWS, services: list = [], force: bool = False):
+        """Creates a Reachability instance using every security group in the region.
+
+        The security groups of each service are loaded if they haven't been already.
+
+        :param aws: The AWS instance for the session
+        :param services: list<BaseService|ServiceWrapper>
+        :param force: Reload the security group snapshot, see SecurityGroup.load_snapshot
+        :return: Reachability
+        """
+        services = cls._flatten(services)
+        # Services of the same class are loaded together using the list operations of the ServiceWrapper
+        service_lists = {}
+        for service_obj in services:
+            service_list = service_lists.setdefault(type(service_obj), ServiceWrapper(type(service_obj)))
+            service_list.service = (service_list.service or []) + [service_obj]
+
+        load_coros = [
+            service_list.fetch('security_groups') if getattr(service_class, 'load_security_groups', None)
+            else service_list.load()
+            for service_class, service_list in service_lists.items()
+        ]
+        security_groups, *_ = await aws.client.scheduler.gather(
+            aws.security_group.load_snapshot(force=force), *load_coros
+        )
+        return cls(security_groups, services)
+
+    @staticmethod
+    def _flatten(service_list: list) -> list:
+        response = []
+        for service_obj in service_list:
+            if isinstance(service_obj, ServiceWrapper):
+                if service_obj.service is None:
+                    continue
+                response += service_obj.service if service_obj.is_list() else [service_obj.service]
+            elif isinstance(service_obj, (list, tuple)):
+                response += Reachability._flatten(service_obj)
+            else:
+                response.append(service_obj)
+        return response
+
+    @staticmethod
+    def _parse_permission(group_id: str, ip_perm: dict) -> list:
+        protocol = str(ip_perm.get('ip_protocol', '-1'))
+        protocol = PROTOCOL_MAP.get(protocol, protocol)
+        from_port = ip_perm.get('from_port')
+        to_port = ip_perm.get('to_port')
+        # ICMP rules use from_port and to_port for the ICMP type and code rather than a port range
+        #   so they apply to any port e.g. from_port=8, to_port=-1 is echo request with any code
+        if protocol in ('-1', 'icmp', 'icmpv6') or from_port is None or from_port < 0:
+            from_port, to_port = 0, MAX_PORT
+        elif to_port is None or to_port < from_port:
+            to_port = from_port
+
+        rules = []
+        for user_group in ip_perm.get('user_id_group_pairs', []):
+            if user_group.get('group_id'):
+                rules.append(Rule(group_id, protocol, from_port, to_port, user_group['group_id']))
+
+        for ip_range in ip_perm.get('ip_ranges', []):
+            rules.append(Rule(group_id, protocol, from_port, to_port, ipaddress.ip_network(ip_range['cidr_ip'])))
+
+        for ip_range in ip_perm.get('ipv6_ranges', []):
+            rules.append(Rule(group_id, protocol, from_port, to_port, ipaddress.ip_network(ip_range['cidr_ipv6'])))
+
+        return rules
+
+    @staticmethod
+    def _service_group_ids(service_obj) -> frozenset:
+        if isinstance(service_obj, str):
+            return frozenset([service_obj])
+        elif isinstance(service_obj, BaseService) \
+                and isinstance(service_obj, service_obj._get_service_class('security_group')):
+            return frozenset([service_obj.id])
+
+        security_groups = getattr(service_obj, 'security_groups', None)
+        if isinstance(security_groups, ServiceWrapper) and security_groups.service is not None:
+            return frozenset(sg.id for sg in security_groups)
+
+        # RDS returns VpcSecurityGroups which isn't mapped to the SecurityGroup service
+        return frozenset(
+            sg['vpc_security_group_id'] for sg in getattr(service_obj, 'vpc_security_groups', [])
+            if sg.get('vpc_security_group_id')
+        )
+
+    def _group_ids(self, obj) -> frozenset:
+        group_ids = self._service_groups.get(id(obj))
+        if group_ids is None:
+            group_ids = self._service_group_ids(obj)
+        return group_ids
+
+    @staticmethod
+    def _protocol_match(rule: Rule, protocol: str) -> bool:
+        return protocol is None or rule.protocol in ('-1', protocol)
+
+    def _ingress_rules(self, group_id: str, port: int = None, protocol: str = None) -> list:
+        if port is None:
+            rules = self._ingress.get(group_id, [])
+        else:
+            port_index = self._port_index.get(group_id)
+            rules = port_index.find(port) if port_index else []
+        return [rule for rule in rules if self._protocol_match(rule, protocol)]
+
+    def _egress_allowed(self, source_id: str, target_id: str, port: int = None, protocol: str = None) -> bool:
+        for rule in self._egress.get(source_id, []):
+            if not self._protocol_match(rule, protocol):
+                continue
+            elif port is not None and not rule.from_port <= port <= rule.to_port:
+                continue
+            elif not isinstance(rule.source, str) or rule.source == target_id:
+                return True
+        return False
+
+    def _group_sources(self, target_ids: frozenset, port: int = None, protocol: str = None) -> set:
+        """Returns the security group ids that can reach any of the target security group ids."""
+        source_ids = set()
+        for target_id in target_ids:
+            for rule in self._ingress_rules(target_id, port, protocol):
+                if isinstance(rule.source, str) and self._egress_allowed(rule.source, target_id, port, protocol):
+                    source_ids.add(rule.source)
+        return source_ids
+
+    def _group_targets(self, source_ids: frozenset, port: int = None, protocol: str = None) -> set:
+        """Returns the security group ids reachable from any of the source security group ids."""
+        target_ids = set()
+        for source_id in source_ids:
+            for target_id, rules in self._graph.get(source_id, {}).items():
+                if target_id in target_ids:
+                    continue
+                for rule in rules:
+                    if (port is None or rule.from_port <= port <= rule.to_port) \
+                            and self._protocol_match(rule, protocol) \
+                            and self._egress_allowed(source_id, target_id, port, protocol):
+                        target_ids.add(target_id)
+                        break
+        return target_ids
+
+    def _services_for_groups(self, group_ids: set, exclude=None) -> list:
+        response = {}
+        for group_id in group_ids:
+            for service_obj in self._group_services.get(group_id, []):
+                if service_obj is not exclude:
+                    response[id(service_obj)] = service_obj
+        return list(response.values())
+
+    def can_reach(self, source, target, port: int = None, protocol: str = 'tcp') -> bool:
+        """Returns True if the source can connect directly to the target.
+
+        :param source: A service, SecurityGroup, security group id or IP address
+        :param target: A service, SecurityGroup or security group id
+        :param port: If None, any port
+        :param protocol: tcp, udp, icmp or None for any protocol
+        :return: bool
+        """
+        target_ids = self._group_ids(target)
+        if isinstance(source, str) and not source.startswith('sg-'):
+            ip = ipaddress.ip_address(source)
+            return any(rule.group_id in target_ids for rule in self._ip_rules(ip, port, protocol))
+
+        source_ids = self._group_ids(source)
+        return bool(self._group_targets(source_ids, port, protocol) & target_ids)
+
+    def sources(self, target, port: int = None, protocol: str = 'tcp') -> list:
+        """Returns the services that can connect directly to the target.
+            e.g. Which services can reach RDS cluster X on port 5432
+
+        :param target: A service, SecurityGroup or security group id
+        :param port: If None, any port
+        :param protocol: tcp, udp, icmp or None for any protocol
+        :return: list<service>
+        """
+        source_ids = self._group_sources(self._group_ids(target), port, protocol)
+        return self._services_for_groups(source_ids, exclude=target)
+
+    def targets(self, source, port: int = None, protocol: str = 'tcp') -> list:
+        """Returns the services the source can connect to directly.
+
+        :param source: A service, SecurityGroup, security group id or IP address
+        :param port: If None, any port
+        :param protocol: tcp, udp, icmp or None for any protocol
+        :return: list<service>
+        """
+        if isinstance(source, str) and not source.startswith('sg-'):
+            target_ids = set(rule.group_id for rule in self._ip_rules(ipaddress.ip_address(source), port, protocol))
+        else:
+            target_ids = self._group_targets(self._group_ids(source), port, protocol)
+        return self._services_for_groups(target_ids, exclude=source)
+
+    def cidr_sources(self, target, port: int = None, protocol: str = 'tcp') -> list:
+        """Returns the CIDR ranges that are allowed to connect to the target.
+
+        :param target: A service, SecurityGroup or security group id
+        :param port: If None, any port
+        :param protocol: tcp, udp, icmp or None for any protocol
+        :return: list<str>
+        """
+        response = {}
+        for target_id in self._group_ids(target):
+            for rule in self._ingress_rules(target_id, port, protocol):
+                if not isinstance(rule.source, str):
+                    response[str(rule.source)] = True
+        return list(response.keys())
+
+    def _ip_rules(self, ip, port: int = None, protocol: str = None) -> list:
+        cidr_index = self._cidr_index.get(ip.version)
+        if not cidr_index:
+            return []
+
+        return [
+            rule for rule in cidr_index.find(int(ip))
+            if (port is None or rule.from_port <= port <= rule.to_port) and self._protocol_match(rule, protocol)
+        ]
+
+    def path(self, source, target, port: int = None, protocol: str = 'tcp', max_hops: int = None) -> list:
+        """Returns the shortest chain of services the source can use to reach the target.
+
+        Intermediate hops may use any port and protocol, only the final hop to the target is restricted.
+            e.g. LoadBalancer -> ECSCluster -> RDSCluster on 5432
+
+        :param source: A service, SecurityGroup or security group id
+        :param target: A service, SecurityGroup or security group id
+        :param port: The port used to connect to the target. If None, any port
+        :param protocol: The protocol used to connect to the target
+        :param max_hops: The maximum number of connections in the path. If None, unbounded
+        :return: list<service> Starting with the source and ending with the target. Empty if the target isn't reachable
+        """
+        target_ids = self._group_ids(target)
+        # The groups that can make the final hop to the target
+        final_hop_ids = self._group_sources(target_ids, port, protocol)
+
+        queue = deque([(source, self._group_ids(source), [source])])
+        visited = {id(source)}
+        while queue:
+            node, group_ids, node_path = queue.popleft()
+            if group_ids & final_hop_ids:
+                return node_path + [target]
+            elif max_hops is not None and len(node_path) >= max_hops:
+                continue
+
+            for next_node in self._services_for_groups(self._group_targets(group_ids)):
+                if id(next_node) in visited or next_node is target:
+                    continue
+                visited.add(id(next_node))
+                queue.append((next_node, self._service_groups[id(next_node)], node_path + [next_node]))
+
+        return []
@@ -0,0 +1,210 @@
+import asyncio
+import heapq
+from contextlib import contextmanager
+from contextvars import ContextVar
+from collections import defaultdict
+from itertools import count
+
+# The Scheduler the current coroutine holds a slot for, nested fan-outs run within that slot
+_SLOT = ContextVar('nab3_scheduler_slot', default=None)
+_PRIORITY = ContextVar('nab3_scheduler_priority', default=None)
+# The (Scheduler, service_name) slots the current coroutine holds, nested calls to the same service run within them
+_SERVICE_SLOTS = ContextVar('nab3_scheduler_service_slots', default=frozenset())
+
+
+class Scheduler:
+    """Bounds the concurrency of a session's fan-outs and prioritizes what runs next.
+
+    Every internal fan-out (ServiceWrapper.fetch, Filter.run, describe_resource, the helpers, etc.) goes through
+        Scheduler.gather rather than asyncio.gather.
+
+    Limits:
+        max_concurrency: The number of top level coroutines that can run at once.
+            Coroutines started within a running coroutine (e.g. Filter.run -> fetch -> describe_resource)
+            run within their parent's slot. Waiting on a slot the parent already holds would deadlock.
+        service_limits: The number of concurrent calls per boto3 client e.g. dict(cloudwatch=5)
+            Services without a limit use default_service_limit.
+            Like max_concurrency, calls to a service started within a coroutine holding a slot for that service
+            run within the parent's slot e.g. a describe_resource fan-out started by a coroutine gathered for ecs.
+
+    Waiting coroutines are started by priority then the order they were scheduled.
+        BaseService.get runs with HIGH priority so interactive lookups are started ahead of bulk crawls.
+        Use `with scheduler.priority(Scheduler.LOW):` to run a background crawl behind everything else.
+
+    Each gather call only creates a task per running coroutine
+        so large fan-outs don't create a task per object up front.
+    """
+    HIGH = 0
+    NORMAL = 1
+    LOW = 2
+
+    def __init__(self, max_concurrency: int = 50, service_limits: dict = None, default_service_limit: int = 10):
+        """
+        :param max_concurrency: Max top level coroutines running at once
+        :param service_limits: dict(boto3_client_name=int) Max concurrent calls per service
+        :param default_service_limit: Used for services not in service_limits.
+            The default matches the default botocore max_pool_connections used by ClientHandler
+        """
+        self.max_concurrency = max_concurrency
+        self.service_limits = dict(service_limits or {})
+        self.default_service_limit = default_service_limit
+        self._running = 0
+        self._service_running = defaultdict(int)
+        self._waiters = []
+        self._sequence = count()
+
+    def _service_limit(self, service_name: str):
+        if not service_name:
+            return None
+        return self.service_limits.get(service_name, self.default_service_limit)
+
+    def _available(self, needs_slot: bool, service_name: str) -> bool:
+        if needs_slot and self._running >= self.max_concurrency:
+            return False
+
+        service_limit = self._service_limit(service_name)
+        return service_limit is None or self._service_running[service_name] < service_limit
+
+    def _start(self, needs_slot: bool, service_name: str):
+        if needs_slot:
+            self._running += 1
+        if service_name:
+            self._service_running[service_name] += 1
+
+    def _release(self, needs_slot: bool, service_name: str):
+        if needs_slot:
+            self._running -= 1
+        if service_name:
+            self._service_running[service_name] -= 1
+        self._wake()
+
+    def _wake(self):
+        """Starts waiting coroutines in priority order while there is capacity for them."""
+        blocked = []
+        while self._waiters:
+            waiter = heapq.heappop(self._waiters)
+            _, _, needs_slot, service_name, future = waiter
+            if future.done():
+                # Cancelled while waiting
+                continue
+            elif self._available(needs_slot, service_name):
+                self._start(needs_slot, service_name)
+                future.set_result(None)
+            else:
+                # Keep going, a waiter for another service or one running within a parent's slot may still start
+                blocked.append(waiter)
+
+        for waiter in blocked:
+            heapq.heappush(self._waiters, waiter)
+
+    async def _acquire(self, needs_slot: bool, service_name: str, priority: int):
+        future = asyncio.get_event_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), needs_slot, service_name, future))
+        self._wake()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was granted as the waiter was cancelled
+                self._release(needs_slot, service_name)
+            raise
+
+    @contextmanager
+    def reserve(self, service_name: str, count: int):
+        """Claims up to count of the service's free slots for blocking calls made outside the event loop e.g. threads.
+
+        Slots are only claimed if they are free right now, the context never waits.
+            Use the number of slots claimed as the number of additional calls that can run concurrently.
+
+        :param service_name: The boto3 client name
+        :param count: The max number of slots to claim
+        :return: int The number of slots claimed
+        """
+        service_limit = self._service_limit(service_name)
+        reserved = max(min(count, service_limit - self._service_running[service_name]), 0)
+        self._service_running[service_name] += reserved
+        try:
+            yield reserved
+        finally:
+            self._service_running[service_name] -= reserved
+            self._wake()
+
+    @contextmanager
+    def priority(self, priority: int):
+        """Sets the priority of everything scheduled within the context, including nested fan-outs.
+
+        :param priority: Scheduler.HIGH, Scheduler.NORMAL or Scheduler.LOW
+        :return:
+        """
+        token = _PRIORITY.set(priority)
+        try:
+            yield
+        finally:
+            _PRIORITY.reset(token)
+
+    async def run(self, coro, service_name: str = None, priority: int = None):
+        """Runs the coroutine once there is capacity for it.
+
+        :param coro:
+        :param service_name: The boto3 client name if the coroutine makes a call to the service
+        :param priority: Defaults to the priority of the current context or NORMAL
+        :return: The result of the coroutine
+        """
+        needs_slot = _SLOT.get() is not self
+        service_slots = _SERVICE_SLOTS.get()
+        if (self, service_name) in service_slots:
+            # Waiting on a service slot the parent already holds would deadlock once the limit is reached
+            service_name = None
+        if not needs_slot and not service_name:
+            return await coro
+
+        if priority is None:
+            priority = _PRIORITY.get()
+            priority = self.NORMAL if priority is None else priority
+
+        try:
+            await self._acquire(needs_slot, service_name, priority)
+        except BaseException:
+            coro.close()
+            raise
+
+        token = _SLOT.set(self)
+        service_token = _SERVICE_SLOTS.set(service_slots | {(self, service_name)}) if service_name else None
+        try:
+            return await coro
+        finally:
+            if service_token:
+                _SERVICE_SLOTS.reset(service_token)
+            _SLOT.reset(token)
+            self._release(needs_slot, service_name)
+
+    async def gather(self, *coros, service_name: str = None, priority: int = None) -> list:
+        """A bounded asyncio.gather. Returns the results in the order the coroutines were provided.
+
+        If a coroutine raises, the remaining coroutines are cancelled and the exception is raised.
+
+        :param coros: The coroutines to run
+        :param service_name: The boto3 client name if the coroutines make a call to the service
+        :param priority: Defaults to the priority of the current context or NORMAL
+        :return: list
+        """
+        results = [None] * len(coros)
+        pending = iter(enumerate(coros))
+
+        async def _worker():
+            for pos, coro in pending:
+                results[pos] = await self.run(coro, service_name, priority)
+
+        workers = [asyncio.ensure_future(_worker()) for _ in range(min(len(coros), self.max_concurrency))]
+        try:
+            await asyncio.gather(*workers)
+        except BaseException:
+            for worker in workers:
+                worker.cancel()
+            for _, coro in pending:
+                coro.close()
+            # Wait for the cancelled workers so their slots are released before raising
+            await asyncio.gather(*workers, return_exceptions=True)
+            raise
+
+        return results
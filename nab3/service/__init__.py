@@ -1,7 +1,9 @@
 from nab3.service.cloudwatch import Alarm, Metric
 from nab3.service.autoscaling import AppAutoScalePolicy, ASG, AutoScalePolicy, LaunchConfiguration
 from nab3.service.ec2 import EC2Instance, Image, SecurityGroup
-from nab3.service.elasticache import ElasticacheCluster, ElasticacheNode
+from nab3.service.elasticache import (
+    ElasticacheCacheNode, ElasticacheCluster, ElasticacheNode, ElasticacheReplicationGroup
+)
 from nab3.service.ecs import ECSCluster, ECSInstance, ECSService, ECSTask
 from nab3.service.kafka import KafkaBroker, KafkaCluster
 from nab3.service.load_balancer import LoadBalancer, LoadBalancerClassic, TargetGroup
@@ -3,7 +3,8 @@ import logging
 
 from nab3.mixin import AutoScaleMixin, MetricMixin, PricingMixin, SecurityGroupMixin
 from nab3.base import PaginatedBaseService, ServiceWrapper
-from nab3.utils import PRICING_REGION_MAP
+from nab3.scheduler import Scheduler
+from nab3.utils import describe_resource, PRICING_REGION_MAP
 
 LOGGER = logging.getLogger('nab3')
 LOGGER.setLevel(logging.WARNING)
@@ -15,6 +16,7 @@ class AutoScalePolicy(PaginatedBaseService):
     """
     boto3_client_name = 'autoscaling'
     key_prefix = 'Policy'
+    _primary_key = 'arn'
     _boto3_describe_def = dict(
         client_call='describe_policies',
         call_params=dict(
@@ -67,6 +69,7 @@ class AppAutoScalePolicy(PaginatedBaseService):
     """
     boto3_client_name = 'application-autoscaling'
     key_prefix = 'Policy'
+    _primary_key = 'arn'
     _boto3_describe_def = dict(
         client_call='describe_scaling_policies',
         call_params=dict(
@@ -102,6 +105,8 @@ class LaunchConfiguration(PaginatedBaseService):
     """
     boto3_client_name = 'autoscaling'
     key_prefix = 'LaunchConfiguration'
+    _config_resource_type = 'AWS::AutoScaling::LaunchConfiguration'
+    _primary_key = 'name'
     _boto3_describe_def = dict(
         call_params=dict(
             name=dict(name='LaunchConfigurationNames', type=list),
@@ -125,6 +130,8 @@ class ASG(AutoScaleMixin, MetricMixin, PricingMixin, SecurityGroupMixin, Paginat
     """
     boto3_client_name = 'autoscaling'
     key_prefix = 'AutoScalingGroup'
+    _config_resource_type = 'AWS::AutoScaling::AutoScalingGroup'
+    _primary_key = 'name'
     _boto3_describe_def = dict(
         call_params=dict(
             name=dict(name='AutoScalingGroupNames', type=list),
@@ -132,18 +139,26 @@ class ASG(AutoScaleMixin, MetricMixin, PricingMixin, SecurityGroupMixin, Paginat
     )
 
     async def get_on_demand_monthly(self, currency='usd'):
-        if not self.pricing.is_loaded():
-            await self.fetch('pricing')
-
-        per_instance = self.pricing.get_on_demand_monthly(currency)
-        return per_instance * len(self.instances)
+        return await self.get_on_demand_hourly(currency) * 24 * 30
 
     async def get_on_demand_hourly(self, currency='usd'):
-        if not self.pricing.is_loaded():
-            await self.fetch('pricing')
-
-        per_instance = self.pricing.get_on_demand_hourly(currency)
-        return per_instance * len(self.instances)
+        """The on demand cost of every instance in the ASG, each instance type is priced separately"""
+        pricing_lines = self._pricing_lines
+        if len(pricing_lines) <= 1:
+            if not self.pricing.is_loaded():
+                await self.fetch('pricing')
+
+            per_instance = self.pricing.get_on_demand_hourly(currency)
+            return per_instance * len(self.instances)
+
+        prices = await self._get_service_class('pricing').get_prices([params for params, _ in pricing_lines])
+        hourly = 0
+        for price, (pricing_params, quantity) in zip(prices, pricing_lines):
+            if price is None:
+                LOGGER.warning(f'{self.name} - No on demand price for {pricing_params["filters"]}')
+                continue
+            hourly += price.get_on_demand_hourly(currency) * quantity
+        return hourly
 
     async def load_security_groups(self, force=False):
         """Retrieves the instances related security groups.
@@ -182,14 +197,35 @@ class ASG(AutoScaleMixin, MetricMixin, PricingMixin, SecurityGroupMixin, Paginat
             else:
                 raise ValueError(f'{instance_id} not found or does not belong to an auto scaling group')
 
-        obj = cls(**kwargs)
-        await obj.load()
-        if with_related:
-            await obj.fetch(*with_related)
+        obj = cls._register(cls(**kwargs))
+        with cls._client.scheduler.priority(Scheduler.HIGH):
+            await obj.load()
+            if with_related:
+                await obj.fetch(*with_related)
 
         resp.service = obj
         return resp
 
+    @classmethod
+    async def get_instance_group_names(cls, instance_ids: list) -> dict:
+        """Resolves the auto scaling group for each EC2 instance using as few calls as possible.
+
+        :param instance_ids: list<str> EC2 instance IDs
+        :return: dict(instance_id=asg_name) Instances that don't belong to an auto scaling group are excluded
+        """
+        instance_ids = list(dict.fromkeys(instance_ids))
+        if not instance_ids:
+            return {}
+
+        client = cls._client.get(cls.boto3_client_name)
+        responses = await describe_resource(
+            client.describe_auto_scaling_instances, 'InstanceIds', instance_ids, {}, scheduler=cls._client.scheduler
+        )
+        return {
+            instance['InstanceId']: instance['AutoScalingGroupName']
+            for response in responses for instance in response.get('AutoScalingInstances', [])
+        }
+
     @property
     def _stat_dimensions(self) -> list:
         return [dict(Name='AutoScalingGroupName', Value=self.name)]
@@ -198,19 +234,35 @@ class ASG(AutoScaleMixin, MetricMixin, PricingMixin, SecurityGroupMixin, Paginat
     def _stat_name(self) -> str:
         return 'AWS/EC2'
 
+    def _instance_pricing_params(self, instance) -> dict:
+        os = getattr(instance, 'Platform', None)
+        return dict(service_code='AmazonEC2',
+                    filters=[
+                        {'Field': 'tenancy', 'Value': 'shared', 'Type': 'TERM_MATCH'},
+                        {'Field': 'operatingSystem', 'Value': os if os else 'Linux', 'Type': 'TERM_MATCH'},
+                        {'Field': 'preInstalledSw', 'Value': 'NA', 'Type': 'TERM_MATCH'},
+                        {'Field': 'instanceType', 'Value': instance.type, 'Type': 'TERM_MATCH'},
+                        {'Field': 'location', 'Value': PRICING_REGION_MAP[self.region], 'Type': 'TERM_MATCH'},
+                        {'Field': 'capacitystatus', 'Value': 'Used', 'Type': 'TERM_MATCH'}
+                    ])
+
     @property
     def _pricing_params(self) -> dict:
         if len(self.instances) > 0:
-            instance = self.instances[0]
-            os = getattr(instance, 'Platform', None)
-            return dict(service_code='AmazonEC2',
-                        filters=[
-                            {'Field': 'tenancy', 'Value': 'shared', 'Type': 'TERM_MATCH'},
-                            {'Field': 'operatingSystem', 'Value': os if os else 'Linux', 'Type': 'TERM_MATCH'},
-                            {'Field': 'preInstalledSw', 'Value': 'NA', 'Type': 'TERM_MATCH'},
-                            {'Field': 'instanceType', 'Value': instance.type, 'Type': 'TERM_MATCH'},
-                            {'Field': 'location', 'Value': PRICING_REGION_MAP[self.region], 'Type': 'TERM_MATCH'},
-                            {'Field': 'capacitystatus', 'Value': 'Used', 'Type': 'TERM_MATCH'}
-                        ])
+            return self._instance_pricing_params(self.instances[0])
         else:
             return dict()
+
+    @property
+    def _pricing_lines(self) -> list:
+        # ASGs using a mixed instances policy can have more than 1 instance type
+        pricing_lines = {}
+        for instance in self.instances:
+            pricing_params = self._instance_pricing_params(instance)
+            pricing_key = self._get_service_class('pricing').pricing_key(pricing_params)
+            if pricing_key in pricing_lines:
+                pricing_lines[pricing_key][1] += 1
+            else:
+                pricing_lines[pricing_key] = [pricing_params, 1]
+
+        return [tuple(pricing_line) for pricing_line in pricing_lines.values()]
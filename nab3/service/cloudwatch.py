@@ -1,7 +1,13 @@
 import logging
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
 
-from nab3.base import PaginatedBaseService
-from nab3.utils import paginated_search, snake_to_camelcap
+from nab3.base import PaginatedBaseService, ServiceWrapper
+from nab3.metric_poller import MetricPoller
+from nab3.metric_store import _to_epoch
+from nab3.utils import get_batch_size, get_operation_limits, paginate, paginated_search, snake_to_camelcap
 
 LOGGER = logging.getLogger('nab3')
 LOGGER.setLevel(logging.WARNING)
@@ -13,10 +19,77 @@ class Alarm(PaginatedBaseService):
     """
     boto3_client_name = 'cloudwatch'
     key_prefix = 'Alarm'
+    _primary_key = None
+    # Populated by load_history_index.
+    #   dict(start=int, end=int, item_type=str, alarm_types=set<str>, items=dict<str, list<AlarmHistoryItem>>)
+    _history_index = None
+
+    @staticmethod
+    def _alarm_types(alarm_types) -> set:
+        # describe_alarm_history only returns metric alarms if AlarmTypes isn't set
+        return set(alarm_types or ['MetricAlarm'])
+
+    @classmethod
+    def load_history_index(cls, start_date, end_date, item_type=None, alarm_types=None, force: bool = False):
+        """Retrieves the history of every alarm between start_date and end_date in a single scan
+            and indexes the items by alarm name.
+
+        This is opt-in. While the index covers the requested range, item type and alarm types
+            get_history and the scaling policy get_alarms methods are answered from memory.
+            e.g. md_ecs_cluster_summary makes one scan instead of one per alarm of every scaling policy
+
+        The index is not refreshed automatically, call with force=True or clear_history_index to refresh it.
+        Calling with a range that isn't covered by the current index replaces it.
+
+        :param start_date: StartDate=datetime(2015, 1, 1)
+        :param end_date: EndDate=datetime(2015, 1, 1)
+        :param item_type: HistoryItemType='ConfigurationUpdate StateUpdate Action' None indexes every type
+        :param alarm_types: AlarmTypes=['CompositeAlarm MetricAlarm']
+        :param force: Reload the index even if it covers the range
+        :return:
+        """
+        if not force and cls.history_index_covers(start_date, end_date, item_type, alarm_types):
+            return
+
+        search_kwargs = dict(StartDate=start_date,
+                             EndDate=end_date,
+                             AlarmTypes=list(cls._alarm_types(alarm_types)),
+                             ScanBy='TimestampDescending')
+        if item_type:
+            search_kwargs['HistoryItemType'] = item_type
+
+        search_fnc = cls._client.get(cls.boto3_client_name).describe_alarm_history
+        items = {}
+        for result in paginated_search(search_fnc, search_kwargs, 'AlarmHistoryItems'):
+            items.setdefault(result['AlarmName'], []).append(result)
+
+        cls._history_index = dict(start=_to_epoch(start_date),
+                                  end=_to_epoch(end_date),
+                                  item_type=item_type,
+                                  alarm_types=cls._alarm_types(alarm_types),
+                                  items=items)
+
+    @classmethod
+    def clear_history_index(cls):
+        cls._history_index = None
+
+    @classmethod
+    def history_index_covers(cls, start_date, end_date, item_type=None, alarm_types=None) -> bool:
+        index = cls._history_index
+        return bool(
+            index is not None
+            and index['start'] <= _to_epoch(start_date)
+            and _to_epoch(end_date) <= index['end']
+            and index['item_type'] in [None, item_type]
+            and cls._alarm_types(alarm_types) <= index['alarm_types']
+        )
 
     @classmethod
     def get_history(cls, start_date, end_date, name=None, item_type=None, alarm_types=None, sort_descending=True):
         """ Retrieves the history for the specified alarm.
+
+        If the history index covers the request it is answered from memory. See Alarm.load_history_index
+
         :param start_date: StartDate=datetime(2015, 1, 1)
         :param end_date: EndDate=datetime(2015, 1, 1)
         :param name: AlarmName='string'
@@ -25,13 +98,26 @@ class Alarm(PaginatedBaseService):
         :param sort_descending: bool -> ScanBy='TimestampDescending TimestampAscending'
         :return:
         """
+        if name and cls.history_index_covers(start_date, end_date, item_type, alarm_types):
+            start, end = _to_epoch(start_date), _to_epoch(end_date)
+            alarm_types = cls._alarm_types(alarm_types)
+            results = [
+                result for result in cls._history_index['items'].get(name, [])
+                if start <= _to_epoch(result['Timestamp']) <= end
+                and (not item_type or result.get('HistoryItemType') == item_type)
+                and result.get('AlarmType', 'MetricAlarm') in alarm_types
+            ]
+            results.sort(key=lambda result: _to_epoch(result['Timestamp']), reverse=sort_descending)
+            return [cls(_loaded=True, **result) for result in results]
+
         search_kwargs = dict(StartDate=start_date, EndDate=end_date,
-                             AlarmTypes=alarm_types,
                              ScanBy='TimestampDescending' if sort_descending else 'TimestampAscending')
         if name:
             search_kwargs['AlarmName'] = name
         if item_type:
             search_kwargs['HistoryItemType'] = item_type
+        if alarm_types:
+            search_kwargs['AlarmTypes'] = alarm_types
 
         search_fnc = cls._client.get(cls.boto3_client_name).describe_alarm_history
         results = paginated_search(search_fnc, search_kwargs, 'AlarmHistoryItems')
@@ -46,6 +132,15 @@ class Metric(PaginatedBaseService):
     """
     boto3_client_name = 'cloudwatch'
     key_prefix = 'Metric'
+    _primary_key = None
+    # How long a namespace index is used before list_metrics is called again.
+    #   New metrics can take up to 15 minutes to be returned by list_metrics
+    namespace_index_ttl = timedelta(hours=1)
+    # Populated by load_namespace_index.
+    #   namespace -> dict(loaded_at=float, metrics=list<Metric>, dimensions=dict<tuple(name, value), list<Metric>>)
+    _namespace_index = None
+    # The session's MetricPoller, see Metric.get_poller
+    _poller = None
     _boto3_describe_def = dict(
         client_call="list_metrics",
         call_params=dict(
@@ -55,6 +150,99 @@ class Metric(PaginatedBaseService):
         )
     )
 
+    @classmethod
+    def get_poller(cls) -> MetricPoller:
+        """Returns the MetricPoller shared by every tail in the session. See MetricMixin.tail"""
+        if cls._poller is None:
+            cls._poller = MetricPoller(cls.get_metric_data)
+        return cls._poller
+
+    @classmethod
+    async def load_namespace_index(cls, namespace: str, force: bool = False) -> list:
+        """Retrieves every metric in the namespace with a single list_metrics scan
+            and indexes them by each of their dimensions.
+
+        The index is reused for namespace_index_ttl so every service in the namespace is answered from memory
+            e.g. MetricMixin.get_available_metrics and KafkaCluster.get_topics
+
+        :param namespace: e.g. AWS/ECS
+        :param force: Reload the index even if it hasn't expired
+        :return: list<Metric>
+        """
+        index = (cls._namespace_index or {}).get(namespace)
+        if index and not force and time.monotonic() - index['loaded_at'] < cls.namespace_index_ttl.total_seconds():
+            return index['metrics']
+
+        metrics = await cls.list(namespace=namespace)
+        metrics = [metric for metric in metrics.service]
+        dimensions = {}
+        for metric in metrics:
+            for dimension in getattr(metric, 'dimensions', []):
+                dimensions.setdefault((dimension['name'], dimension['value']), []).append(metric)
+                dimensions.setdefault((dimension['name'], None), []).append(metric)
+
+        if cls._namespace_index is None:
+            cls._namespace_index = {}
+        cls._namespace_index[namespace] = dict(loaded_at=time.monotonic(), metrics=metrics, dimensions=dimensions)
+        return metrics
+
+    @classmethod
+    def clear_namespace_index(cls, namespace: str = None):
+        """
+        :param namespace: Only clear the index for this namespace. Clears every namespace if not set.
+        :return:
+        """
+        if namespace is None:
+            cls._namespace_index = None
+        elif cls._namespace_index:
+            cls._namespace_index.pop(namespace, None)
+
+    @classmethod
+    async def list_from_index(cls, namespace: str, dimensions: list = None):
+        """The same result as list(namespace=namespace, dimensions=dimensions) answered using the namespace index.
+
+        A metric matches if it has every dimension in dimensions. A dimension without a Value matches any value.
+
+        :param namespace: e.g. AWS/ECS
+        :param dimensions: list<dict(Name=str, Value=str)>
+        :return: ServiceWrapper(list<Metric>)
+        """
+        metrics = await cls.load_namespace_index(namespace)
+        index = cls._namespace_index[namespace]['dimensions']
+        # Start with the dimension with the fewest metrics then remove the metrics missing any other dimension
+        dimension_matches = sorted(
+            [index.get((dimension['Name'], dimension.get('Value')), []) for dimension in dimensions or []], key=len
+        )
+        if dimension_matches:
+            metrics = dimension_matches[0]
+            for matches in dimension_matches[1:]:
+                matches = set(id(metric) for metric in matches)
+                metrics = [metric for metric in metrics if id(metric) in matches]
+
+        resp = ServiceWrapper(cls)
+        resp.service = list(metrics)
+        return resp
+
+    @staticmethod
+    def auto_period(start_time, end_time, target_datapoints: int = 1440) -> int:
+        """Returns the smallest period that covers start_time to end_time in at most target_datapoints.
+
+        The period is a multiple of 60 and respects CloudWatch's retention of older datapoints
+            Over 15 days old: multiples of 300
+            Over 63 days old: multiples of 3600
+        docs.aws.amazon.com/AmazonCloudWatch/latest/monitoring/cloudwatch_concepts.html#Metric
+
+        :param start_time:
+        :param end_time:
+        :param target_datapoints: The desired number of datapoints e.g. 100 for a sparkline
+        :return: int period in seconds
+        """
+        start = _to_epoch(start_time)
+        age = time.time() - start
+        resolution = 3600 if age > 63 * 86400 else 300 if age > 15 * 86400 else 60
+        period = (_to_epoch(end_time) - start) / max(target_datapoints, 1)
+        return max(math.ceil(period / resolution), 1) * resolution
+
     @classmethod
     def get_statistics(cls, namespace, metric_name, start_time, end_time, interval_as_seconds, **kwargs):
         """
@@ -80,9 +268,17 @@ class Metric(PaginatedBaseService):
         :param start_time:
         :param end_time:
         :param interval_as_seconds: This is the Period paremeter. Renamed here to make the purpose more intuitive
+            If None, the period is set using Metric.auto_period and target_datapoints
+        :param use_cache: Only request the time ranges that aren't in the session's MetricStore. Default True
+        :param target_datapoints: Used to set the period when interval_as_seconds is None. Default 1440
         :param kwargs:
         :return:
         """
+        use_cache = kwargs.pop('use_cache', True)
+        target_datapoints = kwargs.pop('target_datapoints', None) or 1440
+        if interval_as_seconds is None:
+            interval_as_seconds = cls.auto_period(start_time, end_time, target_datapoints)
+
         search_kwargs = dict(EndTime=end_time,
                              Namespace=namespace,
                              MetricName=metric_name,
@@ -92,8 +288,118 @@ class Metric(PaginatedBaseService):
             search_kwargs[snake_to_camelcap(k)] = v
 
         client = cls._client.get(cls.boto3_client_name)
-        response = client.get_metric_statistics(**search_kwargs)
-        return [cls(name=metric_name, _loaded=True, **obj) for obj in response.get('Datapoints', [])]
+        max_datapoints = get_operation_limits(client.get_metric_statistics).get('max_datapoints', 1440)
+        scheduler = cls._client.scheduler
+
+        def _get_shard(shard_start, shard_end):
+            response = client.get_metric_statistics(**{**search_kwargs, 'StartTime': shard_start, 'EndTime': shard_end})
+            return response.get('Datapoints', [])
+
+        def _get_datapoints(range_start, range_end):
+            # get_metric_statistics returns at most max_datapoints so larger ranges are split into shards
+            # CloudWatch rounds the start time down to the period so the shards are aligned to it
+            shard_span = timedelta(seconds=interval_as_seconds * max_datapoints)
+            shard_end = range_start.replace(microsecond=0) + shard_span \
+                - timedelta(seconds=_to_epoch(range_start) % interval_as_seconds)
+            shards = []
+            while range_start < range_end:
+                shards.append((range_start, min(shard_end, range_end)))
+                range_start, shard_end = shard_end, shard_end + shard_span
+
+            if len(shards) <= 1:
+                return _get_shard(*shards[0]) if shards else []
+
+            # boto3 calls are blocking so the shards are requested concurrently using threads.
+            #   Like any blocking call, 1 shard is always requested by the caller.
+            #   Additional threads are only used for the session's free cloudwatch slots so the service limit holds.
+            with scheduler.reserve(cls.boto3_client_name, len(shards) - 1) as reserved:
+                with ThreadPoolExecutor(max_workers=reserved + 1) as executor:
+                    responses = list(executor.map(lambda shard: _get_shard(*shard), shards))
+
+            datapoints = {}
+            for datapoint in (datapoint for response in responses for datapoint in response):
+                datapoints[datapoint['Timestamp']] = datapoint
+            return [datapoints[timestamp] for timestamp in sorted(datapoints.keys())]
+
+        if use_cache:
+            series_key = cls._client.metric_store.series_key(
+                namespace, metric_name, search_kwargs.get('Dimensions', []), interval_as_seconds, search_kwargs.get('Unit')
+            )
+            datapoints = cls._client.metric_store.get_statistics(
+                series_key,
+                search_kwargs.get('Statistics') or [],
+                search_kwargs.get('ExtendedStatistics') or [],
+                start_time,
+                end_time,
+                _get_datapoints
+            )
+        else:
+            datapoints = _get_datapoints(start_time, end_time)
+
+        return [cls(name=metric_name, _loaded=True, **obj) for obj in datapoints]
+
+    @classmethod
+    async def get_metric_data(cls, metric_queries: list, start_time, end_time) -> list:
+        """Retrieves the datapoints for many metrics, across any number of services, using get_metric_data.
+
+        Each statistic of each query is a MetricDataQuery.
+        They are packed into as few get_metric_data calls as possible (up to 500 queries per call)
+            and the results are demultiplexed back into the same structure returned by get_statistics.
+        The response doesn't include the unit so Metric.unit is None
+
+        :param metric_queries: list<dict> See MetricMixin.metric_query
+            dict(namespace=str, metric_name=str, dimensions=list, statistics=list<str>, interval_as_seconds=int)
+        :param start_time:
+        :param end_time:
+        :return: list<list<Metric>> The datapoints for each query in metric_queries, in the same order
+        """
+        data_queries = []
+        for query_pos, metric_query in enumerate(metric_queries):
+            for stat_pos, stat in enumerate(metric_query['statistics']):
+                data_queries.append(dict(
+                    Id=f'q{query_pos}_{stat_pos}',
+                    MetricStat=dict(
+                        Metric=dict(
+                            Namespace=metric_query['namespace'],
+                            MetricName=metric_query['metric_name'],
+                            Dimensions=metric_query.get('dimensions', [])
+                        ),
+                        Period=metric_query['interval_as_seconds'],
+                        Stat=stat
+                    ),
+                    ReturnData=True
+                ))
+
+        client = cls._client.get(cls.boto3_client_name)
+        chunk_size = get_batch_size(client.get_metric_data)
+
+        async def _get_metric_data(chunked_queries):
+            search_kwargs = dict(MetricDataQueries=chunked_queries, StartTime=start_time, EndTime=end_time)
+            # A query's datapoints may be split across pages
+            query_results = []
+            for page in paginate(client.get_metric_data, search_kwargs, 'MetricDataResults'):
+                query_results += page
+            return query_results
+
+        responses = await cls._client.scheduler.gather(
+            *[_get_metric_data(data_queries[x:x+chunk_size]) for x in range(0, len(data_queries), chunk_size)],
+            service_name=cls.boto3_client_name
+        )
+
+        # query position -> timestamp -> datapoint
+        datapoints = [dict() for _ in metric_queries]
+        for query_result in (result for response in responses for result in response):
+            query_pos, stat_pos = [int(pos) for pos in query_result['Id'][1:].split('_')]
+            stat = metric_queries[query_pos]['statistics'][stat_pos]
+            for timestamp, value in zip(query_result.get('Timestamps', []), query_result.get('Values', [])):
+                datapoint = datapoints[query_pos].setdefault(timestamp, dict(Timestamp=timestamp, Unit=None))
+                datapoint[stat] = value
+
+        return [
+            [cls(name=metric_query['metric_name'], _loaded=True, **datapoint)
+             for datapoint in datapoints[query_pos].values()]
+            for query_pos, metric_query in enumerate(metric_queries)
+        ]
 
     @classmethod
     def get(cls, **kwargs):
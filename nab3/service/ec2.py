@@ -1,20 +1,22 @@
 import logging
 from itertools import chain
 
-from nab3.mixin import MetricMixin, PricingMixin
+from nab3.mixin import EC2TagMixin, MetricMixin, PricingMixin
 from nab3.base import PaginatedBaseService
-from nab3.utils import camel_to_snake, paginated_search, PRICING_REGION_MAP, snake_to_camelcap
+from nab3.utils import camel_to_snake, paginate, PRICING_REGION_MAP, snake_to_camelcap
 
 LOGGER = logging.getLogger('nab3')
 LOGGER.setLevel(logging.WARNING)
 
 
-class SecurityGroup(PaginatedBaseService):
+class SecurityGroup(EC2TagMixin, PaginatedBaseService):
     """
     boto3.amazonaws.com/v1/documentation/api/latest/reference/services/ec2.html#EC2.Client.describe_security_groups
     """
     boto3_client_name = 'ec2'
     key_prefix = 'SecurityGroup'
+    _tag_resource_type = 'ec2:security-group'
+    _config_resource_type = 'AWS::EC2::SecurityGroup'
     client_id = 'Group'
     _boto3_describe_def = dict(
         client_call="describe_security_groups",
@@ -26,14 +28,78 @@ class SecurityGroup(PaginatedBaseService):
     _to_boto3_case = snake_to_camelcap
     _response_alias = dict(user_id_group_pairs='security_group')
     _boto3_response_override = dict(SecurityGroupId='id')
+    # Populated by load_snapshot. dict(groups=list<SecurityGroup>, referenced_by=dict<str, list<SecurityGroup>>)
+    _snapshot = None
+
+    @classmethod
+    async def load_snapshot(cls, force: bool = False):
+        """Retrieves every security group in the region and indexes them by the group ids their ingress rules reference.
+
+        This is opt-in. Once loaded, SecurityGroupMixin.load_accessible_resources is answered from memory
+            instead of a filtered describe_security_groups call per service.
+            e.g. Run before md_sg_summary across a large number of services
+
+        The snapshot is not refreshed automatically, call with force=True or clear_snapshot if rules have changed.
+
+        :param force: Reload the snapshot if it has already been loaded
+        :return: list<SecurityGroup>
+        """
+        if cls._snapshot is not None and not force:
+            return cls._snapshot['groups']
+
+        security_groups = await cls.list()
+        security_groups = [sg for sg in security_groups.service]
+        referenced_by = {}
+        for sg in security_groups:
+            for ip_perm in getattr(sg, 'ip_permissions', []):
+                for user_group in ip_perm.get('user_id_group_pairs', []):
+                    group_id = user_group.get('group_id')
+                    if group_id:
+                        # Keyed by id to dedupe groups that reference a group in multiple rules
+                        referenced_by.setdefault(group_id, {})[sg.id] = sg
+
+        cls._snapshot = dict(
+            groups=security_groups,
+            referenced_by={group_id: list(sg_map.values()) for group_id, sg_map in referenced_by.items()}
+        )
+        return security_groups
+
+    @classmethod
+    def clear_snapshot(cls):
+        cls._snapshot = None
+
+    @classmethod
+    def has_snapshot(cls) -> bool:
+        return cls._snapshot is not None
+
+    @classmethod
+    def referencing_groups(cls, group_ids: list) -> list:
+        """Returns the security groups with an ingress rule that references any of the provided group ids.
+        Equivalent to describe_security_groups using the ip-permission.group-id filter.
+
+        :param group_ids: list<str>
+        :return: list<SecurityGroup>
+        """
+        if cls._snapshot is None:
+            raise RuntimeError('The security group snapshot has not been loaded. See SecurityGroup.load_snapshot')
+
+        referenced_by = cls._snapshot['referenced_by']
+        response = {}
+        for group_id in group_ids:
+            for sg in referenced_by.get(group_id, []):
+                response[sg.id] = sg
+
+        return list(response.values())
 
 
-class EC2Instance(PricingMixin, PaginatedBaseService):
+class EC2Instance(EC2TagMixin, PricingMixin, PaginatedBaseService):
     """
     boto3.amazonaws.com/v1/documentation/api/latest/reference/services/ec2.html#EC2.Client.describe_instances
     """
     boto3_client_name = 'ec2'
     key_prefix = 'Instance'
+    _tag_resource_type = 'ec2:instance'
+    _config_resource_type = 'AWS::EC2::Instance'
     _boto3_describe_def = dict(
         call_params=dict(
             id=dict(name='InstanceIds', type=list),
@@ -42,18 +108,18 @@ class EC2Instance(PricingMixin, PaginatedBaseService):
     )
 
     @classmethod
-    async def _list(cls, filters=[], instance_ids=[], **kwargs) -> list:
+    async def _iter_list(cls, filters=[], instance_ids=[], **kwargs):
         """
 
         :param instance_ids: list<str>
         :param filters: list<dict> Available filter options available in the boto3 link above
         :return:
         """
-        search_kwargs = dict(Filters=filters, InstanceIds=instance_ids)
+        search_kwargs = dict(Filters=kwargs.get('Filters', filters), InstanceIds=kwargs.get('InstanceIds', instance_ids))
         search_fnc = cls._client.get(cls.boto3_client_name).describe_instances
-        results = paginated_search(search_fnc, search_kwargs, 'Reservations')
-        instances = list(chain.from_iterable([obj['Instances'] for obj in results]))
-        return [cls(_loaded=True, **result) for result in instances]
+        for page in paginate(search_fnc, search_kwargs, 'Reservations'):
+            instances = list(chain.from_iterable([obj['Instances'] for obj in page]))
+            yield [cls(_loaded=True, **result) for result in instances]
 
     async def _load(self):
         response = self.client.describe_instances(InstanceIds=[self.id])
@@ -91,12 +157,13 @@ class EC2Instance(PricingMixin, PaginatedBaseService):
                         ])
 
 
-class Image(PaginatedBaseService):
+class Image(EC2TagMixin, PaginatedBaseService):
     """
     boto3.amazonaws.com/v1/documentation/api/latest/reference/services/ec2.html#EC2.Client.describe_images
     """
     boto3_client_name = 'ec2'
     key_prefix = 'Image'
+    _tag_resource_type = 'ec2:image'
     _boto3_describe_def = dict(
         client_call="describe_images",
         call_params=dict(
@@ -109,10 +176,10 @@ class Image(PaginatedBaseService):
     _to_boto3_case = snake_to_camelcap
 
     @classmethod
-    async def _list(cls, **kwargs) -> list:
-        """Returns an instance for each object
+    async def _iter_list(cls, **kwargs):
+        """Yields the instances for each page of the describe operation
         :param kwargs:
-        :return: list<cls()>
+        :return: async_generator<list<cls()>>
         """
         kwargs = {cls._to_boto3_case(k): v for k, v in kwargs.items() if k not in ['list_kwargs', 'describe_kwargs']}
         if not kwargs:
@@ -125,5 +192,5 @@ class Image(PaginatedBaseService):
 
         client = cls._client.get(cls.boto3_client_name)
         boto3_fnc = getattr(client, fnc_name)
-        response = paginated_search(boto3_fnc, kwargs, response_key)
-        return [cls(_loaded=True, **obj) for obj in response]
+        for page in paginate(boto3_fnc, kwargs, response_key):
+            yield [cls(_loaded=True, **obj) for obj in page]
@@ -1,7 +1,9 @@
 import logging
+from collections import Counter
 
 from nab3.mixin import AppAutoScaleMixin, AutoScaleMixin, MetricMixin, SecurityGroupMixin
-from nab3.base import BaseService
+from nab3.base import BaseService, ServiceWrapper
+from nab3.utils import load_dependencies
 
 LOGGER = logging.getLogger('nab3')
 LOGGER.setLevel(logging.WARNING)
@@ -14,6 +16,7 @@ class ECSTask(BaseService):
     """
     boto3_client_name = 'ecs'
     key_prefix = 'task'
+    _primary_key = 'arn'
     _boto3_describe_def = dict(
         client_call="list_metrics",
         call_params=dict(
@@ -43,6 +46,8 @@ class ECSService(MetricMixin, AppAutoScaleMixin, BaseService):
     """
     boto3_client_name = 'ecs'
     key_prefix = 'service'
+    _tag_resource_type = 'ecs:service'
+    _primary_key = 'arn'
     _boto3_describe_def = dict(
         call_params=dict(
             cluster=dict(name='cluster', type=str),
@@ -60,7 +65,7 @@ class ECSService(MetricMixin, AppAutoScaleMixin, BaseService):
 
     def __init__(self, **kwargs):
         super(self._get_service_class('ecs_service'), self).__init__(**kwargs)
-        cluster_arn = kwargs.get('cluster_arn', None)
+        cluster_arn = kwargs.get('cluster_arn', kwargs.get('clusterArn'))
         if cluster_arn:
             self.cluster = cluster_arn.split('/')[-1]
             delattr(self, 'cluster_arn')
@@ -95,6 +100,7 @@ class ECSInstance(BaseService):
     """
     boto3_client_name = 'ecs'
     key_prefix = 'containerInstance'
+    _primary_key = 'arn'
     _boto3_describe_def = dict(
         call_params=dict(
             cluster=dict(name='cluster', type=str),
@@ -118,6 +124,8 @@ class ECSCluster(AutoScaleMixin, MetricMixin, SecurityGroupMixin, BaseService):
     """
     boto3_client_name = 'ecs'
     key_prefix = 'cluster'
+    _tag_resource_type = 'ecs:cluster'
+    _primary_key = 'name'
     _boto3_describe_def = dict(
         call_params=dict(
             name=dict(name='clusters', type=list),  # list<str>
@@ -127,56 +135,114 @@ class ECSCluster(AutoScaleMixin, MetricMixin, SecurityGroupMixin, BaseService):
 
     def __init__(self, **kwargs):
         self.create_service_field('asg', 'asg')
+        self.create_service_field('asgs', 'asg')
         self.create_service_field('instances', 'ecs_instance')
         self.create_service_field('services', 'ecs_service')
         super(self._get_service_class('ecs_cluster'), self).__init__(**kwargs)
 
     async def get_on_demand_monthly(self, currency='usd'):
-        if not self.asg.is_loaded():
-            await self.fetch('asg')
-
-        return await self.asg.get_on_demand_monthly(currency)
+        return await self.get_on_demand_hourly(currency) * 24 * 30
 
     async def get_on_demand_hourly(self, currency='usd'):
+        """The on demand cost of every ASG backing the cluster"""
         if not self.asg.is_loaded():
             await self.fetch('asg')
 
-        return await self.asg.get_on_demand_hourly(currency)
+        hourly = 0
+        for asg in self._pricing_asgs:
+            hourly += await asg.get_on_demand_hourly(currency)
+        return hourly
 
-    async def load_asg(self, force=False):
-        """Retrieves the instances asg.
+    @property
+    def _pricing_asgs(self) -> list:
+        return list(self.asgs.service) if self.asgs else [self.asg.service] if self.asg else []
 
-        stored as the instance attribute `obj.asg`
+    @property
+    def _pricing_lines(self) -> list:
+        # The instances of every ASG backing the cluster. See PricingMixin._pricing_lines
+        return [pricing_line for asg in self._pricing_asgs for pricing_line in asg._pricing_lines]
 
-        if self.scaling_policies.is_loaded():
-            return self.scaling_policies
+    @classmethod
+    async def bulk_load_asg(cls, cluster_list: list, force: bool = False):
+        """Retrieves the asg for every cluster in cluster_list together.
 
-        if not self.security_groups.is_loaded():
-            await self.fetch('security_groups')
+        Called by ServiceWrapper.fetch so a list of clusters resolves their ASGs in a few calls
+            rather than describe_auto_scaling_instances and describe_auto_scaling_groups per cluster.
 
-        filter_list = [sg.id for sg in self.security_groups]
-        if not filter_list:
-            return self.accessible_resources
+        :param cluster_list: list<ECSCluster>
+        :param force:
+        :return:
+        """
+        if force:
+            cluster_list = [cluster for cluster in cluster_list if cluster._claim_forced_load('asg')]
+        else:
+            cluster_list = [cluster for cluster in cluster_list if not cluster.asg.is_loaded()]
 
-        self.accessible_resources = await self.accessible_resources.service_class.list(Filters=[dict(
-            Name='ip-permission.group-id',
-            Values=filter_list
-        )])
+        await cls._resolve_asgs(cluster_list, force)
 
-        return self.accessible_resources
+    @classmethod
+    async def _resolve_asgs(cls, cluster_list: list, force: bool = False):
+        """Sets the asg and asgs attributes for each cluster in cluster_list.
+
+        Every container instance is resolved to its ASG, chunked across every cluster.
+        The ASGs are then described together.
+        A cluster may be backed by multiple ASGs, they are all stored in `obj.asgs`.
+            `obj.asg` is the ASG containing the most container instances.
+
+        :param cluster_list: list<ECSCluster>
+        :param force:
+        :return:
+        """
+        if not cluster_list:
+            return
+
+        clusters = ServiceWrapper(cls)
+        clusters.service = cluster_list
+        await clusters.fetch('instances', force=force)
+
+        asg_class = cluster_list[0].asg.service_class
+        instance_group_names = await asg_class.get_instance_group_names(
+            [instance.ec2_instance_id for cluster in cluster_list for instance in cluster.instances]
+        )
+
+        cluster_asg_names = {}
+        asg_map = {}
+        for cluster in cluster_list:
+            asg_names = Counter(
+                instance_group_names[instance.ec2_instance_id] for instance in cluster.instances
+                if instance.ec2_instance_id in instance_group_names
+            )
+            cluster_asg_names[cluster.name] = [asg_name for asg_name, _ in asg_names.most_common()]
+            for asg_name in asg_names:
+                if asg_name not in asg_map:
+                    asg_map[asg_name] = asg_class._register(asg_class(name=asg_name))
+
+            if len(asg_names) > 1:
+                LOGGER.warning(f'{cluster.name} contains instances from multiple ASGs: {", ".join(asg_names)}')
+
+        asgs = ServiceWrapper(asg_class)
+        asgs.service = list(asg_map.values())
+        await asgs.load(force=force)
+
+        for cluster in cluster_list:
+            asg_names = cluster_asg_names[cluster.name]
+            cluster.asgs = [asg_map[asg_name] for asg_name in asg_names]
+            if asg_names:
+                cluster.asg = asg_map[asg_names[0]]
+
+    @load_dependencies('instances')
+    async def load_asg(self, force=False):
+        """Retrieves the asg the cluster's instances belong to.
+
+        stored as the instance attribute `obj.asg`
+        If the cluster is backed by multiple ASGs, all of them are stored as the instance attribute `obj.asgs`
 
         :return: ASG
         """
         if self.asg.is_loaded() and not force:
             return self.asg
 
-        await self.fetch('instances', force=force)
-
-        container_instances = [instance for instance in self.instances]
-        if len(container_instances) > 0:
-            container_instance = container_instances[0]
-            self.asg = await self.asg.get(instance_id=container_instance.ec2_instance_id)
-
+        await self._resolve_asgs([self], force)
         return self.asg
 
     async def load_instances(self, force=False):
@@ -191,6 +257,7 @@ class ECSCluster(AutoScaleMixin, MetricMixin, SecurityGroupMixin, BaseService):
         self.instances = await self.instances.list(cluster=self.name)
         return self.instances
 
+    @load_dependencies('asg')
     async def load_security_groups(self, force=False):
         if self.security_groups.is_loaded() and not force:
             return self.security_groups
@@ -218,6 +285,7 @@ class ECSCluster(AutoScaleMixin, MetricMixin, SecurityGroupMixin, BaseService):
 
         return self.services
 
+    @load_dependencies('asg')
     async def load_scaling_policies(self, force=False):
         """Retrieves the cluster's scaling policies.
 
@@ -1,7 +1,10 @@
 import logging
+from collections import defaultdict
+from datetime import datetime as dt, timedelta
+from itertools import chain
 
 from nab3.mixin import MetricMixin, SecurityGroupMixin
-from nab3.base import PaginatedBaseService
+from nab3.base import BaseService, PaginatedBaseService, ServiceWrapper
 from nab3.utils import snake_to_camelcap
 
 LOGGER = logging.getLogger('nab3')
@@ -14,6 +17,7 @@ class ElasticacheCluster(MetricMixin, SecurityGroupMixin, PaginatedBaseService):
     """
     boto3_client_name = 'elasticache'
     key_prefix = 'Cache'
+    _tag_resource_type = 'elasticache:cluster'
     _to_boto3_case = snake_to_camelcap
     _boto3_describe_def = dict(
         client_call='describe_cache_clusters',
@@ -23,11 +27,117 @@ class ElasticacheCluster(MetricMixin, SecurityGroupMixin, PaginatedBaseService):
         ),
         response_key='CacheClusters'
     )
-    _response_alias = dict(nodes='elasticache_node')
+    _response_alias = dict(nodes='elasticache_cache_node')
     _boto3_response_override = dict(CacheClusterId='id',
                                     CacheClusterCreateTime='create_time',
                                     CacheClusterStatus='status')
 
+    def __init__(self, **kwargs):
+        self.create_service_field('nodes', 'elasticache_cache_node')
+        self.create_service_field('replication_group', 'elasticache_replication_group')
+        self.create_service_field('reserved_nodes', 'elasticache_node')
+        super(self._get_service_class('elasticache_cluster'), self).__init__(**kwargs)
+        # Nodes are only described as part of their cluster so they are loaded along with it
+        for node in self.nodes:
+            node.cluster_id = self.id
+            node._loaded = True
+
+    @classmethod
+    async def _bulk_load(cls, service_list: list, force: bool = False) -> list:
+        """describe_cache_clusters only accepts a single CacheClusterId
+            so lists of clusters are described using a single paginated scan of every cluster.
+
+        :param service_list: list<cls()>
+        :param force: bool default False. If true, instances that are already loaded will be re-pulled from AWS
+        :return: service_list
+        """
+        if len({cluster.id for cluster in service_list if force or not cluster._loaded}) <= 1:
+            return await super(cls, cls)._bulk_load(service_list, force)
+
+        id_map = defaultdict(list)
+        for cluster in service_list:
+            if not cluster._loaded or (force and cluster._claim_forced_load()):
+                id_map[cluster.id].append(cluster)
+
+        for loaded_cluster in await cls.list():
+            for cluster in id_map.pop(loaded_cluster.id, []):
+                if cluster is not loaded_cluster.service:
+                    cluster._update(loaded_cluster.service)
+
+        # Match the behavior of load for anything that wasn't in the response
+        for cluster in chain.from_iterable(id_map.values()):
+            cluster._loaded = True
+
+        return service_list
+
+    @classmethod
+    async def inventory(cls,
+                        metric_names: list = None,
+                        statistics: list = ['Average', 'Maximum'],
+                        start_time: dt = None,
+                        end_time: dt = None,
+                        interval_as_seconds: int = 300) -> ServiceWrapper:
+        """Retrieves every cache cluster along with its cache nodes, replication group and matching reserved nodes.
+
+        Calls:
+            describe_cache_clusters (ShowCacheNodeInfo) 100 clusters per page
+            describe_replication_groups 100 per page
+            describe_reserved_cache_nodes 100 per page
+            get_metric_data for the metric_names of every cache node, 500 series per call
+        Replication groups and reserved nodes are joined to the clusters in memory.
+            cluster.replication_group: The cluster's replication group
+            cluster.reserved_nodes: The active reserved nodes for the cluster's node type and engine
+                Reservations aren't assigned to a cluster so this is an approximation,
+                a reservation is matched to every cluster with the same node type and engine.
+            node.stats_list: list<list<Metric>> for each of metric_names, if provided
+
+        :param metric_names: The per node metrics to retrieve e.g. ['CPUUtilization', 'CurrConnections']
+        :param statistics:
+        :param start_time: Defaults to 3 hours ago
+        :param end_time: Defaults to now
+        :param interval_as_seconds:
+        :return: ServiceWrapper(list<ElasticacheCluster>)
+        """
+        clusters, replication_groups, reserved_nodes = await cls._client.scheduler.gather(
+            cls.list(),
+            cls._get_client_service_class(cls._client, 'elasticache_replication_group').list(),
+            cls._get_client_service_class(cls._client, 'elasticache_node').list()
+        )
+
+        replication_groups = {replication_group.id: replication_group.service
+                              for replication_group in replication_groups}
+        # Reserved nodes aren't assigned to a cluster, they apply to any node of the same type and engine
+        reserved_node_map = {}
+        for reserved_node in reserved_nodes:
+            if getattr(reserved_node, 'state', None) != 'active':
+                continue
+            reserved_node_key = (reserved_node.type, str(reserved_node.product_description).lower())
+            reserved_node_map.setdefault(reserved_node_key, []).append(reserved_node.service)
+
+        for cluster in clusters:
+            cluster = cluster.service
+            replication_group = replication_groups.get(getattr(cluster, 'replication_group_id', None))
+            if replication_group:
+                cluster.replication_group = replication_group
+            cluster.reserved_nodes = reserved_node_map.get(
+                (getattr(cluster, 'node_type', None), str(getattr(cluster, 'engine', None)).lower()), []
+            )
+
+        if metric_names:
+            nodes = [node.service for cluster in clusters for node in cluster.nodes]
+            metric_queries = [
+                node.metric_query(metric_name, statistics, interval_as_seconds)
+                for node in nodes for metric_name in metric_names
+            ]
+            end_time = end_time or dt.utcnow()
+            start_time = start_time or end_time - timedelta(hours=3)
+            metric_class = cls._get_client_service_class(cls._client, 'metric')
+            metrics = await metric_class.get_metric_data(metric_queries, start_time, end_time)
+            for pos, node in enumerate(nodes):
+                node.stats_list = metrics[pos * len(metric_names):(pos + 1) * len(metric_names)]
+
+        return clusters
+
     @property
     def _stat_dimensions(self) -> list:
         return [dict(Name='CacheClusterId', Value=self.id)]
@@ -37,6 +147,55 @@ class ElasticacheCluster(MetricMixin, SecurityGroupMixin, PaginatedBaseService):
         return 'AWS/ElastiCache'
 
 
+class ElasticacheCacheNode(MetricMixin, BaseService):
+    """
+    A cache node of an ElasticacheCluster, set from the CacheNodes of the describe_cache_clusters response
+    boto3.amazonaws.com/v1/documentation/api/latest/reference/services/elasticache.html#ElastiCache.Client.describe_cache_clusters
+    """
+    boto3_client_name = 'elasticache'
+    key_prefix = 'CacheNode'
+    _primary_key = None  # Node ids are only unique within a cluster e.g. 0001
+    _to_boto3_case = snake_to_camelcap
+    _boto3_response_override = dict(CacheNodeId='id', CacheNodeCreateTime='create_time', CacheNodeStatus='status')
+
+    @classmethod
+    async def get(cls, **kwargs):
+        raise NotImplementedError("get is not a supported operation for ElasticacheCacheNode, use ElasticacheCluster.nodes")
+
+    @classmethod
+    async def list(cls, **kwargs):
+        raise NotImplementedError("list is not a supported operation for ElasticacheCacheNode, use ElasticacheCluster.nodes")
+
+    async def load(self, **kwargs):
+        # Nodes are set from the cluster's describe response, there is nothing else to retrieve
+        return self
+
+    @property
+    def _stat_dimensions(self) -> list:
+        return [dict(Name='CacheClusterId', Value=self.cluster_id), dict(Name='CacheNodeId', Value=self.id)]
+
+    @property
+    def _stat_name(self) -> str:
+        return 'AWS/ElastiCache'
+
+
+class ElasticacheReplicationGroup(PaginatedBaseService):
+    """
+    boto3.amazonaws.com/v1/documentation/api/latest/reference/services/elasticache.html#ElastiCache.Client.describe_replication_groups
+    """
+    boto3_client_name = 'elasticache'
+    key_prefix = 'ReplicationGroup'
+    _to_boto3_case = snake_to_camelcap
+    _boto3_describe_def = dict(
+        client_call='describe_replication_groups',
+        call_params=dict(
+            id=dict(name='ReplicationGroupId', type=str)
+        ),
+        response_key='ReplicationGroups'
+    )
+    _boto3_response_override = dict(ReplicationGroupId='id')
+
+
 class ElasticacheNode(PaginatedBaseService):
     """
     boto3.amazonaws.com/v1/documentation/api/latest/reference/services/elasticache.html#ElastiCache.Client.describe_reserved_cache_nodes
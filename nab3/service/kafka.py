@@ -1,9 +1,10 @@
-import asyncio
 import logging
+from datetime import datetime as dt, timedelta, timezone
 
 from nab3.mixin import MetricMixin
 from nab3.base import BaseService, PaginatedBaseService, ServiceWrapper
-from nab3.utils import paginated_search, snake_to_camelcap
+from nab3.metric_store import _to_epoch
+from nab3.utils import camel_to_snake, paginate, paginated_search, snake_to_camelcap
 
 LOGGER = logging.getLogger('nab3')
 LOGGER.setLevel(logging.WARNING)
@@ -16,6 +17,8 @@ class KafkaCluster(MetricMixin, BaseService):
     """
     boto3_client_name = 'kafka'
     key_prefix = 'Cluster'
+    _tag_resource_type = 'kafka:cluster'
+    _primary_key = 'arn'
     _to_boto3_case = snake_to_camelcap
     _boto3_describe_def = dict(
         client_call='describe_cluster',
@@ -45,17 +48,100 @@ class KafkaCluster(MetricMixin, BaseService):
         resp = getattr(self, 'topics', None)
         if resp:
             return resp
-        elif not self.brokers.is_loaded():
-            await self.fetch('brokers')
 
+        # The per topic metrics of every broker include the cluster name dimension
         topics = set()
-        broker_topics = await asyncio.gather(*[broker.get_topics() for broker in self.brokers])
-        for topic in broker_topics:
-            topics.update(topic)
+        metrics = await self.get_available_metrics()
+        for metric in metrics:
+            topics.update(dimension['value'] for dimension in metric.dimensions if dimension['name'] == 'Topic')
 
         self.topics = list(topics)
         return self.topics
 
+    async def topic_matrix(self,
+                           metric_names: list = ['BytesInPerSec', 'BytesOutPerSec'],
+                           start_time: dt = None,
+                           end_time: dt = None,
+                           interval_as_seconds: int = 300,
+                           statistic: str = 'Average') -> dict:
+        """Retrieves the per topic per broker metrics of the cluster as dense arrays indexed [broker, topic, time].
+
+        The brokers, topics and the series that exist are discovered from the namespace index (1 list_metrics scan)
+            and every series is retrieved together using Metric.get_metric_data (500 series per call).
+        Missing datapoints and broker/topic combinations without a series are NaN.
+        Requires numpy e.g. pip install nab3[analysis]
+
+        NOTE: this only works if EnhancedMonitoring was set to PER_TOPIC_PER_BROKER when the cluster was created
+
+        Example:
+            matrix = await kafka_cluster.topic_matrix(['BytesInPerSec'], start_time, end_time)
+            bytes_in = matrix['metrics']['BytesInPerSec']
+            broker_share = numpy.nansum(bytes_in, axis=(1, 2)) / numpy.nansum(bytes_in)
+
+        :param metric_names: The per topic metrics e.g. BytesInPerSec, BytesOutPerSec, MessagesInPerSec
+        :param start_time: Defaults to 3 hours ago
+        :param end_time: Defaults to now
+        :param interval_as_seconds:
+        :param statistic: e.g. Average, Sum, Maximum, p99
+        :return: dict(
+            brokers=list<str>, topics=list<str>, timestamps=list<datetime>,
+            metrics=dict<str, numpy.ndarray(shape=(len(brokers), len(topics), len(timestamps)))>
+        )
+        """
+        try:
+            import numpy
+        except ImportError:
+            raise ImportError('numpy is required for KafkaCluster.topic_matrix e.g. pip install nab3[analysis]')
+
+        end_time = end_time or dt.utcnow()
+        start_time = start_time or end_time - timedelta(hours=3)
+
+        # tuple(metric name, broker, topic) for every series of the cluster
+        series = []
+        for metric in await self.get_available_metrics():
+            if metric.name not in metric_names:
+                continue
+            dimensions = {dimension['name']: dimension['value'] for dimension in metric.dimensions}
+            if 'Topic' in dimensions and 'Broker ID' in dimensions and len(dimensions) == 3:
+                series.append((metric.name, dimensions['Broker ID'], dimensions['Topic']))
+
+        brokers = sorted(set(broker for _, broker, _ in series), key=lambda broker: (len(broker), broker))
+        topics = sorted(set(topic for _, _, topic in series))
+
+        start = _to_epoch(start_time) // interval_as_seconds * interval_as_seconds
+        timestamps = list(range(start, _to_epoch(end_time), interval_as_seconds)) if series else []
+        metrics = {
+            metric_name: numpy.full((len(brokers), len(topics), len(timestamps)), numpy.nan)
+            for metric_name in metric_names
+        }
+        if not series:
+            return dict(brokers=brokers, topics=topics, timestamps=timestamps, metrics=metrics)
+
+        metric_queries = [
+            dict(namespace=self._stat_name,
+                 metric_name=metric_name,
+                 dimensions=self._stat_dimensions + [dict(Name='Broker ID', Value=broker), dict(Name='Topic', Value=topic)],
+                 statistics=[statistic],
+                 interval_as_seconds=interval_as_seconds)
+            for metric_name, broker, topic in series
+        ]
+        results = await self._get_service_class('metric').get_metric_data(metric_queries, start_time, end_time)
+
+        broker_pos = {broker: pos for pos, broker in enumerate(brokers)}
+        topic_pos = {topic: pos for pos, topic in enumerate(topics)}
+        stat_attr = camel_to_snake(statistic)
+        for (metric_name, broker, topic), datapoints in zip(series, results):
+            values = metrics[metric_name][broker_pos[broker], topic_pos[topic]]
+            for datapoint in datapoints:
+                time_pos = (_to_epoch(datapoint.timestamp) - start) // interval_as_seconds
+                if 0 <= time_pos < len(timestamps):
+                    values[time_pos] = getattr(datapoint, stat_attr)
+
+        return dict(brokers=brokers,
+                    topics=topics,
+                    timestamps=[dt.fromtimestamp(timestamp, tz=timezone.utc) for timestamp in timestamps],
+                    metrics=metrics)
+
     async def load_brokers(self, force=False):
         """Retrieves the cluster's brokers.
 
@@ -73,11 +159,12 @@ class KafkaCluster(MetricMixin, BaseService):
         return self.brokers
 
     @classmethod
-    async def list(cls, fnc_name=None, response_key=None, **kwargs) -> ServiceWrapper:
+    async def list(cls, fnc_name=None, response_key=None, limit: int = None, **kwargs) -> ServiceWrapper:
         """Returns an instance for each object
 
         :param fnc_name:
         :param response_key:
+        :param limit: Return at most this many objects. Pagination stops as soon as the limit is reached.
         :param kwargs:
         :return: list<cls()>
         """
@@ -110,11 +197,24 @@ class KafkaCluster(MetricMixin, BaseService):
         kwargs = {cls._to_boto3_case(k): v for k, v in kwargs.items()}
         client = cls._client.get(cls.boto3_client_name)
         boto3_fnc = getattr(client, fnc_name)
-        response = paginated_search(boto3_fnc, kwargs, response_key)
-        resp.service = [cls(_loaded=True, **obj) for obj in response]
+        response = paginated_search(boto3_fnc, kwargs, response_key, max_results=limit)
+        resp.service = [cls._register(cls(_loaded=True, **obj)) for obj in response]
 
         return resp
 
+    @classmethod
+    async def _iter_list(cls, **kwargs):
+        """Yields the instances for each page of the list_clusters operation
+
+        :param kwargs:
+        :return: async_generator<list<cls()>>
+        """
+        list_kwargs = {cls._to_boto3_case(k): v for k, v in kwargs.get('list_kwargs', {}).items()}
+        client = cls._client.get(cls.boto3_client_name)
+        boto3_fnc = getattr(client, cls._boto3_list_def['client_call'])
+        for page in paginate(boto3_fnc, list_kwargs, cls._boto3_list_def['response_key']):
+            yield [cls(_loaded=True, **obj) for obj in page]
+
     @property
     def _stat_dimensions(self) -> list:
         return [dict(Name='Cluster Name', Value=self.name)]
@@ -130,6 +230,7 @@ class KafkaBroker(MetricMixin, PaginatedBaseService):
     """
     boto3_client_name = 'kafka'
     key_prefix = 'Node'
+    _primary_key = None  # Broker ids are only unique within a cluster
     _to_boto3_case = snake_to_camelcap
     _boto3_describe_def = dict(
         client_call='list_nodes',
@@ -170,7 +271,8 @@ class KafkaBroker(MetricMixin, PaginatedBaseService):
 
     @property
     def _stat_dimensions(self) -> list:
-        return [dict(Name='Cluster Name', Value=self.cluster), dict(Name='Broker ID', Value=str(self.id))]
+        # list_nodes returns the broker id as a float e.g. 1.0 but the dimension value is 1
+        return [dict(Name='Cluster Name', Value=self.cluster), dict(Name='Broker ID', Value=str(int(self.id)))]
 
     @property
     def _stat_name(self) -> str:
@@ -1,7 +1,7 @@
 import logging
 
 from nab3.mixin import MetricMixin, SecurityGroupMixin
-from nab3.base import PaginatedBaseService
+from nab3.base import PaginatedBaseService, ServiceWrapper
 
 LOGGER = logging.getLogger('nab3')
 LOGGER.setLevel(logging.WARNING)
@@ -13,6 +13,8 @@ class TargetGroup(PaginatedBaseService):
     """
     boto3_client_name = 'elbv2'
     key_prefix = 'TargetGroup'
+    _tag_resource_type = 'elasticloadbalancing:targetgroup'
+    _primary_key = 'arn'
     _boto3_describe_def = dict(
         call_params=dict(
             load_balancer=dict(name='LoadBalancerArn', type=str),
@@ -21,6 +23,60 @@ class TargetGroup(PaginatedBaseService):
         )
     )
 
+    def __init__(self, **kwargs):
+        self.create_service_field('load_balancers', 'load_balancer')
+        super(self._get_service_class('target_group'), self).__init__(**kwargs)
+
+    @classmethod
+    async def bulk_load_targets(cls, target_group_list: list, force: bool = False):
+        """Retrieves the target health of every target group in target_group_list concurrently.
+
+        describe_target_health only accepts a single target group
+            so the calls are ran concurrently within the session's elbv2 limit.
+
+        :param target_group_list: list<TargetGroup>
+        :param force:
+        :return:
+        """
+        if force:
+            target_group_list = [tg for tg in target_group_list if tg._claim_forced_load('targets')]
+        else:
+            target_group_list = [tg for tg in target_group_list if tg.__dict__.get('targets') is None]
+
+        await cls._client.scheduler.gather(
+            *[tg._load_targets() for tg in target_group_list], service_name=cls.boto3_client_name
+        )
+
+    async def _load_targets(self):
+        response = self.client.describe_target_health(TargetGroupArn=self.arn)
+        targets = []
+        for target_health in response.get('TargetHealthDescriptions', []):
+            target_health = self._recursive_normalizer(target_health)
+            target = target_health.get('target', {})
+            health = target_health.get('target_health', {})
+            targets.append(dict(id=target.get('id'),
+                                port=target.get('port'),
+                                availability_zone=target.get('availability_zone'),
+                                health_check_port=target_health.get('health_check_port'),
+                                state=health.get('state'),
+                                reason=health.get('reason'),
+                                description=health.get('description')))
+
+        self.targets = targets
+
+    async def load_targets(self, force=False):
+        """Retrieves the health of each of the target group's registered targets.
+
+        stored as the instance attribute `obj.targets`
+
+        :return: list<dict(id, port, availability_zone, health_check_port, state, reason, description)>
+        """
+        if self.__dict__.get('targets') is not None and not force:
+            return self.targets
+
+        await self._load_targets()
+        return self.targets
+
 
 class LoadBalancer(MetricMixin, SecurityGroupMixin, PaginatedBaseService):
     """
@@ -28,6 +84,9 @@ class LoadBalancer(MetricMixin, SecurityGroupMixin, PaginatedBaseService):
     """
     boto3_client_name = 'elbv2'
     key_prefix = 'LoadBalancer'
+    _tag_resource_type = 'elasticloadbalancing:loadbalancer'
+    _config_resource_type = 'AWS::ElasticLoadBalancingV2::LoadBalancer'
+    _primary_key = 'arn'
     _boto3_describe_def = dict(
         call_params=dict(
             arn=dict(name='LoadBalancerArns', type=list),  # list<str>
@@ -36,6 +95,113 @@ class LoadBalancer(MetricMixin, SecurityGroupMixin, PaginatedBaseService):
     )
     _boto3_response_override = dict(DNSName='dns_name')
 
+    def __init__(self, **kwargs):
+        self.create_service_field('target_groups', 'target_group')
+        super(self._get_service_class('load_balancer'), self).__init__(**kwargs)
+
+    @classmethod
+    async def bulk_load_target_groups(cls, load_balancer_list: list, force: bool = False):
+        """Retrieves the target groups of every load balancer in load_balancer_list together.
+
+        describe_target_groups only accepts a single LoadBalancerArn
+            so every target group is retrieved using a single paginated scan, 400 per page,
+            and attached to the load balancers it belongs to.
+
+        :param load_balancer_list: list<LoadBalancer>
+        :param force:
+        :return:
+        """
+        if force:
+            load_balancer_list = [lb for lb in load_balancer_list if lb._claim_forced_load('target_groups')]
+        else:
+            load_balancer_list = [lb for lb in load_balancer_list if not lb.target_groups.is_loaded()]
+
+        if len(load_balancer_list) <= 1:
+            for load_balancer in load_balancer_list:
+                await load_balancer._load_target_groups()
+            return
+
+        target_group_map = {}
+        for target_group in await load_balancer_list[0].target_groups.list():
+            for load_balancer in target_group.load_balancers.service or []:
+                target_group_map.setdefault(load_balancer.arn, []).append(target_group.service)
+
+        for load_balancer in load_balancer_list:
+            load_balancer.target_groups = target_group_map.get(load_balancer.arn, [])
+
+    async def _load_target_groups(self):
+        self.target_groups = await self.target_groups.list(load_balancer=self.arn)
+
+    async def load_target_groups(self, force=False):
+        """Retrieves the load balancer's target groups.
+
+        stored as the instance attribute `obj.target_groups`
+
+        :return: list<TargetGroup>
+        """
+        if self.target_groups.is_loaded() and not force:
+            return self.target_groups
+
+        await self._load_target_groups()
+        return self.target_groups
+
+    @classmethod
+    async def target_index(cls, load_balancer_list=None, force: bool = False) -> dict:
+        """Maps each registered target, an instance id, IP or lambda ARN, to what routes to it along with its health.
+
+        The target groups of every load balancer are retrieved together
+            and the target health of each target group is retrieved concurrently.
+
+        Example:
+            index = await AWS.load_balancer.target_index()
+            for target_id, target in index.items():
+                unhealthy = [health for health in target['health'] if health['state'] != 'healthy']
+
+        :param load_balancer_list: Defaults to every load balancer
+        :param force: bool default False. If true, the target groups and their health will be re-pulled from AWS
+        :return: dict<target id, dict(
+            target_groups=list<TargetGroup>,
+            load_balancers=list<LoadBalancer>,
+            health=list<dict(target_group, port, state, reason, description)>
+        )>
+        """
+        load_balancers = ServiceWrapper(cls)
+        if load_balancer_list is None:
+            load_balancers = await cls.list()
+        else:
+            load_balancers.service = [lb.service if isinstance(lb, ServiceWrapper) else lb
+                                      for lb in load_balancer_list]
+
+        if not load_balancers.service:
+            return {}
+
+        await load_balancers.fetch('target_groups__targets', force=force)
+
+        target_groups = {}
+        target_group_lbs = {}
+        for load_balancer in load_balancers.service:
+            for target_group in load_balancer.target_groups.service or []:
+                target_groups[target_group.arn] = target_group
+                target_group_lbs.setdefault(target_group.arn, {})[load_balancer.arn] = load_balancer
+
+        index = {}
+        for target_group_arn, target_group in target_groups.items():
+            for target in target_group.targets:
+                entry = index.setdefault(target['id'], dict(target_groups={}, load_balancers={}, health=[]))
+                entry['target_groups'][target_group_arn] = target_group
+                entry['load_balancers'].update(target_group_lbs[target_group_arn])
+                entry['health'].append(dict(target_group=target_group_arn,
+                                            port=target['port'],
+                                            state=target['state'],
+                                            reason=target['reason'],
+                                            description=target['description']))
+
+        for entry in index.values():
+            entry['target_groups'] = list(entry['target_groups'].values())
+            entry['load_balancers'] = list(entry['load_balancers'].values())
+
+        return index
+
     @property
     def _stat_dimensions(self) -> list:
         stat_id = self.arn.split(':loadbalancer/')[-1]
@@ -52,6 +218,8 @@ class LoadBalancerClassic(MetricMixin, SecurityGroupMixin, PaginatedBaseService)
     """
     boto3_client_name = 'elb'
     key_prefix = 'LoadBalancer'
+    _config_resource_type = 'AWS::ElasticLoadBalancing::LoadBalancer'
+    _primary_key = 'name'
     _boto3_describe_def = dict(
         client_call='describe_load_balancers',
         call_params=dict(
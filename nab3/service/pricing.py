@@ -1,15 +1,174 @@
 import json
 import logging
+import os
+import time
+from datetime import timedelta
 
 from nab3.base import PaginatedBaseService
 
 from nab3.utils import (
-    camel_to_snake, paginated_search, snake_to_camelcap
+    camel_to_snake, paginate, snake_to_camelcap, PRICING_REGION_MAP
 )
 
 LOGGER = logging.getLogger('nab3')
 LOGGER.setLevel(logging.WARNING)
 
+PRICING_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.nab3', 'pricing')
+
+
+def parse_price_document(document, keep_raw: bool = False) -> dict:
+    """Extracts the attributes and the on demand price dimensions from a price list document.
+
+    Reserved terms and the rest of the document are skipped rather than normalized into nested objects.
+
+    :param document: str|dict A get_products PriceList entry
+    :param keep_raw: Include the full document as document
+    :return: dict(attributes=dict, price_dimensions=list<dict(unit=str, price_per_unit=dict<str, float>, ...)>)
+    """
+    if isinstance(document, str):
+        document = json.loads(document)
+
+    product = document['product']
+    attributes = {k: {'Yes': True, 'No': False}.get(v, v) for k, v in product.get('attributes', {}).items()}
+    if product.get('productFamily'):
+        attributes['productFamily'] = product['productFamily']
+
+    price_dimensions = []
+    for term in document.get('terms', {}).get('OnDemand', {}).values():
+        for dimension in term.get('priceDimensions', {}).values():
+            price_dimensions.append(dict(
+                unit=dimension.get('unit'),
+                price_per_unit={currency.lower(): float(price) for currency, price in dimension['pricePerUnit'].items()},
+                begin_range=dimension.get('beginRange'),
+                end_range=dimension.get('endRange'),
+                description=dimension.get('description')
+            ))
+
+    parsed = dict(attributes=attributes, price_dimensions=price_dimensions)
+    if keep_raw:
+        parsed['document'] = document
+    return parsed
+
+
+class PricingCatalog:
+    """An in memory index of the on demand price of every product for a service code and location.
+
+    Products are indexed by PricingCatalog.INDEX_FIELDS so a price lookup is a dict lookup
+        rather than a get_products call per service object.
+    Only the product attributes and the on demand price dimensions are kept. See parse_price_document
+
+    A catalog is populated using Pricing.load_catalog (get_products) or Pricing.import_offer_file
+        (a downloaded offer file e.g. pricing.us-east-1.amazonaws.com/offers/v1.0/aws/AmazonEC2/current/us-east-1/index.json)
+    """
+    INDEX_FIELDS = ('instanceType', 'operatingSystem', 'tenancy', 'location')
+    # service code -> The attribute values every product in the catalog has. Products that don't match are skipped.
+    CATALOG_FILTERS = dict(
+        AmazonEC2=dict(capacitystatus='Used', preInstalledSw='NA', productFamily='Compute Instance'),
+    )
+
+    def __init__(self):
+        self._index = {}
+        self._locations = {}  # tuple(service_code, location) -> epoch the location was loaded
+
+    @staticmethod
+    def _key(service_code: str, values: dict) -> tuple:
+        # get_products TERM_MATCH is case insensitive e.g. tenancy=shared matches Shared
+        return (service_code,) + tuple(str(values.get(field, '')).lower() for field in PricingCatalog.INDEX_FIELDS)
+
+    def is_loaded(self, service_code: str, location: str) -> bool:
+        return (service_code, location) in self._locations
+
+    def add(self, service_code: str, product: dict) -> bool:
+        """Adds a product to the catalog if it matches the service code's CATALOG_FILTERS.
+
+        If more than 1 product has the same key the first one is kept, the same as PricingMixin.load_pricing
+
+        :param service_code: e.g. AmazonEC2
+        :param product: dict(attributes=dict, price_dimensions=list) See parse_price_document
+        :return: bool True if the product was added
+        """
+        attributes = product['attributes']
+        catalog_filters = self.CATALOG_FILTERS.get(service_code, {})
+        if not product['price_dimensions'] \
+                or any(attributes.get(field) != value for field, value in catalog_filters.items()):
+            return False
+
+        self._index.setdefault(self._key(service_code, attributes),
+                               dict(attributes=attributes, price_dimensions=product['price_dimensions']))
+        return True
+
+    def mark_loaded(self, service_code: str, location: str, loaded_at: float = None):
+        self._locations[(service_code, location)] = loaded_at or time.time()
+
+    def lookup(self, service_code: str, filters: list) -> dict:
+        """Returns the catalog entry for the get_products params of a service object. See PricingMixin._pricing_params
+
+        :param service_code: e.g. AmazonEC2
+        :param filters: list(dict(Field=str, Value=str, Type=str))
+        :return: dict(attributes=dict, price_dimensions=list) None if the catalog can't answer the filters
+        """
+        values = {search_filter['Field']: search_filter['Value'] for search_filter in filters}
+        if not self.is_loaded(service_code, values.get('location')):
+            return None
+
+        # Filters that aren't indexed must match the values every product in the catalog has
+        catalog_filters = {k.lower(): str(v).lower() for k, v in self.CATALOG_FILTERS.get(service_code, {}).items()}
+        for field, value in values.items():
+            if field not in self.INDEX_FIELDS and catalog_filters.get(field.lower()) != str(value).lower():
+                return None
+
+        return self._index.get(self._key(service_code, values))
+
+    def save(self, path: str, service_code: str, location: str):
+        """Writes the products of the service code and location to path as json"""
+        products = [entry for key, entry in self._index.items()
+                    if key[0] == service_code and entry['attributes'].get('location') == location]
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w') as catalog_file:
+            json.dump(dict(service_code=service_code,
+                           location=location,
+                           loaded_at=self._locations.get((service_code, location), time.time()),
+                           products=products), catalog_file)
+
+    def load(self, path: str) -> dict:
+        """Reads a catalog written by PricingCatalog.save
+
+        :param path:
+        :return: dict(service_code=str, location=str, loaded_at=float)
+        """
+        with open(path) as catalog_file:
+            catalog = json.load(catalog_file)
+
+        for product in catalog['products']:
+            self.add(catalog['service_code'], product)
+        self.mark_loaded(catalog['service_code'], catalog['location'], catalog['loaded_at'])
+        return dict(service_code=catalog['service_code'], location=catalog['location'], loaded_at=catalog['loaded_at'])
+
+    def import_offer_file(self, path: str) -> int:
+        """Adds the products of an AWS price list offer file (json) to the catalog.
+
+        Every location in the file is marked as loaded.
+
+        :param path:
+        :return: int The number of products added
+        """
+        with open(path) as offer_file:
+            offer = json.load(offer_file)
+
+        service_code = offer['offerCode']
+        on_demand_terms = offer.get('terms', {}).get('OnDemand', {})
+        locations = set()
+        added = 0
+        for sku, product in offer.get('products', {}).items():
+            product = parse_price_document(dict(product=product, terms=dict(OnDemand=on_demand_terms.get(sku, {}))))
+            if self.add(service_code, product):
+                added += 1
+                locations.add(product['attributes'].get('location'))
+
+        for location in locations:
+            self.mark_loaded(service_code, location)
+        return added
+
 
 class Pricing(PaginatedBaseService):
     """
@@ -17,6 +176,7 @@ class Pricing(PaginatedBaseService):
     """
     boto3_client_name = 'pricing'
     key_prefix = 'product'
+    _primary_key = None
     _to_boto3_case = snake_to_camelcap
     _boto3_describe_def = dict(
         client_call='get_products',
@@ -27,38 +187,153 @@ class Pricing(PaginatedBaseService):
         response_key='PriceList'
     )
 
+    # The session's PricingCatalog, see Pricing.get_catalog
+    _catalog = None
+
+    def __init__(self, **kwargs):
+        # Set directly, the price dimensions are plain dicts and the raw document isn't normalized
+        self.price_dimensions = kwargs.pop('price_dimensions', [])
+        document = kwargs.pop('document', None)
+        if document is not None:
+            self.document = document
+
+        super(self._get_service_class('pricing'), self).__init__(**kwargs)
+
+    @classmethod
+    def get_catalog(cls) -> PricingCatalog:
+        if cls._catalog is None:
+            cls._catalog = PricingCatalog()
+        return cls._catalog
+
+    @classmethod
+    def from_catalog(cls, entry: dict):
+        """Creates the instance for a parsed price document or a PricingCatalog entry"""
+        return cls(_loaded=True,
+                   price_dimensions=entry['price_dimensions'],
+                   document=entry.get('document'),
+                   **entry['attributes'])
+
+    @classmethod
+    async def load_catalog(cls,
+                           service_code: str = 'AmazonEC2',
+                           region: str = None,
+                           path: str = None,
+                           max_age: timedelta = timedelta(days=7),
+                           force: bool = False) -> PricingCatalog:
+        """Retrieves every product for the service code in the region once and indexes them in the session's catalog.
+
+        This is opt-in. Once loaded, PricingMixin.load_pricing, get_on_demand_hourly and get_on_demand_monthly
+            are answered from memory for every service object in the region.
+
+        The catalog is persisted to path and reused while it is younger than max_age.
+
+        :param service_code: e.g. AmazonEC2
+        :param region: Defaults to the session's region
+        :param path: Defaults to ~/.nab3/pricing/{service_code}-{region}.json
+        :param max_age: Retrieve the products again once the persisted catalog is older than this
+        :param force: Retrieve the products even if the catalog is loaded or the persisted catalog is current
+        :return: PricingCatalog
+        """
+        region = region or cls._client.region
+        location = PRICING_REGION_MAP[region]
+        path = path or os.path.join(PRICING_CACHE_DIR, f'{service_code}-{region}.json')
+        catalog = cls.get_catalog()
+
+        if not force:
+            if catalog.is_loaded(service_code, location):
+                return catalog
+            elif os.path.exists(path) and time.time() - os.path.getmtime(path) < max_age.total_seconds():
+                catalog.load(path)
+                return catalog
+
+        filters = [dict(Type='TERM_MATCH', Field='location', Value=location)] + [
+            dict(Type='TERM_MATCH', Field=field, Value=value)
+            for field, value in PricingCatalog.CATALOG_FILTERS.get(service_code, {}).items()
+        ]
+        search_fnc = cls._client.get(cls.boto3_client_name).get_products
+        for page in paginate(search_fnc, dict(ServiceCode=service_code, Filters=filters), 'PriceList'):
+            for obj in page:
+                catalog.add(service_code, parse_price_document(obj))
+
+        catalog.mark_loaded(service_code, location)
+        try:
+            catalog.save(path, service_code, location)
+        except OSError as exc:
+            LOGGER.warning(f'Unable to persist the pricing catalog to {path} - {exc}')
+
+        return catalog
+
+    @classmethod
+    def import_offer_file(cls, path: str) -> PricingCatalog:
+        """Adds the products of a downloaded AWS price list offer file (json) to the session's catalog.
+
+        docs.aws.amazon.com/awsaccountbilling/latest/aboutv2/using-ppslong.html
+
+        :param path:
+        :return: PricingCatalog
+        """
+        catalog = cls.get_catalog()
+        catalog.import_offer_file(path)
+        return catalog
+
+    @staticmethod
+    def pricing_key(pricing_params: dict) -> tuple:
+        """A hashable key for the get_products params of a service object. See PricingMixin._pricing_params"""
+        return pricing_params['service_code'], tuple(sorted(
+            (search_filter['Field'], str(search_filter['Value']).lower()) for search_filter in pricing_params['filters']
+        ))
+
+    @classmethod
+    async def get_prices(cls, pricing_params_list: list) -> list:
+        """Resolves the Pricing for each of the get_products params in pricing_params_list.
+
+        Each distinct set of params is only resolved once and they are resolved concurrently.
+            The session's pricing catalog is used if it has been loaded, see Pricing.load_catalog
+
+        :param pricing_params_list: list<dict(service_code=str, filters=list)> See PricingMixin._pricing_params
+        :return: list<Pricing> In the same order as pricing_params_list, None if no product matched the params
+        """
+        distinct_params = {}
+        for pricing_params in pricing_params_list:
+            distinct_params.setdefault(cls.pricing_key(pricing_params), pricing_params)
+
+        async def _get_price(pricing_params):
+            entry = cls.get_catalog().lookup(pricing_params['service_code'], pricing_params['filters'])
+            if entry:
+                return cls.from_catalog(entry)
+
+            pricing = await cls.list(limit=1, **pricing_params)
+            return pricing.service[0] if pricing.service else None
+
+        prices = await cls._client.scheduler.gather(
+            *[_get_price(pricing_params) for pricing_params in distinct_params.values()],
+            service_name=cls.boto3_client_name
+        )
+        prices = dict(zip(distinct_params.keys(), prices))
+        return [prices[cls.pricing_key(pricing_params)] for pricing_params in pricing_params_list]
+
     def get_on_demand_hourly(self, currency='usd'):
-        pricing = list(list(self.on_demand.values())[0]["price_dimensions"].values())[0]
-        return float(pricing['price_per_unit'][currency])
+        return self.price_dimensions[0]['price_per_unit'][currency]
 
     def get_on_demand_monthly(self, currency='usd'):
         return self.get_on_demand_hourly(currency) * 24 * 30
 
     @classmethod
-    async def _list(cls, **kwargs) -> list:
-        """Returns an instance for each object
+    async def _iter_list(cls, keep_raw: bool = False, **kwargs):
+        """Yields the instances for each page of the get_products operation
         JMESPath for filtering: https://jmespath.org
+
+        Only the attributes and on demand price dimensions of each product are parsed, see parse_price_document
+        :param keep_raw: Keep the full price list document of each product as obj.document
         :param kwargs:
-        :return: list<cls()>
+        :return: async_generator<list<cls()>>
         """
         kwargs = {cls._to_boto3_case(k): v for k, v in kwargs.items() if k not in ['list_kwargs', 'describe_kwargs']}
         response_key = cls._boto3_describe_def.get('response_key', f'{cls.key_prefix}s')
         fnc_base = camel_to_snake(cls.key_prefix)
         fnc_name = cls._boto3_describe_def.get('client_call', f'describe_{fnc_base}s')
-        return_val = []
 
         client = cls._client.get(cls.boto3_client_name)
         boto3_fnc = getattr(client, fnc_name)
-        response = paginated_search(boto3_fnc, kwargs, response_key)
-        for obj in response:
-            loaded_obj = json.loads(obj)
-            attributes = loaded_obj['product']['attributes']
-            for k, v in attributes.items():
-                if attributes[k] == 'Yes':
-                    attributes[k] = True
-                elif attributes[k] == 'No':
-                    attributes[k] = False
-
-            return_val.append(dict(**loaded_obj['terms'], **attributes))
-
-        return [cls(_loaded=True, **obj) for obj in return_val]
+        for page in paginate(boto3_fnc, kwargs, response_key):
+            yield [cls.from_catalog(parse_price_document(obj, keep_raw)) for obj in page]
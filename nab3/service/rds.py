@@ -1,27 +1,38 @@
 import logging
+from datetime import datetime as dt, timedelta
 
 from nab3.mixin import MetricMixin
-from nab3.base import PaginatedBaseService
-from nab3.utils import snake_to_camelcap
+from nab3.base import PaginatedBaseService, ServiceWrapper
+from nab3.utils import get_batch_size, snake_to_camelcap
 
 LOGGER = logging.getLogger('nab3')
 LOGGER.setLevel(logging.WARNING)
 
 
+def snake_to_rds_case(str_obj: str) -> str:
+    # RDS params capitalize the DB acronym e.g. db_cluster_identifier -> DBClusterIdentifier
+    if str_obj.startswith('DB'):
+        return str_obj
+    str_obj = snake_to_camelcap(str_obj)
+    return f'DB{str_obj[2:]}' if str_obj.startswith('Db') else str_obj
+
+
 class RDSCluster(MetricMixin, PaginatedBaseService):
     """
     boto3.amazonaws.com/v1/documentation/api/latest/reference/services/rds.html#RDS.Client.describe_db_clusters
     """
     boto3_client_name = 'rds'
     key_prefix = 'DBCluster'
-    _to_boto3_case = snake_to_camelcap
+    _tag_resource_type = 'rds:cluster'
+    _config_resource_type = 'AWS::RDS::DBCluster'
+    _to_boto3_case = snake_to_rds_case
     _boto3_response_override = dict(DBClusterIdentifier='id', DbClusterResourceId='resource_id')
     _response_alias = dict(members='rds_instance')
     _boto3_describe_def = dict(
         client_call='describe_db_clusters',
         call_params=dict(
-            id=dict(name='db_cluster_identifier', type=str),
-            filters=dict(name='filters', type=list)
+            id=dict(name='DBClusterIdentifier', type=str),
+            filters=dict(name='Filters', type=list)
         ),
         response_key='DBClusters'
     )
@@ -40,6 +51,132 @@ class RDSCluster(MetricMixin, PaginatedBaseService):
     DescribePendingMaintenanceActions
     """
 
+    def __init__(self, **kwargs):
+        self.create_service_field('members', 'rds_instance')
+        super(self._get_service_class('rds_cluster'), self).__init__(**kwargs)
+
+    @classmethod
+    async def list(cls, with_related=[], **kwargs) -> ServiceWrapper:
+        """Returns an instance for each cluster
+
+        Related services are retrieved for every cluster together e.g. list(with_related=['members'])
+            describes the members of every cluster using a few describe_db_instances calls.
+
+        :param with_related: list of related AWS resources to return
+        :param kwargs:
+        :return: list<cls()>
+        """
+        clusters = await super(cls, cls).list(**kwargs)
+        if with_related and clusters:
+            await clusters.fetch(*with_related)
+        return clusters
+
+    @classmethod
+    async def bulk_load_members(cls, cluster_list: list, force: bool = False):
+        """Retrieves the members of every cluster in cluster_list together.
+
+        Called by ServiceWrapper.fetch so a list of clusters is described using describe_db_instances
+            with the db-cluster-id filter, 100 clusters per call, rather than a describe call per member.
+
+        :param cluster_list: list<RDSCluster>
+        :param force:
+        :return:
+        """
+        if force:
+            cluster_list = [cluster for cluster in cluster_list if cluster._claim_forced_load('members')]
+        else:
+            cluster_list = [cluster for cluster in cluster_list if not cluster.members.is_loaded()]
+
+        await cls._resolve_members(cluster_list)
+
+    @classmethod
+    async def _resolve_members(cls, cluster_list: list):
+        """Describes the members of every cluster in cluster_list and attaches them to their cluster by id.
+
+        :param cluster_list: list<RDSCluster>
+        :return:
+        """
+        cluster_list = [cluster for cluster in cluster_list if cluster.members.service]
+        if not cluster_list:
+            return
+
+        instance_class = cluster_list[0].members.service_class
+        cluster_ids = list({cluster.id: None for cluster in cluster_list})
+        chunk_size = get_batch_size(instance_class._describe_boto3_fnc())
+        loaded_results = await cls._client.scheduler.gather(
+            *[instance_class._list(filters=[dict(Name='db-cluster-id', Values=cluster_ids[x:x+chunk_size])])
+              for x in range(0, len(cluster_ids), chunk_size)],
+            service_name=cls.boto3_client_name
+        )
+        # Each described instance updates the canonical member instance in place
+        instance_map = {instance.id: instance_class._register(instance)
+                        for instances in loaded_results for instance in instances}
+
+        for cluster in cluster_list:
+            for member in cluster.members:
+                # Match the behavior of load for members that weren't in the response
+                member.service._loaded = True
+            cluster.members = [instance_map.get(member.id, member.service) for member in cluster.members]
+
+    async def load_members(self, force=False):
+        """Retrieves the cluster's members.
+
+        stored as the instance attribute `obj.members`
+
+        :return: list<RDSInstance>
+        """
+        if self.members.is_loaded() and not force:
+            return self.members
+
+        await self._resolve_members([self])
+        return self.members
+
+    @classmethod
+    async def set_member_stats(cls,
+                               cluster_list: list,
+                               stat_list: list = None,
+                               statistics: list = ['Average', 'Maximum'],
+                               start_time: dt = None,
+                               end_time: dt = None,
+                               interval_as_seconds: int = 300) -> list:
+        """Retrieves the instance level statistics for the members of every cluster in cluster_list.
+
+        The statistics for every member are retrieved together using Metric.get_metric_data
+            e.g. 200 clusters x 2 members x 2 metrics is 2 calls
+
+        For each member: member.stats_list = [list<Metric()>]
+
+        :param cluster_list: list<RDSCluster> the members are retrieved if they haven't been loaded
+        :param stat_list: Defaults to ['CPUUtilization', 'DatabaseConnections']
+        :param statistics:
+        :param start_time: Defaults to 3 hours ago
+        :param end_time: Defaults to now
+        :param interval_as_seconds:
+        :return: list<RDSInstance>
+        """
+        cluster_list = [cluster.service if isinstance(cluster, ServiceWrapper) else cluster for cluster in cluster_list]
+        if not cluster_list:
+            return []
+
+        await cls.bulk_load_members(cluster_list)
+        members = list({id(member): member
+                        for cluster in cluster_list for member in cluster.members.service or []}.values())
+        if not members:
+            return members
+
+        stat_list = stat_list if stat_list else ['CPUUtilization', 'DatabaseConnections']
+        metric_queries = [
+            member.metric_query(metric_name, statistics, interval_as_seconds)
+            for member in members for metric_name in stat_list
+        ]
+        end_time = end_time or dt.utcnow()
+        start_time = start_time or end_time - timedelta(hours=3)
+        metrics = await members[0]._get_service_class('metric').get_metric_data(metric_queries, start_time, end_time)
+        for pos, member in enumerate(members):
+            member.stats_list = metrics[pos * len(stat_list):(pos + 1) * len(stat_list)]
+
+        return members
+
     @property
     def _stat_dimensions(self) -> list:
         return [dict(Name='DBClusterIdentifier', Value=self.id)]
@@ -55,13 +192,15 @@ class RDSInstance(MetricMixin, PaginatedBaseService):
     """
     boto3_client_name = 'rds'
     key_prefix = 'DBInstance'
-    _to_boto3_case = snake_to_camelcap
+    _tag_resource_type = 'rds:db'
+    _config_resource_type = 'AWS::RDS::DBInstance'
+    _to_boto3_case = snake_to_rds_case
     _boto3_response_override = dict(DBInstanceIdentifier='id')
     _boto3_describe_def = dict(
         client_call='describe_db_instances',
         call_params=dict(
-            id=dict(name='db_instance_identifier', type=str),
-            filters=dict(name='filters', type=list)
+            id=dict(name='DBInstanceIdentifier', type=str),
+            filters=dict(name='Filters', type=list)
         ),
         response_key='DBInstances'
     )
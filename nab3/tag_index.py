@@ -0,0 +1,86 @@
+import weakref
+
+
+class TagIndex:
+    """Holds the tags retrieved using the Resource Groups Tagging API along with an inverted index of them.
+
+    The tags of each resource type are retrieved once using a paginated get_resources scan, see AWS.load_tags.
+    Each service object tagged from the index has its tags set as `obj.tag_map` dict(key=value)
+        and is added to the inverted index which maps each (tag key, tag value) to the objects with that tag.
+
+    Filter.run uses the inverted index to skip objects that can't match a tag_map__${key}__exact lookup
+        e.g. Filter(tag_map__team__exact='platform') only evaluates the objects tagged team=platform.
+
+    Objects are weakly referenced so they are released once nothing else references them.
+    """
+
+    def __init__(self):
+        self._resource_tags = {}  # resource type -> dict(tag key from arn -> dict(key=value))
+        self._index = {}  # tag key -> dict(tag value -> WeakSet<service obj>)
+        self._tagged = weakref.WeakKeyDictionary()  # service obj -> dict(key=value)
+
+    def is_loaded(self, resource_type: str) -> bool:
+        return resource_type in self._resource_tags
+
+    def set_resource_tags(self, resource_type: str, resource_tags: dict):
+        """
+        :param resource_type: The Resource Groups Tagging API resource type e.g. ec2:instance
+        :param resource_tags: dict(tag key from arn -> dict(key=value)) for every tagged resource of the type
+        :return:
+        """
+        self._resource_tags[resource_type] = resource_tags
+
+    def get_resource_tags(self, resource_type: str, tag_key: str) -> dict:
+        """Returns the tags of the resource. Resources without tags aren't returned by get_resources.
+
+        :param resource_type:
+        :param tag_key: See BaseService._tag_key
+        :return: dict(key=value)
+        """
+        return dict(self._resource_tags.get(resource_type, {}).get(tag_key, {}))
+
+    def add(self, service_obj, tags: dict):
+        """Sets the tag_map of the service_obj and indexes it by each of its tags.
+            obj.tags is left as the describe response e.g. list(dict(key=str, value=str))
+
+        :param service_obj:
+        :param tags: dict(key=value)
+        :return:
+        """
+        self.discard(service_obj)
+        service_obj.tag_map = tags
+        self._tagged[service_obj] = tags
+        for key, value in tags.items():
+            self._index.setdefault(key, {}).setdefault(value, weakref.WeakSet()).add(service_obj)
+
+    def discard(self, service_obj):
+        for key, value in self._tagged.pop(service_obj, {}).items():
+            tagged_objects = self._index.get(key, {}).get(value)
+            if tagged_objects is not None:
+                tagged_objects.discard(service_obj)
+
+    def is_tagged(self, service_obj) -> bool:
+        """True if the service_obj's tags were set by the index"""
+        return service_obj in self._tagged
+
+    def lookup(self, key: str, values: list = None) -> list:
+        """Returns the tagged objects with the tag key and one of the values.
+
+        :param key: The tag key
+        :param values: list<str> If not provided, any object with the tag key is returned
+        :return: list<service obj>
+        """
+        tag_values = self._index.get(key, {})
+        values = tag_values.keys() if values is None else values
+        matches = {}
+        for value in values:
+            matches.update({id(service_obj): service_obj for service_obj in tag_values.get(value, [])})
+        return list(matches.values())
+
+    def clear(self):
+        self._resource_tags.clear()
+        self._index.clear()
+        self._tagged = weakref.WeakKeyDictionary()
+
+    def __len__(self):
+        return len(self._tagged)
@@ -24,6 +24,134 @@ PRICING_REGION_MAP = {
         }
 
 
+# The key containing the token in the paged response -> The param used to request the next page
+# Not every service follows the same convention e.g. ecs is camelBack, rds uses Marker and elbv2 uses NextMarker
+PAGINATION_TOKENS = {
+    'NextToken': 'NextToken',
+    'nextToken': 'nextToken',
+    'Marker': 'Marker',
+    'NextMarker': 'Marker',
+    'PaginationToken': 'PaginationToken'
+}
+
+
+# boto3 service name -> operation name -> the request limits of the operation
+#   batch_size: The maximum number of ids accepted by a single request
+#   page_size: tuple(request param, max value) used to request as many results per page as the operation allows
+#   page_size_exclusive: Params that can't be used along with the page size param e.g. ec2 ids
+#   max_datapoints: The maximum number of datapoints returned by a single request
+OPERATION_LIMITS = {
+    'application-autoscaling': dict(
+        describe_scaling_policies=dict(batch_size=50, page_size=('MaxResults', 50)),
+    ),
+    'autoscaling': dict(
+        describe_auto_scaling_groups=dict(batch_size=100, page_size=('MaxRecords', 100)),
+        describe_auto_scaling_instances=dict(batch_size=50, page_size=('MaxRecords', 50)),
+        describe_launch_configurations=dict(batch_size=50, page_size=('MaxRecords', 100)),
+        describe_policies=dict(batch_size=50, page_size=('MaxRecords', 100)),
+    ),
+    'cloudwatch': dict(
+        describe_alarm_history=dict(page_size=('MaxRecords', 100)),
+        describe_alarms=dict(batch_size=100, page_size=('MaxRecords', 100)),
+        get_metric_data=dict(batch_size=500),
+        get_metric_statistics=dict(max_datapoints=1440),
+    ),
+    'config': dict(
+        select_aggregate_resource_config=dict(page_size=('Limit', 100)),
+        select_resource_config=dict(page_size=('Limit', 100)),
+    ),
+    'ec2': dict(
+        describe_images=dict(page_size=('MaxResults', 1000), page_size_exclusive=('ImageIds',)),
+        describe_instances=dict(page_size=('MaxResults', 1000), page_size_exclusive=('InstanceIds',)),
+        describe_security_groups=dict(page_size=('MaxResults', 1000), page_size_exclusive=('GroupIds', 'GroupNames')),
+    ),
+    'ecs': dict(
+        describe_clusters=dict(batch_size=100),
+        describe_container_instances=dict(batch_size=100),
+        describe_services=dict(batch_size=10),
+        describe_tasks=dict(batch_size=100),
+        list_clusters=dict(page_size=('maxResults', 100)),
+        list_container_instances=dict(page_size=('maxResults', 100)),
+        list_services=dict(page_size=('maxResults', 100)),
+        list_tasks=dict(page_size=('maxResults', 100)),
+    ),
+    'elasticache': dict(
+        describe_cache_clusters=dict(page_size=('MaxRecords', 100)),
+        describe_replication_groups=dict(page_size=('MaxRecords', 100)),
+        describe_reserved_cache_nodes=dict(page_size=('MaxRecords', 100)),
+    ),
+    'elb': dict(
+        describe_load_balancers=dict(page_size=('PageSize', 400)),
+    ),
+    'elbv2': dict(
+        describe_load_balancers=dict(batch_size=20, page_size=('PageSize', 400)),
+        describe_target_groups=dict(batch_size=20, page_size=('PageSize', 400)),
+    ),
+    'kafka': dict(
+        list_clusters=dict(page_size=('MaxResults', 100)),
+        list_nodes=dict(page_size=('MaxResults', 100)),
+    ),
+    'pricing': dict(
+        get_products=dict(page_size=('MaxResults', 100)),
+    ),
+    'rds': dict(
+        describe_db_clusters=dict(page_size=('MaxRecords', 100)),
+        describe_db_instances=dict(batch_size=100, page_size=('MaxRecords', 100)),
+    ),
+    'resourcegroupstaggingapi': dict(
+        get_resources=dict(page_size=('ResourcesPerPage', 100)),
+    ),
+}
+
+
+def get_service_name(search_fnc) -> str:
+    """Returns the boto3 service name for a boto3 client method e.g. ecs
+
+    :param search_fnc: boto3 client method e.g. client.describe_services
+    :return: str None if search_fnc isn't a boto3 client method
+    """
+    try:
+        return search_fnc.__self__.meta.service_model.service_name
+    except AttributeError:
+        return None
+
+
+def get_operation_limits(search_fnc) -> dict:
+    """Returns the OPERATION_LIMITS entry for a boto3 client method.
+
+    :param search_fnc: boto3 client method e.g. client.describe_services
+    :return: dict
+    """
+    return OPERATION_LIMITS.get(get_service_name(search_fnc), {}).get(search_fnc.__name__, {})
+
+
+def get_batch_size(search_fnc, default: int = 50) -> int:
+    """Returns the maximum number of ids the operation accepts in a single request.
+
+    :param search_fnc: boto3 client method e.g. client.describe_services
+    :param default: Used if the operation isn't in OPERATION_LIMITS
+    :return: int
+    """
+    return get_operation_limits(search_fnc).get('batch_size', default)
+
+
+def with_page_size(search_fnc, search_kwargs: dict) -> dict:
+    """Sets the page size param to the max allowed by the operation if it hasn't been provided.
+
+    :param search_fnc: boto3 client method e.g. client.describe_auto_scaling_groups
+    :param search_kwargs:
+    :return: dict A copy of search_kwargs
+    """
+    search_kwargs = dict(search_kwargs)
+    operation_limits = get_operation_limits(search_fnc)
+    page_size = operation_limits.get('page_size')
+    if page_size and page_size[0] not in search_kwargs \
+            and not any(search_kwargs.get(param) for param in operation_limits.get('page_size_exclusive', [])):
+        search_kwargs[page_size[0]] = page_size[1]
+
+    return search_kwargs
+
+
 def camel_to_snake(str_obj: str) -> str:
     return re.sub('([a-z0-9])([A-Z])', r'\1_\2', str_obj).lower()
 
@@ -41,26 +169,72 @@ def snake_to_camelcap(str_obj: str) -> str:
     return str_obj.replace('_', '')  # Remove underscores
 
 
+def load_dependencies(*relations):
+    """Declares the relations a custom load_${relation} method depends on.
+
+    BaseService.fetch loads the dependencies first and runs load methods that don't depend on each other concurrently.
+
+    @load_dependencies('asg')
+    async def load_security_groups(self, force=False):
+
+    :param relations: The names of relations populated by another custom load method e.g. 'asg'
+    :return:
+    """
+    def decorator(fnc):
+        fnc.load_dependencies = relations
+        return fnc
+    return decorator
+
+
+def paginate(search_fnc, search_kwargs: dict, response_key: str):
+    """Lazily retrieve each paged response, yielding the list of response objects for each page.
+    A page is only requested once the previous page has been consumed, so breaking early avoids any further calls.
+
+    :param search_fnc:
+    :param search_kwargs:
+    :param response_key:
+    :return: generator<list>
+    """
+    search_kwargs = with_page_size(search_fnc, search_kwargs)
+
+    while True:
+        response = search_fnc(**search_kwargs)
+        yield response.get(response_key, [])
+
+        next_token = None
+        for response_token, request_token in PAGINATION_TOKENS.items():
+            if response.get(response_token):
+                next_token = search_kwargs[request_token] = response[response_token]
+                break
+
+        if next_token is None:
+            return
+
+
 def paginated_search(search_fnc, search_kwargs: dict, response_key: str, max_results: int = None) -> list:
     """Retrieve and aggregate each paged response, returning a single list of each response object
     :param search_fnc:
     :param search_kwargs:
     :param response_key:
-    :param max_results:
+    :param max_results: Stop paginating once this many objects have been retrieved
     :return:
     """
     results = []
 
-    while True:
-        response = search_fnc(**search_kwargs)
-        results += response.get(response_key, [])
-        search_kwargs['NextToken'] = response.get('NextToken')
+    for page in paginate(search_fnc, search_kwargs, response_key):
+        results += page
+        if max_results and len(results) >= max_results:
+            return results[:max_results]
 
-        if search_kwargs['NextToken'] is None or (max_results and len(results) >= max_results):
-            return results
+    return results
 
 
-async def describe_resource(search_fnc, id_key: str, id_list: list, search_kwargs: dict, chunk_size: int = 50) -> list:
+async def describe_resource(search_fnc,
+                            id_key: str,
+                            id_list: list,
+                            search_kwargs: dict,
+                            chunk_size: int = None,
+                            scheduler=None) -> list:
     """Chunks up describe operation and runs requests concurrently.
 
     :param search_fnc: Name of the boto3 function e.g. describe_auto_scaling_groups
@@ -68,12 +242,22 @@ async def describe_resource(search_fnc, id_key: str, id_list: list, search_kwarg
     :param id_list: List of id values
     :param search_kwargs: Additional arguments to pass to the describe operation like Filter, MaxRecords, or Tags
     :param chunk_size: Used to set request size. Cannot exceed the operation's MaxRecords or there may be data loss.
+        Defaults to the operation's batch size in OPERATION_LIMITS
+    :param scheduler: nab3.scheduler.Scheduler The session's scheduler, used to bound the concurrent requests
     :return: list<boto3 describe response>
     """
+    chunk_size = chunk_size or get_batch_size(search_fnc)
+    search_kwargs = with_page_size(search_fnc, search_kwargs)
+
     async def _describe(chunked_list):
         return search_fnc(**{**{id_key: chunked_list}, **search_kwargs})
 
-    if len(id_list) <= chunk_size:
+    if scheduler is not None:
+        return await scheduler.gather(
+            *[_describe(id_list[x:x+chunk_size]) for x in range(0, len(id_list), chunk_size)],
+            service_name=get_service_name(search_fnc)
+        )
+    elif len(id_list) <= chunk_size:
         return [search_fnc(**{**{id_key: id_list}, **search_kwargs})]
 
     return await asyncio.gather(*[_describe(id_list[x:x+chunk_size]) for x in range(0, len(id_list), chunk_size)])
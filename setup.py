@@ -13,6 +13,9 @@ setup(
         'boto3<2.0.0',
         'double-click<1.0.0',
     ],
+    extras_require={
+        'analysis': ['numpy'],
+    },
     packages=find_namespace_packages(include=['nab3', 'nab3.*']),
     package_data={'': ['*.md']},
     include_package_data=True,
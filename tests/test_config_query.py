@@ -0,0 +1,181 @@
+import asyncio
+import json
+
+import boto3
+import pytest
+from botocore.stub import Stubber
+
+from nab3 import AWS
+
+ACCOUNT_ID = '111111111111'
+REGION = 'us-east-1'
+
+# Recorded select_resource_config results, one per mapped resource type
+CONFIG_ITEMS = dict(
+    asg=dict(
+        resourceType='AWS::AutoScaling::AutoScalingGroup',
+        configuration=dict(autoScalingGroupName='web',
+                           autoScalingGroupARN='arn:aws:autoscaling:us-east-1:111111111111:autoScalingGroup:web',
+                           launchConfigurationName='web-lc',
+                           minSize=2,
+                           maxSize=4,
+                           instances=[dict(instanceId='i-0a1b2c3d', instanceType='m5.large')])
+    ),
+    launch_configuration=dict(
+        resourceType='AWS::AutoScaling::LaunchConfiguration',
+        configuration=dict(launchConfigurationName='web-lc',
+                           launchConfigurationARN='arn:aws:autoscaling:us-east-1:111111111111:launchConfiguration:web-lc',
+                           imageId='ami-0a1b2c3d',
+                           instanceType='m5.large')
+    ),
+    security_group=dict(
+        resourceType='AWS::EC2::SecurityGroup',
+        configuration=dict(groupId='sg-0a1b2c3d',
+                           groupName='web',
+                           ipPermissions=[dict(fromPort=443, toPort=443, ipProtocol='tcp',
+                                               ipRanges=['0.0.0.0/0'])])
+    ),
+    instance=dict(
+        resourceType='AWS::EC2::Instance',
+        configuration=dict(instanceId='i-0a1b2c3d',
+                           instanceType='m5.large',
+                           state=dict(code=16, name='running'),
+                           securityGroups=[dict(groupId='sg-0a1b2c3d', groupName='web')])
+    ),
+    load_balancer=dict(
+        resourceType='AWS::ElasticLoadBalancingV2::LoadBalancer',
+        configuration=dict(loadBalancerName='web-alb',
+                           loadBalancerArn='arn:aws:elasticloadbalancing:us-east-1:111111111111:loadbalancer/app/web-alb/1',
+                           dNSName='web-alb-1.us-east-1.elb.amazonaws.com',
+                           type='application')
+    ),
+    load_balancer_classic=dict(
+        resourceType='AWS::ElasticLoadBalancing::LoadBalancer',
+        configuration=dict(loadBalancerName='web-elb',
+                           dNSName='web-elb-1.us-east-1.elb.amazonaws.com',
+                           instances=[dict(instanceId='i-0a1b2c3d')])
+    ),
+    rds_cluster=dict(
+        resourceType='AWS::RDS::DBCluster',
+        configuration=dict(dBClusterIdentifier='orders',
+                           dBClusterArn='arn:aws:rds:us-east-1:111111111111:cluster:orders',
+                           engine='aurora-postgresql')
+    ),
+    rds_instance=dict(
+        resourceType='AWS::RDS::DBInstance',
+        configuration=dict(dBInstanceIdentifier='orders-1',
+                           dBInstanceArn='arn:aws:rds:us-east-1:111111111111:db:orders-1',
+                           dBInstanceClass='db.r5.large',
+                           dBClusterIdentifier='orders')
+    ),
+)
+
+# The attribute and value that identify each recorded result once normalized
+EXPECTED_KEYS = dict(
+    asg=('name', 'web'),
+    launch_configuration=('name', 'web-lc'),
+    security_group=('id', 'sg-0a1b2c3d'),
+    instance=('id', 'i-0a1b2c3d'),
+    load_balancer=('name', 'web-alb'),
+    load_balancer_classic=('name', 'web-elb'),
+    rds_cluster=('id', 'orders'),
+    rds_instance=('id', 'orders-1'),
+)
+
+
+def _result(config_item: dict, account_id: str = ACCOUNT_ID, region: str = REGION) -> str:
+    return json.dumps(dict(config_item, accountId=account_id, awsRegion=region, tags=[]))
+
+
+def _expression(resource_type: str) -> str:
+    return f"SELECT resourceType, accountId, awsRegion, configuration, tags WHERE resourceType IN ('{resource_type}')"
+
+
+@pytest.fixture
+def aws():
+    session = boto3.Session(aws_access_key_id='testing', aws_secret_access_key='testing', region_name=REGION)
+    return AWS(session)
+
+
+@pytest.fixture
+def config_stub(aws):
+    stubber = Stubber(aws.client.get('config'))
+    with stubber:
+        yield stubber
+    stubber.assert_no_pending_responses()
+
+
+@pytest.mark.parametrize('service_name', sorted(CONFIG_ITEMS.keys()))
+def test_list_from_config(aws, config_stub, service_name):
+    config_item = CONFIG_ITEMS[service_name]
+    config_stub.add_response(
+        'select_resource_config',
+        dict(Results=[_result(config_item)]),
+        dict(Expression=_expression(config_item['resourceType']), Limit=100)
+    )
+
+    service_class = getattr(aws, service_name)
+    resources = asyncio.run(service_class.list_from_config())
+
+    assert len(resources) == 1
+    resource = resources[0].service
+    attr_name, attr_value = EXPECTED_KEYS[service_name]
+    assert getattr(resource, attr_name) == attr_value
+    assert resource.account_id == ACCOUNT_ID
+    assert resource.aws_region == REGION
+    assert resource._loaded
+
+
+def test_list_from_config_uses_identity_map(aws, config_stub):
+    config_item = CONFIG_ITEMS['asg']
+    config_stub.add_response(
+        'select_resource_config',
+        dict(Results=[_result(config_item)]),
+        dict(Expression=_expression(config_item['resourceType']), Limit=100)
+    )
+
+    asg = aws.asg._register(aws.asg(name='web'))
+    resources = asyncio.run(aws.asg.list_from_config())
+
+    assert resources[0].service is asg
+    assert asg.min_size == 2
+
+
+def test_load_from_config_aggregator(aws, config_stub):
+    # The same ASG and launch configuration names exist in both accounts
+    asg_item, lc_item = CONFIG_ITEMS['asg'], CONFIG_ITEMS['launch_configuration']
+    other_asg_item = dict(asg_item, configuration=dict(asg_item['configuration'], minSize=6, maxSize=12))
+    config_stub.add_response(
+        'select_aggregate_resource_config',
+        dict(Results=[_result(asg_item, '111111111111', 'us-east-1'),
+                      _result(other_asg_item, '222222222222', 'us-west-2'),
+                      _result(lc_item, '111111111111', 'us-east-1'),
+                      _result(lc_item, '222222222222', 'us-west-2')]),
+        dict(Expression=("SELECT resourceType, accountId, awsRegion, configuration, tags WHERE resourceType IN "
+                         "('AWS::AutoScaling::AutoScalingGroup', 'AWS::AutoScaling::LaunchConfiguration')"),
+             ConfigurationAggregatorName='org',
+             Limit=100)
+    )
+
+    existing_asg = aws.asg._register(aws.asg(name='web'))
+    inventory = asyncio.run(aws.load_from_config('asg', 'launch_configuration', aggregator_name='org'))
+
+    asgs = [asg.service for asg in inventory['asg']]
+    assert [(asg.name, asg.account_id, asg.aws_region, asg.min_size) for asg in asgs] == [
+        ('web', '111111111111', 'us-east-1', 2),
+        ('web', '222222222222', 'us-west-2', 6),
+    ]
+    assert asgs[0] is not asgs[1]
+    assert all(asg is not existing_asg for asg in asgs)
+    assert not existing_asg._loaded
+
+    launch_configurations = [launch_configuration.service for launch_configuration in inventory['launch_configuration']]
+    assert [launch_configuration.account_id for launch_configuration in launch_configurations] == [
+        '111111111111', '222222222222'
+    ]
+    assert launch_configurations[0] is not launch_configurations[1]
+
+
+def test_load_from_config_unsupported_service(aws):
+    with pytest.raises(ValueError):
+        asyncio.run(aws.load_from_config('ecs_cluster'))
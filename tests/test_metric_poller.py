@@ -0,0 +1,80 @@
+import asyncio
+from types import SimpleNamespace
+
+from nab3 import metric_poller
+from nab3.metric_poller import MetricPoller
+from nab3.metric_store import _to_epoch
+
+PERIOD = 60
+START = 1_600_000_000 // PERIOD * PERIOD
+
+
+class FakeMetricData:
+    """Serves a datapoint for every period, each only visible once its ingestion latency has passed"""
+
+    def __init__(self, clock: list, latency: dict):
+        self.clock = clock
+        self.latency = latency  # metric name -> seconds after the period ends before the datapoint is visible
+        self.start_times = []
+
+    async def get_metric_data(self, metric_queries, start_time, end_time):
+        start_time, end_time = _to_epoch(start_time), _to_epoch(end_time)
+        self.start_times.append(start_time)
+        results = []
+        for metric_query in metric_queries:
+            latency = self.latency[metric_query['metric_name']]
+            results.append([
+                SimpleNamespace(timestamp=timestamp, value=float(timestamp))
+                for timestamp in range(START, end_time, PERIOD)
+                if timestamp >= start_time and timestamp + PERIOD + latency <= self.clock[0]
+            ])
+        return results
+
+
+def _poll_tails(metric_names: list, latency: dict, polls: int, monkeypatch) -> tuple:
+    clock = [START + 1]
+    metric_data = FakeMetricData(clock, latency)
+    poller = MetricPoller(metric_data.get_metric_data, lookback_as_seconds=600)
+    # Polls are driven by the test rather than the background loop
+    monkeypatch.setattr(MetricPoller, '_ensure_running', lambda self: None)
+    monkeypatch.setattr(metric_poller.time, 'time', lambda: clock[0])
+
+    async def _run():
+        yielded = {metric_name: [] for metric_name in metric_names}
+
+        async def _consume(metric_name):
+            async for datapoint in poller.tail(dict(metric_name=metric_name, interval_as_seconds=PERIOD),
+                                               start_time=START):
+                yielded[metric_name].append(datapoint.timestamp)
+
+        consumers = [asyncio.ensure_future(_consume(metric_name)) for metric_name in metric_names]
+        await asyncio.sleep(0)
+        for _ in range(polls):
+            clock[0] += PERIOD
+            await poller.poll()
+            await asyncio.sleep(0)
+
+        for consumer in consumers:
+            consumer.cancel()
+        await asyncio.gather(*consumers, return_exceptions=True)
+        return yielded
+
+    return asyncio.run(_run()), metric_data, clock[0]
+
+
+def test_late_datapoints_are_yielded(monkeypatch):
+    yielded, _, _ = _poll_tails(['CPUUtilization'], dict(CPUUtilization=150), polls=10, monkeypatch=monkeypatch)
+
+    # Every period that ended at least 150 seconds before the last poll, none are skipped
+    assert yielded['CPUUtilization'] == [START + PERIOD * pos for pos in range(7)]
+
+
+def test_sparse_tail_does_not_hold_back_start_time(monkeypatch):
+    # The sparse metric has no datapoints during the test
+    yielded, metric_data, now = _poll_tails(['CPUUtilization', 'Sparse'], dict(CPUUtilization=0, Sparse=10 ** 6),
+                                            polls=30, monkeypatch=monkeypatch)
+
+    assert yielded['Sparse'] == []
+    assert yielded['CPUUtilization'] == [START + PERIOD * pos for pos in range(30)]
+    assert metric_data.start_times[0] == START
+    assert metric_data.start_times[-1] >= now - PERIOD - 600
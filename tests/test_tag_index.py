@@ -0,0 +1,51 @@
+import asyncio
+
+import boto3
+import pytest
+
+from nab3 import AWS, Exclude, Filter
+from nab3.base import ServiceWrapper
+
+
+@pytest.fixture
+def aws():
+    session = boto3.Session(aws_access_key_id='testing', aws_secret_access_key='testing', region_name='us-east-1')
+    return AWS(session)
+
+
+@pytest.fixture
+def instances(aws):
+    tag_index = aws.client.tag_index
+    instance_list = [aws.instance._register(aws.instance(_loaded=True, id=f'i-{pos}')) for pos in range(3)]
+    tag_index.add(instance_list[0], dict(team='x'))
+    tag_index.add(instance_list[1], dict(team='y'))
+    # i-2 has no tags, it isn't in the index
+
+    instances = ServiceWrapper(aws.instance)
+    instances.service = instance_list
+    return instances
+
+
+def _ids(filter_obj, instances) -> list:
+    return sorted(instance.id for instance in asyncio.run(filter_obj.run(instances)))
+
+
+def test_filter_uses_tag_index(instances):
+    assert _ids(Filter(tag_map__team__exact='x'), instances) == ['i-0']
+    assert _ids(Filter(tag_map__team__exact_any=['x', 'y']), instances) == ['i-0', 'i-1']
+
+
+def test_negated_filter(instances):
+    assert _ids(~Filter(tag_map__team__exact='x'), instances) == ['i-1', 'i-2']
+
+
+def test_exclude(instances):
+    assert _ids(Exclude(tag_map__team__exact='x'), instances) == ['i-1', 'i-2']
+
+
+def test_exclude_child(instances):
+    filter_obj = Filter(id__startswith='i-') & Exclude(tag_map__team__exact='x')
+    assert _ids(filter_obj, instances) == ['i-1', 'i-2']
+
+    filter_obj = Filter(tag_map__team__exact_any=['x', 'y']) & Exclude(tag_map__team__exact='x')
+    assert _ids(filter_obj, instances) == ['i-1']